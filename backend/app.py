@@ -1,43 +1,121 @@
-from flask import Flask, request, jsonify
-from pymongo import MongoClient
+from flask import Flask, request, jsonify, Response, stream_with_context
 from gridfs import GridFS
 from dotenv import load_dotenv
 import bcrypt
-import certifi
+import logging
 import os
+import sys
 from flask_cors import CORS
 import uuid
 from datetime import datetime
-import face_recognition
-import numpy as np
-import cv2
-import base64
-from PIL import Image
-import io
 import traceback
+from name_cache import StaffNameCache, find_proceeding_with_names
+from mongo_connection import CommandTimer, create_client, get_database
+from db_indexes import ensure_indexes
+from transcript_store import TranscriptStore, TranscriptConflict
+from transcript_export import COMPRESSIONS, FORMATS, content_type_and_filename, export_chunks
+from transcript_search import DEFAULT_LIMIT, TranscriptSearch
+import threading
+import time
 
 # Load environment variables
 load_dotenv()
 
+# Shared with the transcription engine: metrics, logging, model registry, VAD
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python'))
+import metrics
+from log_setup import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+MONGO_COMMAND_SECONDS = metrics.histogram(
+    'mongo_command_seconds', 'MongoDB command round trip', ['command']
+)
+FACE_ENCODING_SECONDS = metrics.histogram(
+    'face_encoding_seconds', 'Decode, detect and encode one face image'
+)
+
 app = Flask(__name__)
 CORS(app)
 
 # MongoDB Atlas setup
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
-db = client["courtroom_db"]
+client = create_client(
+    MONGO_URI,
+    event_listeners=[CommandTimer(lambda command, seconds: MONGO_COMMAND_SECONDS.labels(command).observe(seconds))]
+)
+db = get_database(client)
 fs = GridFS(db)
 
+# Transcripts are stored as append-only segments (legacy GridFS files migrate on first read);
+# every save also updates the full-text search chunks
+transcript_search = TranscriptSearch(db)
+transcript_store = TranscriptStore(db, fs, search=transcript_search)
+
+# Judge/clerk names for proceeding listings, cached in-process
+staff_names = StaffNameCache(db)
+
+# Create any missing indexes in the background so startup isn't held up
+def bootstrap_indexes():
+    try:
+        for error in ensure_indexes(db):
+            logger.error("index_bootstrap_error error=%s", error)
+    except Exception:
+        logger.exception("index_bootstrap_failed")
+    # Then make transcripts saved before search existed searchable
+    try:
+        indexed = transcript_store.index_missing()
+        if indexed:
+            logger.info("search_backfilled transcripts=%d", indexed)
+    except Exception:
+        logger.exception("search_backfill_failed")
+
+threading.Thread(target=bootstrap_indexes, daemon=True).start()
+
+# The face recognition stack (dlib, OpenCV, Pillow, numpy) and the Whisper
+# stack take seconds to import. They are loaded on first use or by warm_up()
+# once the server is up, so login and scheduling don't wait for them.
+face_index = None
+face_index_lock = threading.Lock()
+
+def get_face_index():
+    """Registered face encodings for face login (1:1 and face-only), loaded on first use"""
+    global face_index
+    with face_index_lock:
+        if face_index is None:
+            from face_index import FaceIndex
+            from face_encodings import migrate_face_encodings
+            # Convert any list-format encodings to packed float32 first
+            migrated = migrate_face_encodings(db)
+            if migrated:
+                logger.info("face_encodings_migrated count=%d", migrated)
+            index = FaceIndex(db)
+            index.load()
+            face_index = index
+    return face_index
+
+# Face distance below which two encodings are the same person (lower = more strict)
+FACE_MATCH_THRESHOLD = 0.6
+# Face-only login is refused when another person is nearly as close as the best match
+FACE_AMBIGUITY_MARGIN = 0.05
+
+def flush_session_transcript(proceeding_id, text):
+    """Append a live session's text to the saved transcript (stop or eviction)"""
+    separator = " " if transcript_store.length(proceeding_id) else ""
+    transcript_store.append(proceeding_id, separator + text)
+
 # Import simple transcription module
+warm_up_transcription = None
 try:
-    from simple_transcription import create_transcription_routes
+    from simple_transcription import create_transcription_routes, warm_up as warm_up_transcription
     # Add transcription routes to the app
-    create_transcription_routes(app)
-    print("Simple transcription module loaded successfully!")
+    create_transcription_routes(app, on_flush=flush_session_transcript)
+    logger.info("transcription_module_loaded")
 except ImportError as e:
-    print(f"Transcription module not available: {e}")
-except Exception as e:
-    print(f"Error loading transcription module: {e}")
+    logger.warning("transcription_module_unavailable error=%s", e)
+except Exception:
+    logger.exception("transcription_module_failed")
 
 import traceback
 
@@ -63,6 +141,15 @@ def make_transcript_template(data):
     # join with newline
     return "\n".join(lines)
 
+def template_fields(proceeding):
+    """Fields make_transcript_template expects, from a stored proceeding (parties are nested there)"""
+    fields = dict(proceeding)
+    for party in ("plaintiff", "defendant"):
+        details = proceeding.get(party) or {}
+        fields.setdefault(f"{party}_appelation", details.get("appelation", ""))
+        fields.setdefault(f"{party}_name", details.get("name", ""))
+    return fields
+
 @app.route("/api/schedule", methods=["POST"])
 def schedule_proceeding():
     data = request.get_json(force=True)
@@ -131,13 +218,10 @@ def get_proceedings():
             {"_id": 0}
         ))
 
-        # enrich with judge name
+        # enrich with judge name - one batched lookup, usually served from cache
+        judge_names = staff_names.names("judges", (p["judge_matricule"] for p in procs))
         for p in procs:
-            j = db.judges.find_one(
-                {"matricule": p["judge_matricule"]},
-                {"_id": 0, "name": 1}
-            )
-            p["judge_name"] = j["name"] if j else "Unknown"
+            p["judge_name"] = judge_names.get(p["judge_matricule"], "Unknown")
 
         return jsonify(procs), 200
 
@@ -193,31 +277,12 @@ def get_judges():
 def get_proceeding(proceeding_id):
     """Get individual proceeding data for transcript page"""
     try:
-        # Fetch the proceeding
-        proceeding = db.proceedings.find_one(
-            {"proceeding_id": proceeding_id},
-            {"_id": 0}
-        )
+        # Fetch the proceeding with judge and clerk names in one round trip
+        proceeding = find_proceeding_with_names(db, proceeding_id)
         
         if not proceeding:
             return jsonify({"success": False, "message": "Proceeding not found"}), 404
         
-        # Enrich with judge name
-        judge = db.judges.find_one(
-            {"matricule": proceeding["judge_matricule"]},
-            {"_id": 0, "name": 1}
-        )
-        if judge:
-            proceeding["judge_name"] = judge["name"]
-        
-        # Enrich with clerk name
-        clerk = db.clerks.find_one(
-            {"matricule": proceeding["clerk_matricule"]},
-            {"_id": 0, "name": 1}
-        )
-        if clerk:
-            proceeding["clerk_name"] = clerk["name"]
-        
         return jsonify(proceeding), 200
         
     except Exception as e:
@@ -228,23 +293,12 @@ def get_proceeding(proceeding_id):
 def get_proceeding_for_edit(proceeding_id):
     """Get individual proceeding data for editing"""
     try:
-        # Fetch the proceeding
-        proceeding = db.proceedings.find_one(
-            {"proceeding_id": proceeding_id},
-            {"_id": 0}
-        )
+        # Fetch the proceeding with the judge name in one round trip
+        proceeding = find_proceeding_with_names(db, proceeding_id, include_clerk=False)
         
         if not proceeding:
             return jsonify({"error": "Proceeding not found"}), 404
         
-        # Enrich with judge name
-        judge = db.judges.find_one(
-            {"matricule": proceeding["judge_matricule"]},
-            {"_id": 0, "name": 1}
-        )
-        if judge:
-            proceeding["judge_name"] = judge["name"]
-        
         return jsonify(proceeding), 200
         
     except Exception as e:
@@ -320,11 +374,9 @@ def delete_proceeding(proceeding_id):
         if not proceeding:
             return jsonify({"error": "Proceeding not found"}), 404
         
-        # Delete associated transcript from GridFS if it exists
-        transcript_file = fs.find_one({"filename": f"transcript_{proceeding_id}"})
-        if transcript_file:
-            fs.delete(transcript_file._id)
-            print(f"Deleted transcript file for proceeding {proceeding_id}")
+        # Delete associated transcript segments (and any legacy GridFS file)
+        transcript_store.delete(proceeding_id)
+        logger.info("transcript_deleted proceeding=%s", proceeding_id)
         
         # Delete the proceeding from database
         result = db.proceedings.delete_one({"proceeding_id": proceeding_id})
@@ -344,16 +396,15 @@ def delete_proceeding(proceeding_id):
 
 @app.route("/api/transcript/<proceeding_id>", methods=["GET"])
 def get_transcript(proceeding_id):
-    """Get existing transcript from GridFS"""
+    """Get existing transcript, assembled from its segments"""
     try:
-        # Find the transcript file in GridFS
-        transcript_file = fs.find_one({"filename": f"transcript_{proceeding_id}"})
+        content, last_modified = transcript_store.read(proceeding_id)
         
-        if transcript_file:
-            content = transcript_file.read().decode('utf-8')
+        if last_modified:
             return jsonify({
                 "content": content,
-                "last_modified": transcript_file.upload_date.isoformat(),
+                "length": len(content),
+                "last_modified": last_modified.isoformat(),
                 "proceeding_id": proceeding_id
             }), 200
         else:
@@ -365,30 +416,35 @@ def get_transcript(proceeding_id):
 
 @app.route("/api/transcript/<proceeding_id>", methods=["POST"])
 def save_transcript(proceeding_id):
-    """Save transcript to GridFS"""
+    """
+    Save transcript changes
+    
+    Body is either {"append": text, "base_length": n} (autosave sends only
+    what was added since the last save) or {"content": text} for the whole
+    transcript; either way only the changed tail is written.
+    """
     try:
         data = request.get_json()
-        content = data.get("content", "")
-        
-        if not content.strip():
-            return jsonify({"success": False, "message": "No content to save"}), 400
-        
-        # Delete existing transcript if it exists
-        existing_file = fs.find_one({"filename": f"transcript_{proceeding_id}"})
-        if existing_file:
-            fs.delete(existing_file._id)
-        
-        # Save new transcript to GridFS
-        file_id = fs.put(
-            content.encode('utf-8'),
-            filename=f"transcript_{proceeding_id}",
-            content_type="text/plain",
-            metadata={
-                "proceeding_id": proceeding_id,
-                "created_at": datetime.utcnow(),
-                "type": "transcript"
-            }
-        )
+        
+        if "append" in data:
+            try:
+                length = transcript_store.append(
+                    proceeding_id, data["append"], data.get("base_length")
+                )
+            except TranscriptConflict as e:
+                # Client is out of date - it should resend its full content
+                return jsonify({
+                    "success": False,
+                    "message": "Transcript changed since last save",
+                    "current_length": e.current_length
+                }), 409
+        else:
+            content = data.get("content", "")
+            
+            if not content.strip():
+                return jsonify({"success": False, "message": "No content to save"}), 400
+            
+            length = transcript_store.save_full(proceeding_id, content)
         
         # Update proceeding status
         db.proceedings.update_one(
@@ -403,7 +459,7 @@ def save_transcript(proceeding_id):
         
         return jsonify({
             "success": True,
-            "file_id": str(file_id),
+            "length": length,
             "message": "Transcript saved successfully"
         }), 200
         
@@ -411,79 +467,102 @@ def save_transcript(proceeding_id):
         traceback.print_exc()
         return jsonify({"success": False, "message": "Error saving transcript"}), 500
 
+@app.route("/api/transcripts/search", methods=["GET"])
+def search_transcripts():
+    """
+    Full-text search across every transcript
+    
+    Query parameters: q (words, "exact phrases", -excluded), optional
+    proceeding_id to search one transcript, limit (default 20, max 100).
+    Hits are ranked by relevance and carry the character offset of the
+    match in the transcript and a snippet around it.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"success": False, "message": "Missing search query"}), 400
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"success": False, "message": "limit must be a number"}), 400
+    
+    try:
+        started = time.perf_counter()
+        hits = transcript_search.search(query, limit, request.args.get("proceeding_id"))
+        return jsonify({
+            "success": True,
+            "query": query,
+            "results": hits,
+            "took_ms": round((time.perf_counter() - started) * 1000, 1)
+        }), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"success": False, "message": "Error searching transcripts"}), 500
+
 @app.route("/api/transcript/<proceeding_id>/export", methods=["GET"])
 def export_transcript(proceeding_id):
-    """Export complete transcript with header information"""
+    """
+    Stream the complete transcript with header information
+
+    Query parameters:
+        format: txt (default) or jsonl - segments with their save times
+        compress: gzip to compress on the fly
+
+    The body is sent in chunks as it is read from storage; a transcript
+    compacted mid-export ends the stream early rather than sending a
+    wrong record.
+    """
+    fmt = request.args.get("format", "txt")
+    compress = request.args.get("compress") or None
+    if fmt not in FORMATS:
+        return jsonify({"success": False, "message": f"Unknown format: {fmt}"}), 400
+    if compress is not None and compress not in COMPRESSIONS:
+        return jsonify({"success": False, "message": f"Unknown compression: {compress}"}), 400
+
     try:
-        # Get proceeding data
         proceeding = db.proceedings.find_one(
             {"proceeding_id": proceeding_id},
-            {"_id": 0}
+            {"_id": 0, "transcript": 0}
         )
         
         if not proceeding:
             return jsonify({"success": False, "message": "Proceeding not found"}), 404
         
-        # Get transcript content
-        transcript_file = fs.find_one({"filename": f"transcript_{proceeding_id}"})
-        transcript_content = ""
-        
-        if transcript_file:
-            transcript_content = transcript_file.read().decode('utf-8')
-        
-        # Generate complete transcript with header
-        complete_transcript = make_transcript_template(proceeding)
-        if transcript_content:
-            complete_transcript += "\n\n" + transcript_content
-        
-        return jsonify({
-            "success": True,
-            "proceeding_id": proceeding_id,
-            "content": complete_transcript,
-            "case_number": proceeding.get("case_number"),
-            "export_date": datetime.utcnow().isoformat()
-        }), 200
-        
+        header = make_transcript_template(template_fields(proceeding))
+        pieces = transcript_store.iter_export(proceeding_id)
     except Exception as e:
         traceback.print_exc()
         return jsonify({"success": False, "message": "Error exporting transcript"}), 500
 
+    def generate():
+        try:
+            yield from export_chunks(fmt, proceeding, header, pieces, compress)
+        except Exception:
+            # Headers are already sent; dropping the connection marks the download incomplete
+            traceback.print_exc()
+            raise
+
+    mimetype, filename = content_type_and_filename(fmt, proceeding_id, compress)
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Case-Number": proceeding.get("case_number") or "",
+            "X-Export-Date": datetime.utcnow().isoformat()
+        }
+    ), 200
+
 # Facial Recognition Helper Functions
 def process_image_data(image_data):
     """Process base64 image data and return face encodings"""
+    # Reads its FACE_* settings at import, after load_dotenv
+    from face_pipeline import FaceImageError, single_face_encoding
+    
     try:
-        # Remove data URL prefix if present
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-        
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Convert PIL image to numpy array
-        image_array = np.array(image)
-        
-        # Find face locations and encodings
-        face_locations = face_recognition.face_locations(image_array)
-        
-        if not face_locations:
-            return None, "No face detected in the image"
-        
-        if len(face_locations) > 1:
-            return None, "Multiple faces detected. Please ensure only one face is visible"
-        
-        # Get face encoding
-        face_encodings = face_recognition.face_encodings(image_array, face_locations)
-        
-        if not face_encodings:
-            return None, "Could not generate face encoding"
-        
-        return face_encodings[0], None
-        
+        with FACE_ENCODING_SECONDS.time():
+            return single_face_encoding(image_data), None
+    except FaceImageError as e:
+        return None, str(e)
     except Exception as e:
         return None, f"Error processing image: {str(e)}"
 
@@ -501,25 +580,28 @@ def face_authentication():
                 "message": "Missing matricule or image data"
             }), 400
         
-        # Get user and their stored face encoding
+        # Get user's stored face encoding
         if matricule.upper().startswith("CLERK"):
-            user = db.clerks.find_one({"matricule": matricule})
+            collection = db.clerks
         elif matricule.upper().startswith("JUDGE"):
-            user = db.judges.find_one({"matricule": matricule})
+            collection = db.judges
         else:
             return jsonify({
                 "success": False,
                 "message": "Invalid matricule format"
             }), 400
         
-        if not user:
-            return jsonify({
-                "success": False,
-                "message": "User not found"
-            }), 404
+        # Served from the in-process face index; the database is only asked
+        # when there is no encoding, to tell an unknown user apart
+        stored_encoding = get_face_index().get(collection.name, matricule)
         
-        # Check if user has face encoding stored
-        if "face_encoding" not in user:
+        if stored_encoding is None:
+            if not collection.find_one({"matricule": matricule}, {"_id": 1}):
+                return jsonify({
+                    "success": False,
+                    "message": "User not found"
+                }), 404
+            
             return jsonify({
                 "success": False,
                 "message": "No facial data found for this user. Please contact administrator to register your face."
@@ -534,16 +616,11 @@ def face_authentication():
                 "message": error
             }), 400
         
-        # Compare with stored encoding
-        stored_encoding = np.array(user["face_encoding"])
-        
         # Calculate face distance (lower is better match)
+        import face_recognition
         face_distance = face_recognition.face_distance([stored_encoding], captured_encoding)[0]
         
-        # Threshold for face recognition (adjust as needed)
-        threshold = 0.6
-        
-        if face_distance < threshold:
+        if face_distance < FACE_MATCH_THRESHOLD:
             return jsonify({
                 "success": True,
                 "message": "Face recognition successful",
@@ -563,6 +640,63 @@ def face_authentication():
             "message": "Face authentication error"
         }), 500
 
+@app.route("/api/face-login", methods=["POST"])
+def face_login():
+    """Log in with a face only - the captured face is compared against all registered staff"""
+    try:
+        data = request.get_json()
+        image_data = data.get("image_data")
+        
+        if not image_data:
+            return jsonify({
+                "success": False,
+                "message": "Missing image data"
+            }), 400
+        
+        # Process the captured image
+        captured_encoding, error = process_image_data(image_data)
+        
+        if error:
+            return jsonify({
+                "success": False,
+                "message": error
+            }), 400
+        
+        from face_index import AMBIGUOUS
+        match, reason = get_face_index().identify(
+            captured_encoding, FACE_MATCH_THRESHOLD, FACE_AMBIGUITY_MARGIN)
+        
+        if reason == AMBIGUOUS:
+            # Two people almost equally close - don't guess
+            return jsonify({
+                "success": False,
+                "message": "Face could not be matched to a single user. Please log in with your matricule and password."
+            }), 401
+        if not match:
+            return jsonify({
+                "success": False,
+                "message": "Face not recognized. Please log in with your matricule and password."
+            }), 401
+        
+        face_distance, collection, matricule = match
+        
+        return jsonify({
+            "success": True,
+            "role": "clerk" if collection == "clerks" else "judge",
+            "user": {
+                "name": staff_names.name(collection, matricule),
+                "matricule": matricule
+            },
+            "confidence": float(1 - face_distance)
+        }), 200
+        
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "message": "Face login error"
+        }), 500
+
 @app.route("/api/register-face", methods=["POST"])
 def register_face():
     """Register face encoding for a user"""
@@ -598,11 +732,12 @@ def register_face():
             }), 400
         
         # Update user with face encoding
+        from face_encodings import encoding_fields
         result = collection.update_one(
             {"matricule": matricule},
             {
                 "$set": {
-                    "face_encoding": face_encoding.tolist(),
+                    **encoding_fields(face_encoding),
                     "face_registered_at": datetime.utcnow().isoformat()
                 }
             }
@@ -614,6 +749,10 @@ def register_face():
                 "message": "User not found"
             }), 404
         
+        # Staff document changed - drop its cached name
+        staff_names.invalidate(collection.name, matricule)
+        get_face_index().update(collection.name, matricule, face_encoding)
+        
         return jsonify({
             "success": True,
             "message": "Face encoding registered successfully"
@@ -661,7 +800,26 @@ def check_face_registration(matricule):
             "message": "Error checking face registration"
         }), 500
 
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Latency histograms and gauges in the Prometheus text format"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+def warm_up():
+    """Import the face and transcription stacks in the background after startup"""
+    try:
+        import face_pipeline  # noqa: F401
+        get_face_index()
+    except Exception:
+        logger.exception("face_warm_up_failed")
+    if warm_up_transcription:
+        warm_up_transcription()
+
 if __name__ == "__main__":
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves
+    # requests; warming up the watcher process would load everything twice
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        threading.Thread(target=warm_up, daemon=True).start()
     app.run(debug=True, port=5001)
 
 
@@ -0,0 +1,87 @@
+"""
+In-memory audio ingest for uploaded transcription chunks
+Decodes request streams straight to 16 kHz mono float32 - no temp files
+
+numpy and faster-whisper are imported on first decode, not at import, so
+the API can register its transcription routes without loading them.
+"""
+
+import io
+from werkzeug.http import parse_options_header
+
+SAMPLE_RATE = 16000
+
+# Raw PCM fast path: 16 kHz mono signed 16-bit samples, no container
+PCM_CONTENT_TYPE = 'audio/l16'
+
+
+class UnsupportedAudioError(ValueError):
+    """Raised when an upload cannot be decoded with the declared content type"""
+
+
+def is_pcm_content_type(content_type):
+    """Check whether a content type selects the raw PCM fast path"""
+    if not content_type:
+        return False
+    mimetype, _ = parse_options_header(content_type)
+    return mimetype.lower() == PCM_CONTENT_TYPE
+
+
+def decode_pcm16(data, content_type=PCM_CONTENT_TYPE):
+    """
+    Convert raw PCM16 bytes to float32 samples without resampling
+
+    The optional content type parameters are validated but never converted:
+    rate must be 16000, channels must be 1. Samples are little-endian unless
+    the client sends ``endianness=big`` (RFC 2586 network byte order).
+    """
+    _, params = parse_options_header(content_type or PCM_CONTENT_TYPE)
+
+    try:
+        rate = int(params.get('rate', SAMPLE_RATE))
+        channels = int(params.get('channels', 1))
+    except ValueError:
+        raise UnsupportedAudioError(
+            f"audio/l16 rate and channels must be integers (got {content_type!r})"
+        ) from None
+    if rate != SAMPLE_RATE or channels != 1:
+        raise UnsupportedAudioError(
+            f"audio/l16 must be {SAMPLE_RATE} Hz mono (got rate={rate}, channels={channels})"
+        )
+
+    if len(data) % 2:
+        raise UnsupportedAudioError("audio/l16 payload has an odd number of bytes")
+
+    import numpy as np
+
+    dtype = '>i2' if params.get('endianness', 'little').lower() == 'big' else '<i2'
+    samples = np.frombuffer(data, dtype=dtype)
+    return samples.astype(np.float32) / 32768.0
+
+
+def decode_upload(stream, content_type):
+    """
+    Decode an uploaded audio stream into a 16 kHz mono float32 array
+
+    Args:
+        stream: File-like object (request body or multipart file stream)
+        content_type: Declared content type of the audio
+
+    Returns:
+        np.ndarray of float32 samples (empty if the upload had no data)
+    """
+    import numpy as np
+    from faster_whisper.audio import decode_audio
+
+    data = stream.read()
+    if not data:
+        return np.zeros(0, dtype=np.float32)
+
+    if is_pcm_content_type(content_type):
+        return decode_pcm16(data, content_type)
+
+    # Container formats (webm/mp4/wav) are demuxed and resampled by PyAV in memory
+    try:
+        return decode_audio(io.BytesIO(data), sampling_rate=SAMPLE_RATE)
+    except Exception as e:
+        raise UnsupportedAudioError(f"Could not decode audio ({content_type}): {e}") from e
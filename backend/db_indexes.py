@@ -0,0 +1,147 @@
+"""
+Index management for courtroom_db
+Creates the indexes the API's hot queries rely on and checks with explain() that none of them scans a collection
+
+Run at API startup (see app.py) or by hand:
+    python db_indexes.py            # create indexes
+    python db_indexes.py --verify   # create, then explain every hot query
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from mongo_connection import create_client, get_database
+
+# collection -> list of (keys, options); default index names are kept so
+# indexes created earlier by hand or by the driver are recognised
+INDEXES = {
+    "proceedings": [
+        ([("proceeding_id", ASCENDING)], {"unique": True}),
+        # Clerk dashboard listing; schedule_datetime keeps it ordered for free
+        ([("clerk_matricule", ASCENDING), ("schedule_datetime", ASCENDING)], {}),
+    ],
+    "clerks": [
+        ([("matricule", ASCENDING)], {"unique": True}),
+    ],
+    "judges": [
+        ([("matricule", ASCENDING)], {"unique": True}),
+    ],
+    # Transcript segments are read in seq order; unique so concurrent
+    # writers can't both claim the same seq
+    "transcript_segments": [
+        ([("proceeding_id", ASCENDING), ("seq", ASCENDING)], {"unique": True}),
+    ],
+    # Full-text search chunks (transcript_search.py). Language "none" means no
+    # stemming or stop words, which suits French and English hearings alike and
+    # keeps every hit findable verbatim for its snippet
+    "transcript_search": [
+        ([("proceeding_id", ASCENDING), ("start", ASCENDING)], {"unique": True}),
+        ([("text", TEXT)], {"default_language": "none"}),
+    ],
+    # Legacy GridFS transcripts (transcript_<proceeding_id>) are still looked up
+    # once per proceeding for migration. Same keys (and default name) as the
+    # index the driver creates on first write
+    "fs.files": [
+        ([("filename", ASCENDING), ("uploadDate", ASCENDING)], {}),
+    ],
+}
+
+# (description, collection, filter) for every query the API runs per request
+HOT_QUERIES = [
+    ("proceeding by id", "proceedings", {"proceeding_id": "example"}),
+    ("proceedings by clerk", "proceedings", {"clerk_matricule": "CLERK001"}),
+    ("clerk by matricule", "clerks", {"matricule": "CLERK001"}),
+    ("judge by matricule", "judges", {"matricule": "JUDGE001"}),
+    ("judge names batch", "judges", {"matricule": {"$in": ["JUDGE001", "JUDGE002"]}}),
+    ("transcript segments", "transcript_segments", {"proceeding_id": "example"}),
+    ("search chunk at offset", "transcript_search", {"proceeding_id": "example", "start": {"$lte": 100}}),
+    ("transcript text search", "transcript_search", {"$text": {"$search": "witness"}}),
+    ("transcript file", "fs.files", {"filename": "transcript_example"}),
+]
+
+
+def ensure_indexes(db):
+    """
+    Create every index in INDEXES (no-op for ones that already exist)
+
+    Returns:
+        list of error messages; an empty list means all indexes exist
+    """
+    errors = []
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                # e.g. duplicate matricules blocking a unique index
+                name = "_".join(f"{field}_{direction}" for field, direction in keys)
+                errors.append(f"{collection}.{name}: {e}")
+    return errors
+
+
+def plan_stages(plan):
+    """All stage names in an explain() winning plan, outermost first"""
+    # Slot-based engine (MongoDB 7+) nests the classic tree under queryPlan
+    if "queryPlan" in plan:
+        plan = plan["queryPlan"]
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+def verify_query_plans(db, queries=HOT_QUERIES):
+    """
+    Explain each hot query
+
+    Returns:
+        list of dicts with description, collection, stages, uses_index
+    """
+    results = []
+    for description, collection, query in queries:
+        explain = db[collection].find(query).explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        results.append({
+            "description": description,
+            "collection": collection,
+            "stages": stages,
+            "uses_index": "COLLSCAN" not in stages and (
+                "IXSCAN" in stages or "IDHACK" in stages or "EXPRESS_IXSCAN" in stages
+            ),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and verify courtroom_db indexes")
+    parser.add_argument("--uri", help="MongoDB URI (defaults to MONGO_URI)")
+    parser.add_argument("--verify", action="store_true", help="Explain every hot query")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = get_database(create_client(args.uri))
+
+    errors = ensure_indexes(db)
+    for error in errors:
+        print(f"❌ {error}")
+    if not errors:
+        print("✅ Indexes in place")
+
+    if args.verify:
+        for result in verify_query_plans(db):
+            mark = "✅" if result["uses_index"] else "❌"
+            print(f"{mark} {result['description']:<22} {' -> '.join(result['stages'])}")
+            if not result["uses_index"]:
+                errors.append(result["description"])
+
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Storage format for face encodings on clerk and judge documents
+
+Version 1 stored ``face_encoding`` as a list of 128 BSON doubles (~1.5 KB
+with per-element keys). Version 2 stores it as 512 bytes of packed
+little-endian float32 and sets ``face_encoding_version: 2``. Readers accept
+both, so the migration can run while the API is serving.
+
+Run at API startup (see app.py) or by hand:
+    python face_encodings.py            # migrate list-format encodings
+"""
+
+import argparse
+import logging
+
+import numpy as np
+from bson.binary import Binary
+from dotenv import load_dotenv
+
+from mongo_connection import create_client, get_database
+
+FACE_ENCODING_VERSION = 2
+ENCODING_DTYPE = np.dtype("<f4")
+ENCODING_SIZE = 128
+STAFF_COLLECTIONS = ("clerks", "judges")
+
+logger = logging.getLogger(__name__)
+
+
+def pack_encoding(encoding):
+    """Encoding array -> BSON binary (version 2)"""
+    return Binary(np.asarray(encoding, dtype=ENCODING_DTYPE).tobytes())
+
+
+def unpack_encoding(stored):
+    """
+    Stored face_encoding (binary or legacy list) -> float32 array
+
+    Raises:
+        ValueError: not exactly ENCODING_SIZE floats
+    """
+    if isinstance(stored, (bytes, bytearray)):  # Binary is a bytes subclass
+        if len(stored) != ENCODING_SIZE * ENCODING_DTYPE.itemsize:
+            raise ValueError(f"Face encoding is {len(stored)} bytes, "
+                             f"expected {ENCODING_SIZE * ENCODING_DTYPE.itemsize}")
+        return np.frombuffer(stored, dtype=ENCODING_DTYPE)
+    encoding = np.asarray(stored, dtype=np.float32)
+    if encoding.shape != (ENCODING_SIZE,):
+        raise ValueError(f"Face encoding has shape {encoding.shape}, expected ({ENCODING_SIZE},)")
+    return encoding
+
+
+def encoding_fields(encoding):
+    """$set fields for storing an encoding in the current format"""
+    return {
+        "face_encoding": pack_encoding(encoding),
+        "face_encoding_version": FACE_ENCODING_VERSION,
+    }
+
+
+def migrate_face_encodings(db, collections=STAFF_COLLECTIONS):
+    """
+    Rewrite older-format encodings in the current format
+
+    Each update is conditional on the version still being old, so an
+    encoding re-registered meanwhile is never overwritten. Malformed
+    encodings are logged and left as they are.
+
+    Returns:
+        number of documents migrated
+    """
+    migrated = 0
+    for collection in collections:
+        outdated = {
+            "face_encoding": {"$exists": True, "$ne": None},
+            "face_encoding_version": {"$ne": FACE_ENCODING_VERSION},
+        }
+        for user in db[collection].find(outdated, {"_id": 1, "face_encoding": 1}):
+            try:
+                encoding = unpack_encoding(user["face_encoding"])
+            except ValueError as e:
+                logger.warning("face_encoding_invalid collection=%s id=%s error=%s",
+                               collection, user["_id"], e)
+                continue
+            result = db[collection].update_one(
+                {"_id": user["_id"], "face_encoding_version": {"$ne": FACE_ENCODING_VERSION}},
+                {"$set": encoding_fields(encoding)}
+            )
+            migrated += result.modified_count
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate stored face encodings to packed float32")
+    parser.add_argument("--uri", help="MongoDB URI (defaults to MONGO_URI)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = get_database(create_client(args.uri))
+    print(f"✅ Migrated {migrate_face_encodings(db)} face encodings "
+          f"to version {FACE_ENCODING_VERSION}")
+
+
+if __name__ == "__main__":
+    main()
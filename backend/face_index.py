@@ -0,0 +1,152 @@
+"""
+In-memory index of registered face encodings for face-only login (1:N identification)
+
+Every registered clerk and judge encoding is kept in one contiguous float32
+matrix, loaded from the database once and updated in place by
+register_face. A lookup is a single matrix-vector product against all rows.
+It also serves as the per-user encoding cache for 1:1 face authentication.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from face_encodings import ENCODING_SIZE, STAFF_COLLECTIONS, unpack_encoding
+
+# Why identify() found no single match
+NOT_RECOGNIZED = "not_recognized"
+AMBIGUOUS = "ambiguous"
+
+logger = logging.getLogger(__name__)
+
+
+class FaceIndex:
+    """Registered face encodings of all staff, searchable at once"""
+
+    def __init__(self, db, collections=STAFF_COLLECTIONS, capacity=256):
+        self.db = db
+        self.collections = collections
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._matrix = np.zeros((capacity, ENCODING_SIZE), dtype=np.float32)
+        self._sq_norms = np.zeros(capacity, dtype=np.float32)
+        self._keys = []  # (collection, matricule) per row
+        self._rows = {}  # (collection, matricule) -> row
+
+    def __len__(self):
+        return len(self._keys)
+
+    def load(self):
+        """Read every stored encoding (once; later calls are no-ops)"""
+        with self._lock:
+            if self._loaded:
+                return
+            for collection in self.collections:
+                users = self.db[collection].find(
+                    {"face_encoding": {"$exists": True, "$ne": None}},
+                    {"_id": 0, "matricule": 1, "face_encoding": 1}
+                )
+                for user in users:
+                    try:
+                        encoding = unpack_encoding(user["face_encoding"])
+                    except ValueError as e:
+                        # One corrupt document shouldn't take face login down for everyone
+                        logger.warning("face_encoding_invalid collection=%s matricule=%s error=%s",
+                                       collection, user["matricule"], e)
+                        continue
+                    self._set(collection, user["matricule"], encoding)
+            self._loaded = True
+            logger.info("face_index_loaded faces=%d", len(self._keys))
+
+    def update(self, collection, matricule, encoding):
+        """Add or replace one user's encoding (called after register_face)"""
+        with self._lock:
+            # Not loaded yet: load() will read the new encoding from the database
+            if self._loaded:
+                self._set(collection, matricule, encoding)
+
+    def remove(self, collection, matricule):
+        """Drop one user's encoding; the last row moves into its place"""
+        with self._lock:
+            row = self._rows.pop((collection, matricule), None)
+            if row is None:
+                return
+            last = len(self._keys) - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._sq_norms[row] = self._sq_norms[last]
+                self._keys[row] = self._keys[last]
+                self._rows[self._keys[row]] = row
+            self._keys.pop()
+            self._matrix[last] = 0
+            self._sq_norms[last] = 0
+
+    def get(self, collection, matricule):
+        """One user's encoding, or None if they have not registered a face"""
+        self.load()
+        with self._lock:
+            row = self._rows.get((collection, matricule))
+            return None if row is None else self._matrix[row].copy()
+
+    def _set(self, collection, matricule, encoding):
+        key = (collection, matricule)
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row == len(self._matrix):
+                self._grow()
+            self._keys.append(key)
+            self._rows[key] = row
+        self._matrix[row] = np.asarray(encoding, dtype=np.float32)
+        self._sq_norms[row] = self._matrix[row] @ self._matrix[row]
+
+    def _grow(self):
+        capacity = len(self._matrix) * 2
+        matrix = np.zeros((capacity, ENCODING_SIZE), dtype=np.float32)
+        matrix[:len(self._matrix)] = self._matrix
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        sq_norms[:len(self._sq_norms)] = self._sq_norms
+        self._matrix, self._sq_norms = matrix, sq_norms
+
+    def nearest(self, encoding, k=2):
+        """
+        The ``k`` closest registered faces
+
+        Returns:
+            list of (distance, collection, matricule), closest first.
+            Distances are Euclidean, the same as face_recognition.face_distance.
+        """
+        self.load()
+        query = np.asarray(encoding, dtype=np.float32)
+        with self._lock:
+            count = len(self._keys)
+            if not count:
+                return []
+            # |a - b|^2 = |a|^2 - 2a.b + |b|^2, with |a|^2 precomputed per row
+            sq_distances = self._sq_norms[:count] - 2 * (self._matrix[:count] @ query)
+            sq_distances += query @ query
+            k = min(k, count)
+            best = np.argpartition(sq_distances, k - 1)[:k]
+            best = best[np.argsort(sq_distances[best])]
+            distances = np.sqrt(np.maximum(sq_distances[best], 0))
+            return [(float(d), *self._keys[row]) for d, row in zip(distances, best)]
+
+    def identify(self, encoding, threshold, margin):
+        """
+        The one registered face ``encoding`` belongs to (face-only login)
+
+        The closest face must be nearer than ``threshold``, and the next
+        closest at least ``margin`` further away - two people almost equally
+        close are not guessed between.
+
+        Returns:
+            ((distance, collection, matricule), None) on a match, otherwise
+            (None, NOT_RECOGNIZED or AMBIGUOUS)
+        """
+        matches = self.nearest(encoding, k=2)
+        if not matches or matches[0][0] >= threshold:
+            return None, NOT_RECOGNIZED
+        if len(matches) > 1 and matches[1][0] - matches[0][0] < margin:
+            return None, AMBIGUOUS
+        return matches[0], None
@@ -0,0 +1,136 @@
+"""
+Face detection and encoding for face login and registration
+Detection runs on a downscaled copy of the frame; only the face region of the full-resolution image is encoded
+
+Settings (.env):
+    FACE_DETECTION_MODEL     hog (CPU, default) or cnn (needs dlib with CUDA to be fast)
+    FACE_UPSAMPLE            number_of_times_to_upsample for detection (default 1)
+    FACE_DETECTION_MAX_SIDE  longest side of the detection copy in pixels (default 320)
+    FACE_MAX_INPUT_PIXELS    larger images are rejected before decoding (default 16 MP)
+"""
+
+import base64
+import binascii
+import io
+import os
+
+import cv2
+import face_recognition
+import numpy as np
+from PIL import Image
+
+DETECTION_MODEL = os.getenv("FACE_DETECTION_MODEL", "hog")
+UPSAMPLE = int(os.getenv("FACE_UPSAMPLE", 1))
+DETECTION_MAX_SIDE = int(os.getenv("FACE_DETECTION_MAX_SIDE", 320))
+MAX_INPUT_PIXELS = int(os.getenv("FACE_MAX_INPUT_PIXELS", 16_000_000))
+
+# Context kept around the detected box when cropping for encoding; dlib's
+# landmark fit and 150x150 face chip (25% padding) reach outside the box
+ROI_MARGIN = 0.5
+
+
+class FaceImageError(ValueError):
+    """The image can't be used for face login or registration"""
+
+
+def decode_image(image_data):
+    """
+    Base64 (optionally a data: URL) to an RGB uint8 array
+
+    The size is checked from the header, before any pixels are decoded.
+    """
+    # Remove data URL prefix if present
+    if image_data.startswith('data:image'):
+        image_data = image_data.split(',', 1)[1]
+
+    try:
+        image = Image.open(io.BytesIO(base64.b64decode(image_data)))
+    except (binascii.Error, OSError) as e:
+        raise FaceImageError(f"Invalid image data: {e}")
+
+    width, height = image.size
+    if width * height > MAX_INPUT_PIXELS:
+        raise FaceImageError(
+            f"Image is too large ({width}x{height}); "
+            f"please use at most {MAX_INPUT_PIXELS // 1_000_000} megapixels"
+        )
+
+    # Convert to RGB if necessary
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image)
+
+
+def detect_faces(image, model=None, upsample=None, max_side=None):
+    """
+    Face boxes (top, right, bottom, left) in full-resolution coordinates
+
+    Detection runs on a copy whose longest side is at most ``max_side``;
+    HOG cost grows with the pixel count, so a 640x480 frame is about four
+    times cheaper to search at 320x240.
+    """
+    model = model or DETECTION_MODEL
+    upsample = UPSAMPLE if upsample is None else upsample
+    max_side = max_side or DETECTION_MAX_SIDE
+
+    height, width = image.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        small = cv2.resize(
+            image, (round(width * scale), round(height * scale)),
+            interpolation=cv2.INTER_AREA
+        )
+    else:
+        small = image
+
+    locations = face_recognition.face_locations(
+        small, number_of_times_to_upsample=upsample, model=model
+    )
+
+    boxes = []
+    for top, right, bottom, left in locations:
+        boxes.append((
+            max(0, int(top / scale)),
+            min(width, int(round(right / scale))),
+            min(height, int(round(bottom / scale))),
+            max(0, int(left / scale)),
+        ))
+    return boxes
+
+
+def encode_face(image, box):
+    """128-d encoding of one face, computed on a crop around ``box`` only"""
+    top, right, bottom, left = box
+    margin_y = int((bottom - top) * ROI_MARGIN)
+    margin_x = int((right - left) * ROI_MARGIN)
+    y0, x0 = max(0, top - margin_y), max(0, left - margin_x)
+    y1 = min(image.shape[0], bottom + margin_y)
+    x1 = min(image.shape[1], right + margin_x)
+
+    roi = np.ascontiguousarray(image[y0:y1, x0:x1])
+    encodings = face_recognition.face_encodings(
+        roi, known_face_locations=[(top - y0, right - x0, bottom - y0, left - x0)]
+    )
+    return encodings[0] if encodings else None
+
+
+def single_face_encoding(image_data):
+    """
+    Encoding for the one face in a base64 image
+
+    Raises:
+        FaceImageError: unreadable or oversized image, or not exactly one face
+    """
+    image = decode_image(image_data)
+    boxes = detect_faces(image)
+
+    if not boxes:
+        raise FaceImageError("No face detected in the image")
+
+    if len(boxes) > 1:
+        raise FaceImageError("Multiple faces detected. Please ensure only one face is visible")
+
+    encoding = encode_face(image, boxes[0])
+    if encoding is None:
+        raise FaceImageError("Could not generate face encoding")
+    return encoding
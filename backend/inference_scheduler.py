@@ -0,0 +1,373 @@
+"""
+Cross-session batched inference scheduler for the shared Whisper model
+Queues chunks from every active session and decodes them in batches, on its own thread or on a worker pool
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import metrics
+from voice_activity import is_speech_output
+
+# Defaults can be overridden from .env
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("TRANSCRIPTION_MAX_BATCH_SIZE", "4"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("TRANSCRIPTION_MAX_WAIT_MS", "50"))
+DEFAULT_MAX_QUEUE_SIZE = int(os.getenv("TRANSCRIPTION_MAX_QUEUE_SIZE", "32"))
+
+# Whisper's rules for discarding decodes of silence and for retrying a
+# decode that looks wrong (WhisperModel.transcribe's defaults)
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+
+INFERENCE_SECONDS = metrics.histogram(
+    'transcription_inference_seconds', 'Whisper decode time per scheduler batch', ['batch_size']
+)
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    'transcription_queue_wait_seconds', 'Time a chunk waited in the inference queue'
+)
+
+
+class SchedulerBusyError(RuntimeError):
+    """Raised when the inference queue is full (backpressure)"""
+
+
+class InferenceRequest:
+    """One chunk of audio waiting for inference"""
+
+    __slots__ = ('session_id', 'audio', 'on_result', 'future', 'submitted_at')
+
+    def __init__(self, session_id, audio, on_result=None):
+        self.session_id = session_id
+        self.audio = audio
+        self.on_result = on_result
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+def transcribe_single(model, audio, language="en", beam_size=1):
+    """Decode one chunk through the regular WhisperModel.transcribe path"""
+    segments, _ = model.transcribe(
+        audio,
+        beam_size=beam_size,
+        language=language,
+        condition_on_previous_text=False  # Better for short chunks
+    )
+    return " ".join(
+        segment.text.strip() for segment in segments
+        if is_speech_output(segment.no_speech_prob)
+    ).strip()
+
+
+def transcribe_batch(model, audios, language="en", beam_size=1):
+    """
+    Decode several <=30s chunks with one encoder and one decoder call
+
+    Every chunk is padded to a single 30s Whisper window, stacked into one
+    [batch, n_mels, frames] tensor and run through CTranslate2 together,
+    so N sessions share one pass over the weights instead of N.
+
+    The batch is decoded greedily at temperature 0 only. A chunk whose
+    text is too repetitive or too unlikely is decoded again on its own
+    through transcribe_single, which has Whisper's temperature fallback.
+    """
+    if len(audios) == 1:
+        return [transcribe_single(model, audios[0], language, beam_size)]
+
+    # Imported here so the API can start without the ASR stack
+    import numpy as np
+    from faster_whisper.audio import pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+    from faster_whisper.transcribe import get_compression_ratio, get_suppressed_tokens
+
+    extractor = model.feature_extractor
+    features = np.stack([
+        pad_or_trim(extractor(audio), extractor.nb_max_frames)
+        for audio in audios
+    ]).astype(np.float32)
+    encoder_output = model.encode(features)
+
+    tokenizer = Tokenizer(
+        model.hf_tokenizer,
+        model.model.is_multilingual,
+        task="transcribe",
+        language=language
+    )
+    prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+
+    results = model.model.generate(
+        encoder_output,
+        [prompt] * len(audios),
+        beam_size=beam_size,
+        max_length=model.max_length,
+        return_scores=True,
+        return_no_speech_prob=True,
+        suppress_blank=True,
+        # -1 expands to the non-speech symbols, as WhisperModel.transcribe does
+        suppress_tokens=list(get_suppressed_tokens(tokenizer, [-1]))
+    )
+
+    texts = []
+    for audio, result in zip(audios, results):
+        tokens = [t for t in result.sequences_ids[0] if t < tokenizer.eot]
+        # scores[0] is the sum of logprobs over len(tokens); Whisper averages over one more
+        avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+        if not is_speech_output(result.no_speech_prob) or (
+                result.no_speech_prob > NO_SPEECH_THRESHOLD
+                and avg_logprob < LOGPROB_THRESHOLD):
+            texts.append("")
+            continue
+        text = tokenizer.decode(tokens).strip()
+        if (get_compression_ratio(text) > COMPRESSION_RATIO_THRESHOLD
+                or avg_logprob < LOGPROB_THRESHOLD):
+            text = transcribe_single(model, audio, language, beam_size)
+        texts.append(text)
+    return texts
+
+
+class InferenceScheduler:
+    """
+    Batches transcription requests from all sessions onto one model
+
+    - Bounded queue: submit() blocks up to ``submit_timeout`` and then
+      raises SchedulerBusyError so callers can shed load
+    - A batch holds at most one chunk per session; later chunks from the
+      same session stay queued for the next batch, so per-session order is
+      kept and they still count against the bound
+    - ``on_result`` callbacks run in that order, before the request's
+      future resolves - on the scheduler thread, or on the worker's reader
+      thread with a pool
+    - With a WorkerPool, one batch per idle worker is decoded at a time;
+      a session's next chunk waits until its previous batch is answered
+    """
+
+    def __init__(self, model_getter, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue_size=DEFAULT_MAX_QUEUE_SIZE,
+                 language="en", beam_size=1, on_inference=None, pool=None):
+        """
+        Args:
+            model_getter: Callable returning the loaded WhisperModel (or None)
+            max_batch_size: Most chunks decoded in one model call
+            max_wait_ms: How long the first chunk of a batch waits for company
+            max_queue_size: Pending chunks accepted before backpressure
+            on_inference: Optional callable(cpu_seconds, calls) after each batch
+            pool: Optional inference_workers.WorkerPool to decode on instead
+                of this process
+        """
+        self.model_getter = model_getter
+        self.on_inference = on_inference
+        self.pool = pool
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000.0
+        self.language = language
+        self.beam_size = beam_size
+
+        # Pending chunks in arrival order. A chunk whose session is already
+        # in the batch or on a worker is skipped over, not moved elsewhere,
+        # so every waiting chunk counts against max_queue_size
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.pending = deque()
+        self.in_flight = set()  # Sessions with a batch on a worker
+        # Guards pending and in_flight; waited on by submitters and the scheduler
+        self.condition = threading.Condition()
+
+        self.stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'failed': 0,
+            'batches': 0,
+            'batched_items': 0,
+            'cpu_seconds': 0.0
+        }
+        self.stats_lock = threading.Lock()
+
+        self.running = True
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, session_id, audio, on_result=None, submit_timeout=1.0):
+        """Queue a chunk for inference and return a Future with its text"""
+        request = InferenceRequest(session_id, audio, on_result)
+        with self.condition:
+            if not self.condition.wait_for(
+                    lambda: len(self.pending) < self.max_queue_size, timeout=submit_timeout):
+                self._count('rejected')
+                raise SchedulerBusyError("Transcription queue is full, retry shortly")
+            self.pending.append(request)
+            self.condition.notify_all()
+        self._count('submitted')
+        return request.future
+
+    def transcribe(self, session_id, audio, on_result=None, timeout=60.0):
+        """Blocking helper: submit a chunk and wait for its text"""
+        return self.submit(session_id, audio, on_result).result(timeout=timeout)
+
+    def shutdown(self):
+        """Stop the scheduler thread after the current batch"""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+
+    def get_stats(self):
+        """Counters plus current queue depth"""
+        with self.stats_lock:
+            stats = dict(self.stats)
+        with self.condition:
+            stats['queue_depth'] = len(self.pending)
+        stats['avg_batch_size'] = (
+            stats['batched_items'] / stats['batches'] if stats['batches'] else 0.0
+        )
+        return stats
+
+    def _count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def _next_request(self, timeout, exclude=()):
+        """
+        Take the oldest chunk whose session is neither in ``exclude`` nor on
+        a worker, waiting up to ``timeout``
+
+        Skipping a whole session keeps its chunks in order: none can be taken
+        while an earlier one is held back.
+
+        Returns:
+            The request, or None if none became eligible in time
+        """
+        deadline = time.perf_counter() + timeout
+        with self.condition:
+            while self.running:
+                for request in self.pending:
+                    if request.session_id not in self.in_flight and request.session_id not in exclude:
+                        self.pending.remove(request)
+                        # Room for a blocked submit()
+                        self.condition.notify_all()
+                        return request
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                # Woken by submit() or by a worker answering
+                self.condition.wait(remaining)
+        return None
+
+    def _collect_batch(self):
+        """Block for the first chunk, then gather more until full or max_wait passes"""
+        first = self._next_request(timeout=0.5)
+        if first is None:
+            return None
+        batch = [first]
+        sessions = {first.session_id}
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            request = self._next_request(remaining, exclude=sessions)
+            if request is None:
+                break
+            batch.append(request)
+            sessions.add(request.session_id)
+
+        return batch
+
+    def _run(self):
+        while self.running:
+            if self.pool:
+                self._dispatch()
+                continue
+
+            batch = self._collect_batch()
+            if batch is None:
+                continue
+
+            model = self.model_getter()
+            if model is None:
+                self._fail(batch, RuntimeError("Whisper model not loaded yet"))
+                continue
+
+            audios = [request.audio for request in batch]
+            started = self._started(batch)
+            # Process CPU time - the decode's own threads dominate it while a batch runs
+            cpu_started = time.process_time()
+            try:
+                if len(batch) > 1 and all(
+                        len(a) <= model.feature_extractor.n_samples for a in audios):
+                    texts = transcribe_batch(model, audios, self.language, self.beam_size)
+                else:
+                    texts = [
+                        transcribe_single(model, a, self.language, self.beam_size)
+                        for a in audios
+                    ]
+            except Exception as e:
+                self._fail(batch, e)
+                continue
+
+            self._deliver(batch, texts, started, time.process_time() - cpu_started)
+
+    def _dispatch(self):
+        """Wait for an idle worker, then hand it the next batch"""
+        worker = self.pool.acquire(timeout=0.5)
+        if worker is None:
+            return
+        batch = self._collect_batch()
+        if batch is None:
+            self.pool.release(worker)
+            return
+
+        sessions = [request.session_id for request in batch]
+        with self.condition:
+            self.in_flight.update(sessions)
+        started = self._started(batch)
+
+        def done(future):
+            try:
+                texts, cpu_seconds = future.result()
+            except Exception as e:
+                self._fail(batch, e)
+            else:
+                self._deliver(batch, texts, started, cpu_seconds)
+            finally:
+                # Runs on the worker's reader thread; wakes the scheduler for
+                # the chunks these sessions have waiting
+                with self.condition:
+                    self.in_flight.difference_update(sessions)
+                    self.condition.notify_all()
+
+        self.pool.submit(worker, [request.audio for request in batch],
+                         self.language, self.beam_size).add_done_callback(done)
+
+    def _started(self, batch):
+        """Start the clock on a batch, recording how long each chunk queued"""
+        started = time.perf_counter()
+        for request in batch:
+            QUEUE_WAIT_SECONDS.observe(started - request.submitted_at)
+        return started
+
+    def _fail(self, batch, error):
+        for request in batch:
+            request.future.set_exception(error)
+            self._count('failed')
+
+    def _deliver(self, batch, texts, started, cpu_seconds):
+        """Record a decoded batch and hand each text to its request"""
+        INFERENCE_SECONDS.labels(batch_size=len(batch)).observe(time.perf_counter() - started)
+        self._count('batches')
+        self._count('batched_items', len(batch))
+        self._count('cpu_seconds', cpu_seconds)
+        if self.on_inference:
+            self.on_inference(cpu_seconds, len(batch))
+
+        for request, text in zip(batch, texts):
+            try:
+                if request.on_result:
+                    request.on_result(text)
+                request.future.set_result(text)
+                self._count('completed')
+            except Exception as e:
+                request.future.set_exception(e)
+                self._count('failed')
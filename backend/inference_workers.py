@@ -0,0 +1,418 @@
+"""
+Whisper inference in worker processes
+Each worker loads its own model; audio reaches it through shared memory, so the API process never decodes
+
+The API process keeps the GIL for request handling and JSON, while every
+worker runs CTranslate2 on its own ``cpu_threads``. A batch is written into
+the worker's preallocated shared-memory slab and only (offset, length) pairs
+cross the pipe, so no audio is pickled or JSON-encoded. Workers talk JSON
+lines over stdin/stdout, like transcription_server.py.
+
+A worker that dies is restarted (with backoff); the batch it was decoding
+fails, and its callers see the error. A worker stuck on one batch for
+longer than the job timeout is killed and restarted the same way.
+
+Settings (.env):
+    TRANSCRIPTION_WORKERS              worker processes, 0 decodes in the API process (default 1)
+    TRANSCRIPTION_WORKER_CPU_THREADS   CTranslate2 threads per worker (default cores / workers)
+    TRANSCRIPTION_WORKER_NUM_WORKERS   CTranslate2 num_workers per worker (default 1)
+    TRANSCRIPTION_WORKER_NICE          niceness added to workers, keeps the API ahead (default 5)
+    TRANSCRIPTION_WORKER_JOB_TIMEOUT   seconds before a stuck worker is killed (default 120)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python'))
+import metrics
+from inference_scheduler import DEFAULT_MAX_BATCH_SIZE, transcribe_batch, transcribe_single
+from model_registry import FAILED, READY, ModelHandle
+
+DEFAULT_WORKERS = int(os.getenv("TRANSCRIPTION_WORKERS", "1"))
+WORKER_CPU_THREADS = int(os.getenv("TRANSCRIPTION_WORKER_CPU_THREADS", "0"))
+WORKER_NUM_WORKERS = int(os.getenv("TRANSCRIPTION_WORKER_NUM_WORKERS", "1"))
+WORKER_NICE = int(os.getenv("TRANSCRIPTION_WORKER_NICE", "5"))
+JOB_TIMEOUT = float(os.getenv("TRANSCRIPTION_WORKER_JOB_TIMEOUT", "120"))
+
+SAMPLE_RATE = 16000
+# Whisper decodes at most 30 s per chunk
+MAX_CHUNK_SECONDS = 30
+FLOAT32_BYTES = 4
+
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 30.0
+# A worker that stayed up this long resets its restart backoff
+STABLE_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+WORKER_UPTIME_SECONDS = metrics.histogram(
+    'transcription_worker_uptime_seconds', 'How long an inference worker ran before it died'
+)
+
+
+class WorkerCrashedError(RuntimeError):
+    """The worker decoding a batch died before answering"""
+
+
+class _Worker:
+    """One worker process, its shared-memory slab and the batch it is decoding"""
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.slab = shared_memory.SharedMemory(create=True, size=pool.slab_bytes)
+        self.process = None
+        self.job = None  # (job_id, future, started) while decoding
+        self.next_job = 1
+        self.started_at = None
+        self.restart_delay = RESTART_DELAY
+        self.loaded = False
+        self.load_error = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        command = self.pool.worker_command + [
+            '--slab', self.slab.name,
+            '--model', self.pool.size,
+            '--device', self.pool.device,
+            '--compute-type', self.pool.compute_type,
+            '--cpu-threads', str(self.pool.cpu_threads),
+            '--num-workers', str(self.pool.num_workers),
+            '--nice', str(self.pool.nice),
+        ]
+        # stderr is shared so the worker's log lines reach the API's console
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1)
+        self.started_at = time.monotonic()
+        threading.Thread(target=self._read, args=(self.process,), daemon=True).start()
+        logger.info("worker_started index=%d pid=%d", self.index, self.process.pid)
+
+    def submit(self, audios, language, beam_size):
+        """Write ``audios`` into the slab and send the batch; returns a Future of (texts, cpu_seconds)"""
+        import numpy as np
+
+        future = Future()
+        total = sum(len(audio) for audio in audios)
+        if total * FLOAT32_BYTES > self.slab.size:
+            future.set_exception(ValueError(
+                f"Batch of {total / SAMPLE_RATE:.1f}s does not fit a worker's "
+                f"{self.slab.size // (FLOAT32_BYTES * SAMPLE_RATE)}s buffer"))
+            self.pool.release(self)
+            return future
+
+        samples = np.ndarray((self.slab.size // FLOAT32_BYTES,), dtype=np.float32, buffer=self.slab.buf)
+        chunks = []
+        offset = 0
+        for audio in audios:
+            samples[offset:offset + len(audio)] = audio
+            chunks.append((offset, len(audio)))
+            offset += len(audio)
+        del samples  # No export of the slab may outlive close()
+
+        with self.lock:
+            job_id = self.next_job
+            self.next_job += 1
+            self.job = (job_id, future, time.monotonic())
+        message = {'id': job_id, 'chunks': chunks, 'language': language, 'beam_size': beam_size}
+        try:
+            self.process.stdin.write(json.dumps(message) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            pass
+        if self.process.poll() is not None:
+            # Died before or while taking the batch - the reader may already be gone
+            if self.fail_job(WorkerCrashedError(f"Inference worker {self.index} is not running")):
+                self.pool._count('crashed_jobs')
+        return future
+
+    def _read(self, process):
+        """Answers from one worker process, until it exits"""
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                logger.warning("worker_bad_output index=%d line=%r", self.index, line[:200])
+                continue
+
+            if message.get('type') == 'ready':
+                self.loaded = True
+                self.pool._on_ready(self, message.get('load_seconds'))
+                continue
+            if message.get('type') == 'load_failed':
+                self.load_error = message.get('error')
+                continue
+
+            with self.lock:
+                job = self.job
+                if not job or job[0] != message.get('id'):
+                    continue
+                self.job = None
+            if 'error' in message:
+                job[1].set_exception(RuntimeError(message['error']))
+            else:
+                job[1].set_result((message['texts'], message['cpu_seconds']))
+            self.pool.release(self)
+
+        process.wait()
+        self.pool._on_exit(self, process)
+
+    def kill(self):
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+    def fail_job(self, error):
+        """Fail the batch being decoded, if any; returns whether there was one"""
+        with self.lock:
+            job, self.job = self.job, None
+        if job:
+            job[1].set_exception(error)
+        return job is not None
+
+
+class WorkerPool:
+    """
+    Worker processes decoding batches for InferenceScheduler
+
+    ``handle`` is a ModelHandle that turns ready when the first worker has
+    loaded its model (its ``model`` is the pool), and failed if every
+    worker failed to load.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, size=None, device=None, compute_type=None,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, cpu_threads=WORKER_CPU_THREADS, num_workers=WORKER_NUM_WORKERS,
+                 nice=WORKER_NICE, job_timeout=JOB_TIMEOUT, worker_command=None):
+        """
+        Args:
+            worker_command: Program and leading arguments that start a worker
+                (default: this module under the current interpreter); it is
+                given --slab, --model and the other worker_main options
+        """
+        from model_registry import DEFAULT_COMPUTE_TYPE, DEFAULT_DEVICE, DEFAULT_SIZE
+
+        self.size = size or DEFAULT_SIZE
+        self.device = device or DEFAULT_DEVICE
+        self.compute_type = compute_type or DEFAULT_COMPUTE_TYPE
+        self.workers_count = max(1, int(workers))
+        # Split the cores between workers rather than oversubscribing them
+        self.cpu_threads = cpu_threads or max(1, (os.cpu_count() or 1) // self.workers_count)
+        self.num_workers = num_workers
+        self.nice = nice
+        self.job_timeout = job_timeout
+        self.worker_command = list(worker_command or [sys.executable, os.path.abspath(__file__)])
+        self.slab_bytes = max(1, max_batch_size) * MAX_CHUNK_SECONDS * SAMPLE_RATE * FLOAT32_BYTES
+
+        self.handle = ModelHandle(self.size, self.device, self.compute_type)
+        self.idle = queue.Queue()
+        self.failed_loads = 0
+        self.stats = {'restarts': 0, 'crashed_jobs': 0, 'timeouts': 0}
+        self.stats_lock = threading.Lock()
+        self.running = True
+        self._started = time.perf_counter()
+
+        self.workers = [_Worker(self, index) for index in range(self.workers_count)]
+        for worker in self.workers:
+            worker.start()
+        threading.Thread(target=self._watch, daemon=True).start()
+        atexit.register(self.close)
+
+    def acquire(self, timeout=None):
+        """An idle worker, or None after ``timeout`` seconds"""
+        try:
+            return self.idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def submit(self, worker, audios, language="en", beam_size=1):
+        """Decode a batch on an acquired worker; the Future gives (texts, cpu_seconds)"""
+        return worker.submit(audios, language, beam_size)
+
+    def close(self):
+        """Stop every worker and free the shared memory"""
+        if not self.running:
+            return
+        self.running = False
+        for worker in self.workers:
+            worker.kill()
+        for worker in self.workers:
+            if worker.process:
+                worker.process.wait()
+            worker.slab.close()
+            worker.slab.unlink()
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats.update(
+            workers=self.workers_count,
+            alive=sum(1 for w in self.workers if w.process and w.process.poll() is None),
+            busy=sum(1 for w in self.workers if w.job),
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
+        )
+        return stats
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def release(self, worker):
+        """Put a worker back in the idle queue (after its batch, or unused)"""
+        self.idle.put(worker)
+
+    def _on_ready(self, worker, load_seconds):
+        logger.info("worker_ready index=%d load_seconds=%s", worker.index, load_seconds)
+        self.release(worker)
+        if self.handle.state != READY:
+            self.handle.load_seconds = round(time.perf_counter() - self._started, 2)
+            self.handle._finish(READY, model=self)
+
+    def _on_load_failed(self, worker, error):
+        logger.error("worker_load_failed index=%d error=%s", worker.index, error)
+        self.failed_loads += 1
+        if self.failed_loads >= self.workers_count and self.handle.state != READY:
+            self.handle._finish(FAILED, error=error)
+
+    def _on_exit(self, worker, process):
+        """Reader thread saw the process exit: fail its batch and schedule a restart"""
+        if process is not worker.process:
+            return
+        uptime = time.monotonic() - worker.started_at
+        loaded, worker.loaded = worker.loaded, False
+        # Take it out of the idle queue; it is put back once reloaded
+        self._discard_idle(worker)
+        if worker.fail_job(WorkerCrashedError(
+                f"Inference worker {worker.index} exited with code {process.returncode}")):
+            self._count('crashed_jobs')
+        if not self.running:
+            return
+        if not loaded:
+            # Loading failed - restarting would fail the same way
+            self._on_load_failed(worker, worker.load_error or f"exited with code {process.returncode}")
+            return
+
+        WORKER_UPTIME_SECONDS.observe(uptime)
+        self._count('restarts')
+        if uptime > STABLE_SECONDS:
+            worker.restart_delay = RESTART_DELAY
+        delay = worker.restart_delay
+        worker.restart_delay = min(delay * 2, MAX_RESTART_DELAY)
+        logger.warning("worker_exited index=%d code=%s uptime=%.1f restart_in=%.1f",
+                       worker.index, process.returncode, uptime, delay)
+        timer = threading.Timer(delay, self._restart, args=(worker,))
+        timer.daemon = True
+        timer.start()
+
+    def _restart(self, worker):
+        if self.running:
+            worker.start()
+
+    def _discard_idle(self, worker):
+        kept = []
+        while True:
+            try:
+                other = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if other is not worker:
+                kept.append(other)
+        for other in kept:
+            self.idle.put(other)
+
+    def _watch(self):
+        """Kill workers stuck on one batch; the exit path restarts them"""
+        while self.running:
+            time.sleep(min(1.0, self.job_timeout / 4))
+            now = time.monotonic()
+            for worker in self.workers:
+                job = worker.job
+                if job and now - job[2] > self.job_timeout:
+                    logger.error("worker_timeout index=%d seconds=%.0f", worker.index, now - job[2])
+                    self._count('timeouts')
+                    worker.kill()
+
+
+# Worker process side ---------------------------------------------------------
+
+def _attach_slab(name):
+    slab = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        # The API process owns the segment; stop this process's resource
+        # tracker from unlinking it when the worker exits
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(slab._name, 'shared_memory')
+    return slab
+
+
+def worker_main(argv=None):
+    """Load a model, then decode batches described on stdin until it closes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Whisper inference worker')
+    parser.add_argument('--slab', required=True)
+    parser.add_argument('--model', required=True)
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--compute-type', default='int8')
+    parser.add_argument('--cpu-threads', type=int, default=0)
+    parser.add_argument('--num-workers', type=int, default=1)
+    parser.add_argument('--nice', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from log_setup import configure_logging
+    configure_logging()
+    if args.nice and hasattr(os, 'nice'):
+        os.nice(args.nice)
+
+    # Replies go to the real stdout; anything a library prints goes to stderr
+    replies = sys.stdout
+    sys.stdout = sys.stderr
+
+    def reply(message):
+        replies.write(json.dumps(message) + '\n')
+        replies.flush()
+
+    started = time.perf_counter()
+    try:
+        import numpy as np
+        from faster_whisper import WhisperModel
+        from model_registry import warm_up
+
+        model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type,
+                             cpu_threads=args.cpu_threads, num_workers=args.num_workers)
+        warm_up(model)
+        slab = _attach_slab(args.slab)
+    except Exception as e:
+        logger.exception("worker_load_failed model=%s", args.model)
+        reply({'type': 'load_failed', 'error': str(e)})
+        return 1
+    reply({'type': 'ready', 'load_seconds': round(time.perf_counter() - started, 2)})
+
+    samples = np.ndarray((slab.size // FLOAT32_BYTES,), dtype=np.float32, buffer=slab.buf)
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            # Copies out of the slab, so the API can reuse it as soon as we answer
+            audios = [samples[offset:offset + length].copy() for offset, length in job['chunks']]
+            cpu_started = time.process_time()
+            if len(audios) > 1 and all(len(a) <= model.feature_extractor.n_samples for a in audios):
+                texts = transcribe_batch(model, audios, job['language'], job['beam_size'])
+            else:
+                texts = [transcribe_single(model, a, job['language'], job['beam_size']) for a in audios]
+            reply({'id': job['id'], 'texts': texts, 'cpu_seconds': time.process_time() - cpu_started})
+        except Exception as e:
+            logger.exception("worker_batch_failed")
+            reply({'id': job['id'], 'error': str(e)})
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(worker_main())
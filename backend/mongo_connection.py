@@ -0,0 +1,51 @@
+"""
+MongoDB connection helpers shared by the API, seeding and maintenance scripts
+"""
+
+import os
+from urllib.parse import urlparse
+
+import certifi
+from pymongo import MongoClient, monitoring
+
+DEFAULT_DB_NAME = "courtroom_db"
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+def create_client(uri=None, **kwargs):
+    """
+    MongoClient for ``uri`` (defaults to MONGO_URI)
+
+    Atlas needs certifi's CA bundle; a local mongod used for benchmarks and
+    index tests runs without TLS, and passing tlsCAFile would force it on.
+    """
+    uri = uri or os.getenv("MONGO_URI")
+    host = urlparse(uri).hostname if uri else None
+    if host not in LOCAL_HOSTS:
+        kwargs.setdefault("tlsCAFile", certifi.where())
+    return MongoClient(uri, **kwargs)
+
+
+class CommandTimer(monitoring.CommandListener):
+    """
+    Reports every command's round trip as ``observe(command_name, seconds)``
+
+    Pass as ``create_client(event_listeners=[CommandTimer(...)])``.
+    """
+
+    def __init__(self, observe):
+        self.observe = observe
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.observe(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.observe(event.command_name, event.duration_micros / 1e6)
+
+
+def get_database(client, name=None):
+    """The courtroom database (MONGO_DB_NAME overrides the default name)"""
+    return client[name or os.getenv("MONGO_DB_NAME", DEFAULT_DB_NAME)]
@@ -0,0 +1,106 @@
+"""
+In-process cache of judge and clerk display names
+Turns per-proceeding name lookups into at most one batched $in query per collection,
+or joins them into the proceeding query itself with $lookup
+"""
+
+import threading
+import time
+
+# Names rarely change; the TTL only bounds staleness from edits made outside this API
+DEFAULT_TTL_SECONDS = 300
+
+
+class StaffNameCache:
+    """Matricule -> name for the judges and clerks collections"""
+
+    def __init__(self, db, ttl=DEFAULT_TTL_SECONDS):
+        self.db = db
+        self.ttl = ttl
+        self._entries = {}  # (collection, matricule) -> (name, expires_at)
+        self._lock = threading.Lock()
+
+    def names(self, collection, matricules):
+        """
+        Resolve matricules to names, querying only the ones not cached
+
+        Args:
+            collection: "judges" or "clerks"
+            matricules: Iterable of matricules (duplicates are fine)
+
+        Returns:
+            dict of matricule -> name (unknown matricules are omitted)
+
+        Only names found are cached. Staff are added outside this API
+        (seed.py), so a matricule unknown now may exist on the next call.
+        """
+        now = time.monotonic()
+        found = {}
+        missing = set()
+
+        with self._lock:
+            for matricule in set(matricules):
+                entry = self._entries.get((collection, matricule))
+                if entry and entry[1] > now:
+                    found[matricule] = entry[0]
+                else:
+                    missing.add(matricule)
+
+        if missing:
+            # One round trip for every name we don't know yet
+            docs = self.db[collection].find(
+                {"matricule": {"$in": list(missing)}},
+                {"_id": 0, "matricule": 1, "name": 1}
+            )
+            fetched = {doc["matricule"]: doc["name"] for doc in docs if doc.get("name") is not None}
+            expires_at = now + self.ttl
+            with self._lock:
+                for matricule, name in fetched.items():
+                    self._entries[(collection, matricule)] = (name, expires_at)
+            found.update(fetched)
+
+        return found
+
+    def name(self, collection, matricule):
+        """Single-name convenience wrapper"""
+        return self.names(collection, [matricule]).get(matricule)
+
+    def invalidate(self, collection=None, matricule=None):
+        """Drop cached names - everything, one collection, or one matricule"""
+        with self._lock:
+            if collection is None:
+                self._entries.clear()
+            elif matricule is None:
+                for key in [k for k in self._entries if k[0] == collection]:
+                    del self._entries[key]
+            else:
+                self._entries.pop((collection, matricule), None)
+
+
+def name_lookup_stages(collection, matricule_field, name_field):
+    """Aggregation stages that add ``name_field`` from judges/clerks in the same round trip"""
+    joined = f"_{name_field}"
+    return [
+        {"$lookup": {
+            "from": collection,
+            "localField": matricule_field,
+            "foreignField": "matricule",
+            "as": joined
+        }},
+        # Left unset when there is no match, like the old find_one enrichment
+        {"$addFields": {name_field: {"$arrayElemAt": [f"${joined}.name", 0]}}},
+        {"$project": {joined: 0}}
+    ]
+
+
+def find_proceeding_with_names(db, proceeding_id, include_clerk=True):
+    """Fetch one proceeding enriched with judge (and clerk) names in one query"""
+    pipeline = [
+        {"$match": {"proceeding_id": proceeding_id}},
+        {"$limit": 1},
+        {"$project": {"_id": 0}}
+    ]
+    pipeline += name_lookup_stages("judges", "judge_matricule", "judge_name")
+    if include_clerk:
+        pipeline += name_lookup_stages("clerks", "clerk_matricule", "clerk_name")
+    return next(db.proceedings.aggregate(pipeline), None)
@@ -1,15 +1,14 @@
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import bcrypt
-import certifi
 import os
+from mongo_connection import create_client, get_database
 
 # Load .env variables
 load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 
-client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
-db = client["courtroom_db"]
+client = create_client(MONGO_URI)
+db = get_database(client)
 
 # Sample users
 clerk = {
@@ -0,0 +1,178 @@
+"""
+Registry of live transcription sessions
+Unique session ids, idle and maximum-age eviction, and a cap on the memory all sessions may hold
+
+Sessions are plain dicts owned by SimpleTranscriptionManager; the registry
+only adds bookkeeping keys (created_at, last_activity, size) and decides
+when a session goes. Before a session is dropped, ``on_evict`` is called
+so the manager can flush its transcript - if that fails the session is
+kept and retried on the next sweep (except under memory pressure).
+
+Settings (.env):
+    TRANSCRIPTION_SESSION_IDLE_TTL   seconds without activity (default 1800)
+    TRANSCRIPTION_SESSION_STOPPED_TTL seconds a stopped session is kept for reconnects (default 300)
+    TRANSCRIPTION_SESSION_MAX_AGE    seconds since start (default 43200 - 12 hours)
+    TRANSCRIPTION_SESSIONS_MAX_MB    total estimated size of all sessions (default 64)
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+
+DEFAULT_IDLE_TTL = float(os.getenv("TRANSCRIPTION_SESSION_IDLE_TTL", "1800"))
+DEFAULT_STOPPED_TTL = float(os.getenv("TRANSCRIPTION_SESSION_STOPPED_TTL", "300"))
+DEFAULT_MAX_AGE = float(os.getenv("TRANSCRIPTION_SESSION_MAX_AGE", "43200"))
+DEFAULT_MAX_BYTES = int(float(os.getenv("TRANSCRIPTION_SESSIONS_MAX_MB", "64")) * 1024 * 1024)
+SWEEP_INTERVAL_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+# Rough fixed cost of a session (dicts, deque, lock) on top of its text
+SESSION_OVERHEAD_BYTES = 2048
+
+IDLE = "idle"
+STOPPED = "stopped"
+MAX_AGE = "max_age"
+MEMORY = "memory"
+
+
+class SessionRegistry:
+    """Thread-safe session id -> session dict"""
+
+    def __init__(self, on_evict=None, idle_ttl=DEFAULT_IDLE_TTL, stopped_ttl=DEFAULT_STOPPED_TTL,
+                 max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES):
+        self.on_evict = on_evict
+        self.idle_ttl = idle_ttl
+        self.stopped_ttl = stopped_ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stats = {'created': 0, 'evicted': {IDLE: 0, STOPPED: 0, MAX_AGE: 0, MEMORY: 0}, 'flush_failures': 0}
+
+    def create(self, session):
+        """Register a new session dict under a fresh unique id"""
+        now = time.monotonic()
+        session_id = f"session_{uuid.uuid4().hex}"
+        session.update(created_at=now, last_activity=now, size=SESSION_OVERHEAD_BYTES)
+        with self._lock:
+            self._sessions[session_id] = session
+            self._stats['created'] += 1
+        if self._total_size() > self.max_bytes:
+            self.sweep()
+        return session_id
+
+    def get(self, session_id):
+        """The session, or None if it is unknown or was evicted"""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def touch(self, session, added_bytes=0):
+        """Record activity (and growth) on a session"""
+        session['last_activity'] = time.monotonic()
+        session['size'] += added_bytes
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _total_size(self):
+        with self._lock:
+            return sum(session['size'] for session in self._sessions.values())
+
+    def sweep(self, now=None):
+        """
+        Evict expired sessions, then the least recently active ones while
+        over the memory budget
+
+        Returns:
+            number of sessions evicted
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = []
+            for session_id, session in self._sessions.items():
+                if now - session['created_at'] > self.max_age:
+                    expired.append((session_id, MAX_AGE))
+                elif not session.get('active', True) and now - session['last_activity'] > self.stopped_ttl:
+                    expired.append((session_id, STOPPED))
+                elif now - session['last_activity'] > self.idle_ttl:
+                    expired.append((session_id, IDLE))
+
+        evicted = sum(self._evict(session_id, reason) for session_id, reason in expired)
+
+        while self._total_size() > self.max_bytes:
+            with self._lock:
+                if not self._sessions:
+                    break
+                # Stopped sessions go before live ones, then least recently active
+                session_id = min(
+                    self._sessions,
+                    key=lambda sid: (self._sessions[sid].get('active', True), self._sessions[sid]['last_activity'])
+                )
+            evicted += self._evict(session_id, MEMORY)
+        return evicted
+
+    def _evict(self, session_id, reason):
+        # Removed first so no new request can reach it while it is flushed
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return 0
+
+        flushed = True
+        if self.on_evict:
+            try:
+                flushed = self.on_evict(session_id, session, reason) is not False
+            except Exception as e:
+                logger.error("session_flush_failed session=%s error=%s", session_id, e)
+                flushed = False
+
+        if not flushed:
+            with self._lock:
+                self._stats['flush_failures'] += 1
+            if reason != MEMORY:
+                # Keep it and try again on the next sweep
+                with self._lock:
+                    self._sessions.setdefault(session_id, session)
+                return 0
+
+        with self._lock:
+            self._stats['evicted'][reason] += 1
+        logger.info("session_evicted session=%s reason=%s", session_id, reason)
+        return 1
+
+    def start_sweeper(self, interval=SWEEP_INTERVAL_SECONDS):
+        """Sweep periodically on a daemon thread"""
+        if self._sweeper:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception:
+                    logger.exception("session_sweep_failed")
+
+        self._sweeper = threading.Thread(target=run, daemon=True, name="session-sweeper")
+        self._sweeper.start()
+
+    def get_stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            stats = {
+                'created': self._stats['created'],
+                'evicted': dict(self._stats['evicted']),
+                'flush_failures': self._stats['flush_failures'],
+            }
+        stats.update({
+            'active': sum(1 for s in sessions if s.get('active', True)),
+            'stopped': sum(1 for s in sessions if not s.get('active', True)),
+            'bytes': sum(s['size'] for s in sessions),
+            'max_bytes': self.max_bytes,
+        })
+        return stats
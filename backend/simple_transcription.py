@@ -5,150 +5,387 @@ No WebSocket dependencies - just HTTP + SSE
 
 from flask import Flask, request, jsonify, Response
 import json
-import time
+import logging
 import threading
-import queue
-import tempfile
 import os
-from faster_whisper import WhisperModel
+import sys
+from collections import deque
 from datetime import datetime
+from urllib.parse import urlsplit
+
+# The model registry and VAD live with the transcription engine
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python'))
+import metrics
+from model_registry import ModelLoadError, registry as model_registry
+from voice_activity import VadStats, VoiceActivityDetector
+
+from audio_ingest import SAMPLE_RATE, UnsupportedAudioError, decode_upload, is_pcm_content_type
+from inference_scheduler import InferenceScheduler, SchedulerBusyError
+from inference_workers import DEFAULT_WORKERS, WorkerPool
+from sse_hub import SSEHub, format_sse
+from sse_server import AsyncSSEServer
+from session_registry import SessionRegistry
+
+# Updates kept per session so a reconnecting client can catch up
+SSE_BACKLOG_SIZE = int(os.getenv("TRANSCRIPTION_SSE_BACKLOG", "256"))
+# How long an upload waits for a model that is still loading before giving up
+MODEL_WAIT_SECONDS = float(os.getenv("TRANSCRIPTION_MODEL_WAIT", "10"))
+
+logger = logging.getLogger(__name__)
+
+AUDIO_DECODE_SECONDS = metrics.histogram(
+    'transcription_audio_decode_seconds', 'Time to decode an uploaded audio chunk to 16 kHz float32',
+    ['format']
+)
 
 # Simple transcription manager
 class SimpleTranscriptionManager:
-    def __init__(self):
-        self.active_sessions = {}
-        self.whisper_model = None
-        self.initialize_whisper()
+    def __init__(self, flush_transcript=None, model_size=None, compute_type=None, beam_size=1,
+                 workers=DEFAULT_WORKERS):
+        """
+        Args:
+            flush_transcript: callable(proceeding_id, text) persisting session
+                text when a session stops or is evicted
+            model_size, compute_type: Whisper configuration (None = registry default)
+            beam_size: Decoding beam width (1 = greedy, fastest)
+            workers: Inference worker processes, each with its own model
+                (0 = decode in this process with the shared registry model)
+        """
+        self.flush_transcript = flush_transcript
+        # Idle, expired and over-budget sessions are flushed and dropped
+        self.sessions = SessionRegistry(on_evict=self._on_evict)
+        self.sessions.start_sweeper()
+        # Every viewer of a session subscribes here and gets every update
+        self.hub = SSEHub()
+        if workers:
+            # Decoding happens in worker processes; the handle turns ready
+            # once the first of them has loaded its model
+            self.pool = WorkerPool(workers, model_size, None, compute_type)
+            self.model_handle = self.pool.handle
+        else:
+            # Loads (once per process) in the background; see model_registry
+            self.pool = None
+            self.model_handle = model_registry.request(model_size, None, compute_type)
+        # Silent chunks are dropped per session before they reach the scheduler
+        self.vad_stats = VadStats()
+        # All sessions share one model through the batching scheduler
+        self.scheduler = InferenceScheduler(
+            lambda: self.whisper_model,
+            beam_size=beam_size,
+            on_inference=self.vad_stats.record_inference,
+            pool=self.pool
+        )
     
-    def initialize_whisper(self):
-        """Initialize Whisper model in background"""
-        def load_model():
-            try:
-                print("Loading Whisper model...")
-                self.whisper_model = WhisperModel("small", device="cpu", compute_type="int8")
-                print("Whisper model loaded successfully!")
-            except Exception as e:
-                print(f"Error loading Whisper model: {e}")
+    @property
+    def whisper_model(self):
+        """The shared model (the worker pool, with workers), or None while it is still loading"""
+        return self.model_handle.model
+    
+    def wait_for_model(self, timeout=MODEL_WAIT_SECONDS):
+        """
+        Wait up to ``timeout`` seconds for the model
         
-        threading.Thread(target=load_model, daemon=True).start()
+        Returns:
+            None when ready, otherwise an error message
+        """
+        try:
+            if self.model_handle.wait(timeout) is not None:
+                return None
+            return 'Whisper model is still loading'
+        except ModelLoadError as e:
+            return f'Whisper model failed to load: {e}'
     
     def start_session(self, proceeding_id):
         """Start new transcription session"""
-        session_id = f"session_{int(time.time())}"
-        self.active_sessions[session_id] = {
+        return self.sessions.create({
             'proceeding_id': proceeding_id,
-            'transcript': '',
-            'updates': queue.Queue(),
+            'segments': [],  # Transcribed text, one entry per chunk
+            'flushed': 0,  # Segments already persisted by flush_transcript
+            'vad': VoiceActivityDetector(SAMPLE_RATE, self.vad_stats),
+            'backlog': deque(maxlen=SSE_BACKLOG_SIZE),  # (seq, update) for replay
+            'next_seq': 1,
+            'lock': threading.RLock(),
             'active': True
-        }
-        return session_id
+        })
     
     def stop_session(self, session_id):
-        """Stop transcription session"""
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]['active'] = False
+        """Stop transcription session and persist its text"""
+        session = self.sessions.get(session_id)
+        if session:
+            session['active'] = False
+            self.sessions.touch(session)
+            self.hub.end_session(session_id)
+            self._flush(session)
     
     def clear_session(self, session_id):
         """Clear session transcript"""
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]['transcript'] = ''
-            self.add_update(session_id, {'type': 'clear', 'text': ''})
+        session = self.sessions.get(session_id)
+        if session:
+            with session['lock']:
+                session['segments'] = []
+                session['flushed'] = 0
+                self._publish(session_id, session, {'type': 'clear', 'text': ''})
+    
+    def get_transcript(self, session_id):
+        """Full session transcript, joined only when someone asks for it"""
+        session = self.sessions.get(session_id)
+        if not session:
+            return ''
+        return ' '.join(session['segments'])
+    
+    def _flush(self, session):
+        """
+        Persist segments not yet flushed
+        
+        Returns:
+            False if flushing failed (the segments stay pending)
+        """
+        if not self.flush_transcript:
+            return True
+        with session['lock']:
+            pending = session['segments'][session['flushed']:]
+            if not pending:
+                return True
+            try:
+                self.flush_transcript(session['proceeding_id'], ' '.join(pending))
+            except Exception as e:
+                logger.error("flush_failed proceeding=%s error=%s", session['proceeding_id'], e)
+                return False
+            session['flushed'] += len(pending)
+        return True
     
-    def process_audio(self, session_id, audio_file):
-        """Process audio file and add to transcript"""
+    def _on_evict(self, session_id, session, reason):
+        """Registry callback - end the session's streams and save its text"""
+        session['active'] = False
+        self.hub.end_session(session_id)
+        return self._flush(session)
+    
+    def process_audio(self, session_id, audio):
+        """Transcribe a decoded 16 kHz mono float32 array and add to transcript"""
         if not self.whisper_model:
             return "Whisper model not loaded yet"
         
-        if session_id not in self.active_sessions:
+        session = self.sessions.get(session_id)
+        if not session:
             return "Session not found"
+        self.sessions.touch(session)
         
         try:
-            print(f"Processing audio file: {audio_file}")
-            
-            # Check if file exists and has content
-            if not os.path.exists(audio_file):
-                print(f"Audio file does not exist: {audio_file}")
+            if len(audio) == 0:
+                logger.debug("chunk_empty session=%s", session_id)
                 return ""
             
-            file_size = os.path.getsize(audio_file)
-            print(f"Audio file size: {file_size} bytes")
-            
-            if file_size == 0:
-                print("Audio file is empty")
+            if not session['vad'].has_speech(audio):
+                logger.debug("chunk_silent session=%s seconds=%.2f", session_id, len(audio) / SAMPLE_RATE)
                 return ""
             
-            # Transcribe audio with faster-whisper
-            print("Starting transcription...")
-            segments, info = self.whisper_model.transcribe(
-                audio_file, 
-                beam_size=1, 
-                language="en",
-                condition_on_previous_text=False  # Better for short chunks
+            # Queue for batched inference - the transcript is appended on the
+            # scheduler thread so chunks from one session land in order
+            text = self.scheduler.transcribe(
+                session_id,
+                audio,
+                on_result=lambda result: self._append_transcript(session_id, result)
             )
-            
-            print(f"Transcription info: {info}")
-            
-            # Combine segments
-            text = ""
-            segment_count = 0
-            for segment in segments:
-                text += segment.text + " "
-                segment_count += 1
-                print(f"Segment {segment_count}: {segment.text}")
-            
-            text = text.strip()
-            print(f"Final transcribed text: '{text}'")
-            
-            if text:
-                # Add to session transcript
-                session = self.active_sessions[session_id]
-                session['transcript'] += text + " "
-                
-                # Send update to client
-                self.add_update(session_id, {
-                    'type': 'transcription',
-                    'text': text,
-                    'full_transcript': session['transcript']
-                })
-                
-                print(f"Added text to session transcript: '{text}'")
-            else:
-                print("No text was transcribed from audio")
+            logger.debug("chunk_transcribed session=%s seconds=%.2f chars=%d",
+                         session_id, len(audio) / SAMPLE_RATE, len(text))
             
             return text
             
-        except Exception as e:
-            print(f"Error processing audio: {e}")
-            import traceback
-            traceback.print_exc()
+        except SchedulerBusyError:
+            raise
+        except Exception:
+            logger.exception("process_audio_failed session=%s", session_id)
             return ""
     
-    def add_update(self, session_id, update):
-        """Add update to session queue"""
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]['updates'].put(update)
+    def _append_transcript(self, session_id, text):
+        """Add transcribed text to the session and notify clients"""
+        session = self.sessions.get(session_id)
+        if not text or not session:
+            return
+        
+        with session['lock']:
+            session['segments'].append(text)
+            # Send only the new segment - clients append it
+            self._publish(session_id, session, {
+                'type': 'transcription',
+                'text': text
+            })
+        # Held twice: once in segments, once in the replay backlog
+        self.sessions.touch(session, added_bytes=2 * len(text.encode('utf-8')))
     
-    def get_updates(self, session_id):
-        """Generator for Server-Sent Events"""
-        if session_id not in self.active_sessions:
+    def add_update(self, session_id, update):
+        """Number the update, keep it in the replay backlog and broadcast it"""
+        session = self.sessions.get(session_id)
+        if not session:
             return
         
-        session = self.active_sessions[session_id]
+        with session['lock']:
+            self._publish(session_id, session, update)
+    
+    def _publish(self, session_id, session, update):
+        """add_update for a session already looked up (caller holds the lock)"""
+        update['seq'] = session['next_seq']
+        session['next_seq'] += 1
+        session['backlog'].append((update['seq'], update))
+        # Published under the session lock so every viewer sees seq order
+        self.hub.publish(session_id, update)
+    
+    def _resync(self, session):
+        """Snapshot event standing in for every update so far (caller holds the lock)"""
+        return {
+            'type': 'resync',
+            'seq': session['next_seq'] - 1,
+            'full_transcript': ' '.join(session['segments'])
+        }
+    
+    def _replay(self, session, last_event_id):
+        """Updates after last_event_id, or a resync event if they fell out of the backlog (caller holds the lock)"""
+        if last_event_id >= session['next_seq'] - 1:
+            return []
+        backlog = session['backlog']
+        if backlog and backlog[0][0] <= last_event_id + 1:
+            return [update for seq, update in backlog if seq > last_event_id]
+        
+        # Too far behind - one snapshot instead of the missing deltas
+        return [self._resync(session)]
+    
+    def resync_update(self, session_id):
+        """Snapshot for a viewer whose buffer overflowed, or None if the session is gone"""
+        session = self.sessions.get(session_id)
+        if not session:
+            return None
+        with session['lock']:
+            return self._resync(session)
+    
+    def open_stream(self, session_id, last_event_id=None, loop=None):
+        """
+        Subscribe a viewer to a session
+        
+        Subscribing and reading the backlog happen under the session lock, so
+        nothing published in between is either missed or sent twice.
         
-        while session['active']:
+        Args:
+            loop: asyncio loop of an async viewer (None for a thread)
+        
+        Returns:
+            (subscription, updates to replay first), or None if the session is unknown
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            return None
+        
+        with session['lock']:
+            subscription = self.hub.subscribe(session_id, loop=loop)
+            replay = self._replay(session, last_event_id) if last_event_id is not None else []
+        if not session['active']:
+            subscription.end()
+        return subscription, replay
+    
+    def get_updates(self, session_id, last_event_id=None):
+        """
+        Generator for Server-Sent Events (threaded fallback for sse_server)
+
+        Every update carries a monotonic ``seq`` sent as the SSE ``id``. A client
+        reconnecting with Last-Event-ID is first replayed what it missed.
+        """
+        stream = self.open_stream(session_id, last_event_id)
+        if stream is None:
+            return
+        
+        subscription, replay = stream
+        last_sent = 0
+        try:
+            for update in replay:
+                last_sent = update['seq']
+                yield format_sse(update)
+            
+            while True:
+                # Read before draining, so the last drain after the session
+                # ends still sends its final updates
+                closed = subscription.closed
+                if not closed and not subscription.wait(timeout=1.0):
+                    # Send heartbeat
+                    yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+                    continue
+                
+                updates, dropped = subscription.drain()
+                if dropped:
+                    # Fell behind and lost updates - send a snapshot instead of a gap
+                    resync = self.resync_update(session_id)
+                    if resync:
+                        updates = [resync] + [u for u in updates if u['seq'] > resync['seq']]
+                for update in updates:
+                    if update['seq'] <= last_sent:
+                        continue  # Already replayed
+                    last_sent = update['seq']
+                    yield format_sse(update)
+                subscription.observe_delivery()
+                if closed:
+                    return
+        finally:
+            subscription.close()
+
+# Global transcription manager, created on first use (or by warm_up) so that
+# importing this module doesn't start loading the model
+transcription_manager = None
+sse_server = None
+_manager_lock = threading.Lock()
+
+flush_transcript = None
+
+def get_transcription_manager():
+    """The process-wide SimpleTranscriptionManager (and its async SSE server)"""
+    global transcription_manager, sse_server
+    with _manager_lock:
+        if transcription_manager is None:
+            transcription_manager = SimpleTranscriptionManager(flush_transcript)
             try:
-                # Wait for update with timeout
-                update = session['updates'].get(timeout=1.0)
-                yield f"data: {json.dumps(update)}\n\n"
-            except queue.Empty:
-                # Send heartbeat
-                yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+                sse_server = AsyncSSEServer(transcription_manager).start()
+            except OSError as e:
+                # Streams fall back to the threaded Flask route
+                logger.warning("sse_server_not_started error=%s", e)
+            register_gauges(transcription_manager)
+    return transcription_manager
+
+def register_gauges(manager):
+    """Queue depth, session and stream counts for /metrics"""
+    metrics.gauge('transcription_inference_queue_depth', 'Chunks waiting for inference',
+                  lambda: manager.scheduler.get_stats()['queue_depth'])
+    metrics.gauge('transcription_active_sessions', 'Transcription sessions currently recording',
+                  lambda: manager.sessions.get_stats()['active'])
+    metrics.gauge('transcription_session_bytes', 'Estimated memory held by transcription sessions',
+                  lambda: manager.sessions.get_stats()['bytes'])
+    metrics.gauge('transcription_sse_subscribers', 'Open transcription event streams',
+                  lambda: manager.hub.get_stats()['subscribers'])
+    metrics.gauge('transcription_model_ready', '1 once the Whisper model is loaded',
+                  lambda: manager.model_handle.ready)
+    if manager.pool:
+        metrics.gauge('transcription_workers_alive', 'Inference worker processes running',
+                      lambda: manager.pool.get_stats()['alive'])
+        metrics.gauge('transcription_workers_busy', 'Inference workers decoding a batch',
+                      lambda: manager.pool.get_stats()['busy'])
+
+def stream_url(session_id):
+    """Where clients should open the session's EventSource"""
+    if sse_server:
+        host = urlsplit(request.host_url).hostname
+        return f"http://{host}:{sse_server.port}/api/transcription/stream/{session_id}"
+    return f"{request.host_url}api/transcription/stream/{session_id}"
 
-# Global transcription manager
-transcription_manager = SimpleTranscriptionManager()
+def warm_up():
+    """Start loading the model and the ASR stack ahead of the first request"""
+    get_transcription_manager()
 
-def create_transcription_routes(app):
-    """Add transcription routes to existing Flask app"""
+def create_transcription_routes(app, on_flush=None):
+    """
+    Add transcription routes to existing Flask app
+    
+    Args:
+        on_flush: callable(proceeding_id, text) saving a session's text when
+            it stops or is evicted
+    """
+    global flush_transcript
+    flush_transcript = on_flush
     
     @app.route('/api/transcription/start', methods=['POST'])
     def start_transcription():
@@ -159,11 +396,12 @@ def create_transcription_routes(app):
         if not proceeding_id:
             return jsonify({'error': 'Missing proceeding_id'}), 400
         
-        session_id = transcription_manager.start_session(proceeding_id)
+        session_id = get_transcription_manager().start_session(proceeding_id)
         
         return jsonify({
             'success': True,
             'session_id': session_id,
+            'stream_url': stream_url(session_id),
             'message': 'Transcription session started'
         })
     
@@ -176,7 +414,7 @@ def create_transcription_routes(app):
         if not session_id:
             return jsonify({'error': 'Missing session_id'}), 400
         
-        transcription_manager.stop_session(session_id)
+        get_transcription_manager().stop_session(session_id)
         
         return jsonify({
             'success': True,
@@ -192,7 +430,7 @@ def create_transcription_routes(app):
         if not session_id:
             return jsonify({'error': 'Missing session_id'}), 400
         
-        transcription_manager.clear_session(session_id)
+        get_transcription_manager().clear_session(session_id)
         
         return jsonify({
             'success': True,
@@ -201,87 +439,55 @@ def create_transcription_routes(app):
     
     @app.route('/api/transcription/audio', methods=['POST'])
     def upload_audio():
-        """Process uploaded audio chunk"""
-        print("=== Audio upload request received ===")
-        
-        session_id = request.form.get('session_id')
-        print(f"Session ID: {session_id}")
+        """
+        Process uploaded audio chunk
+
+        Accepts either a multipart form (session_id + audio file) or a raw
+        request body with an audio content type and ?session_id=... - the
+        latter is how clients send the audio/l16 PCM fast path.
+        """
+        if request.mimetype.startswith('audio/'):
+            # Raw body upload - decode straight from the request stream
+            session_id = request.args.get('session_id')
+            audio_stream = request.stream
+            content_type = request.content_type
+        else:
+            session_id = request.form.get('session_id')
+            if 'audio' not in request.files:
+                return jsonify({'error': 'No audio file'}), 400
+            audio_file = request.files['audio']
+            audio_stream = audio_file.stream
+            content_type = audio_file.content_type
         
         if not session_id:
             return jsonify({'error': 'Missing session_id'}), 400
         
-        if 'audio' not in request.files:
-            print("No audio file in request")
-            return jsonify({'error': 'No audio file'}), 400
-        
-        audio_file = request.files['audio']
-        print(f"Audio file received: {audio_file.filename}, content_type: {audio_file.content_type}")
-        
-        # Check if Whisper model is loaded
-        if not transcription_manager.whisper_model:
-            print("Whisper model not loaded yet")
-            return jsonify({'error': 'Whisper model not loaded yet'}), 503
-        
-        # Save to temporary file with proper cleanup
-        temp_file = None
-        temp_filename = None
-        text = ""
+        # Right after startup the model may still be loading - wait briefly
+        # rather than failing the chunk
+        model_error = get_transcription_manager().wait_for_model()
+        if model_error:
+            logger.warning("model_unavailable session=%s error=%s", session_id, model_error)
+            return jsonify({'error': model_error}), 503, {'Retry-After': '5'}
         
         try:
-            # Determine file extension based on content type
-            if audio_file.content_type:
-                if 'webm' in audio_file.content_type:
-                    suffix = '.webm'
-                elif 'mp4' in audio_file.content_type:
-                    suffix = '.mp4'
-                elif 'wav' in audio_file.content_type:
-                    suffix = '.wav'
-                else:
-                    suffix = '.webm'  # Default
-            else:
-                suffix = '.webm'  # Default
+            # Decode in memory - audio/l16 skips container decoding and resampling
+            with AUDIO_DECODE_SECONDS.labels(
+                    format='pcm' if is_pcm_content_type(content_type) else 'container').time():
+                audio = decode_upload(audio_stream, content_type)
             
-            print(f"Using file suffix: {suffix}")
+            text = get_transcription_manager().process_audio(session_id, audio)
             
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
-                temp_filename = temp_file.name
-                print(f"Saving audio to temp file: {temp_filename}")
-                audio_file.save(temp_filename)
+        except UnsupportedAudioError as e:
+            logger.info("unsupported_audio session=%s content_type=%s error=%s", session_id, content_type, e)
+            return jsonify({'error': str(e)}), 415
             
-            # Check file was saved properly
-            if os.path.exists(temp_filename):
-                file_size = os.path.getsize(temp_filename)
-                print(f"Temp file saved successfully, size: {file_size} bytes")
-                
-                # Process audio (file is now closed)
-                text = transcription_manager.process_audio(session_id, temp_filename)
-                print(f"Transcription result: '{text}'")
-            else:
-                print("Error: Temp file was not created")
-                return jsonify({'error': 'Failed to save audio file'}), 500
+        except SchedulerBusyError as e:
+            # Backpressure - every session is already queued up
+            return jsonify({'error': str(e)}), 429, {'Retry-After': '1'}
             
         except Exception as e:
-            print(f"Error in upload_audio: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("upload_audio_failed session=%s", session_id)
             return jsonify({'error': f'Processing error: {str(e)}'}), 500
-            
-        finally:
-            # Clean up temp file safely
-            if temp_filename and os.path.exists(temp_filename):
-                try:
-                    os.unlink(temp_filename)
-                    print(f"Cleaned up temp file: {temp_filename}")
-                except PermissionError:
-                    # On Windows, sometimes files are still locked
-                    # Try again after a short delay
-                    import time
-                    time.sleep(0.1)
-                    try:
-                        os.unlink(temp_filename)
-                        print(f"Cleaned up temp file after delay: {temp_filename}")
-                    except Exception as cleanup_error:
-                        print(f"Warning: Could not delete temp file {temp_filename}: {cleanup_error}")
         
         return jsonify({
             'success': True,
@@ -289,13 +495,35 @@ def create_transcription_routes(app):
             'session_id': session_id
         })
     
+    @app.route('/api/transcription/status', methods=['GET'])
+    def transcription_status():
+        """Model readiness, for clients to show before recording starts"""
+        manager = get_transcription_manager()
+        return jsonify({
+            'ready': manager.model_handle.ready,
+            'state': manager.model_handle.state,
+            'models': model_registry.status(),
+            'streams': manager.hub.get_stats(),
+            'sessions': manager.sessions.get_stats(),
+            'vad': manager.vad_stats.get_stats(),
+            'workers': manager.pool.get_stats() if manager.pool else None
+        })
+    
     @app.route('/api/transcription/stream/<session_id>')
     def stream_updates(session_id):
-        """Server-Sent Events stream for real-time updates"""
+        """
+        Server-Sent Events stream for real-time updates
+        
+        Holds a worker thread per viewer; clients use the ``stream_url`` from
+        /start, which points at the async server unless it failed to start.
+        """
+        # EventSource sends Last-Event-ID automatically when it reconnects
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        
         def generate():
             yield "data: {\"type\": \"connected\"}\n\n"
             
-            for update in transcription_manager.get_updates(session_id):
+            for update in get_transcription_manager().get_updates(session_id, last_event_id):
                 yield update
         
         return Response(
@@ -309,4 +537,4 @@ def create_transcription_routes(app):
         )
 
 # Export the function to add to main app
-__all__ = ['create_transcription_routes'] 
\ No newline at end of file
+__all__ = ['create_transcription_routes', 'warm_up'] 
\ No newline at end of file
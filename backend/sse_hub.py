@@ -0,0 +1,177 @@
+"""
+Publish/subscribe hub for transcription updates
+Every viewer of a session gets its own bounded buffer, so a judge and a clerk watching the same session both see every event
+
+Publishers (request threads, the inference scheduler) never block: a
+subscriber that falls behind loses its oldest buffered updates and is told
+how many it missed, so it can resync from a snapshot instead.
+
+Subscribers can be threads (the Flask stream route) or coroutines on an
+asyncio loop (sse_server); both are woken without polling.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+
+DEFAULT_BUFFER_SIZE = int(os.getenv("TRANSCRIPTION_SSE_BUFFER", "64"))
+
+SSE_DELIVERY_SECONDS = metrics.histogram(
+    'transcription_sse_delivery_seconds',
+    'From publishing an update to writing it to a viewer (oldest update of each write)'
+)
+
+
+def format_sse(update):
+    """Format a numbered update as an SSE message"""
+    return f"id: {update['seq']}\ndata: {json.dumps(update)}\n\n"
+
+
+class Subscription:
+    """One viewer's buffer of pending updates for one session"""
+
+    def __init__(self, hub, session_id, maxsize, loop=None):
+        self.hub = hub
+        self.session_id = session_id
+        self.closed = False
+        self._buffer = deque(maxlen=maxsize)
+        self._dropped = 0
+        # When the oldest buffered update was pushed, for delivery latency
+        self._pending_since = None
+        self._drained_pending_since = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        # Async subscribers are woken on their own loop
+        self._loop = loop
+        self._async_ready = asyncio.Event() if loop else None
+
+    def push(self, update):
+        """
+        Queue an update, dropping the oldest when full; safe from any thread
+
+        Returns:
+            True if an older update was dropped to make room
+        """
+        with self._lock:
+            full = len(self._buffer) == self._buffer.maxlen
+            if full:
+                self._dropped += 1
+            if self._pending_since is None:
+                self._pending_since = time.perf_counter()
+            self._buffer.append(update)
+        self._wake()
+        return full
+
+    def end(self):
+        """The session is over - wake the subscriber so it can finish"""
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        self._ready.set()
+        if self._loop:
+            try:
+                self._loop.call_soon_threadsafe(self._async_ready.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    def drain(self):
+        """
+        Take everything buffered
+
+        Returns:
+            (updates, dropped) - dropped counts updates lost since the last drain
+        """
+        with self._lock:
+            updates = list(self._buffer)
+            dropped = self._dropped
+            self._buffer.clear()
+            self._dropped = 0
+            self._drained_pending_since, self._pending_since = self._pending_since, None
+            self._ready.clear()
+            if self._async_ready:
+                self._async_ready.clear()
+        return updates, dropped
+
+    def observe_delivery(self):
+        """Record delivery latency once the last drained updates are written"""
+        if self._drained_pending_since is not None:
+            SSE_DELIVERY_SECONDS.observe(time.perf_counter() - self._drained_pending_since)
+            self._drained_pending_since = None
+
+    def wait(self, timeout):
+        """Block the calling thread until something is buffered (or timeout)"""
+        return self._ready.wait(timeout)
+
+    async def wait_async(self, timeout):
+        """Wait on the subscriber's loop until something is buffered (or timeout)"""
+        try:
+            await asyncio.wait_for(self._async_ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class SSEHub:
+    """Session id -> subscriptions, with broadcast"""
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscriptions = {}  # session_id -> set of Subscription
+        self._lock = threading.Lock()
+        self._published = 0
+        self._dropped = 0
+
+    def subscribe(self, session_id, loop=None):
+        """
+        New subscription to a session's updates
+
+        Args:
+            loop: asyncio loop the subscriber runs on (None for a thread)
+        """
+        subscription = Subscription(self, session_id, self.buffer_size, loop)
+        with self._lock:
+            self._subscriptions.setdefault(session_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.session_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.session_id]
+
+    def publish(self, session_id, update):
+        """Send an update to every subscriber of the session"""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(session_id, ()))
+            self._published += 1
+        dropped = sum(subscription.push(update) for subscription in subscribers)
+        if dropped:
+            with self._lock:
+                self._dropped += dropped
+
+    def end_session(self, session_id):
+        """Finish every stream of a session"""
+        with self._lock:
+            subscribers = self._subscriptions.pop(session_id, set())
+        for subscription in subscribers:
+            subscription.end()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._subscriptions),
+                'subscribers': sum(len(s) for s in self._subscriptions.values()),
+                'published': self._published,
+                'dropped': self._dropped,
+            }
@@ -0,0 +1,197 @@
+"""
+Asyncio server for transcription Server-Sent Events streams
+One event-loop thread serves every viewer, instead of holding a Flask worker thread per connection
+
+Serves GET /api/transcription/stream/<session_id> on its own port (the
+Flask route of the same path stays as a fallback). Updates come from the
+SimpleTranscriptionManager's SSEHub; each connection has its own bounded
+buffer and is sent a resync snapshot if it fell behind far enough to drop
+updates.
+
+Settings (.env):
+    TRANSCRIPTION_SSE_HOST  interface to listen on (default 127.0.0.1)
+    TRANSCRIPTION_SSE_PORT  port (default 5002)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from sse_hub import format_sse
+
+DEFAULT_HOST = os.getenv("TRANSCRIPTION_SSE_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.getenv("TRANSCRIPTION_SSE_PORT", "5002"))
+STREAM_PREFIX = "/api/transcription/stream/"
+# Idle streams get a heartbeat so proxies and clients notice dead connections
+HEARTBEAT_SECONDS = 15
+REQUEST_TIMEOUT_SECONDS = 10
+
+logger = logging.getLogger(__name__)
+
+CORS_HEADERS = (
+    "Access-Control-Allow-Origin: *\r\n"
+    "Access-Control-Allow-Headers: Last-Event-ID, Cache-Control\r\n"
+)
+
+
+class AsyncSSEServer:
+    """Streams a SimpleTranscriptionManager's updates from one asyncio loop"""
+
+    def __init__(self, manager, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.connections = 0
+        self._server = None
+        self._started = threading.Event()
+        self._error = None
+
+    def start(self, timeout=5.0):
+        """
+        Start serving on a background thread
+
+        Raises:
+            OSError: the port could not be bound
+        """
+        threading.Thread(target=self._run, daemon=True, name="sse-server").start()
+        self._started.wait(timeout)
+        if self._error:
+            raise self._error
+        return self
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            # Port 0 picks a free port
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._error = e
+            self._started.set()
+            return
+        self._started.set()
+        logger.info("sse_server_listening url=http://%s:%s", self.host, self.port)
+        self.loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            request = await asyncio.wait_for(_read_request(reader), REQUEST_TIMEOUT_SECONDS)
+            if request is None:
+                return
+            method, target, headers = request
+
+            if method == "OPTIONS":
+                writer.write(f"HTTP/1.1 204 No Content\r\n{CORS_HEADERS}Content-Length: 0\r\n\r\n".encode())
+                return
+
+            url = urlsplit(target)
+            if method != "GET" or not url.path.startswith(STREAM_PREFIX):
+                _write_error(writer, 404, "Not found")
+                return
+
+            session_id = unquote(url.path[len(STREAM_PREFIX):])
+            last_event_id = headers.get("last-event-id") or parse_qs(url.query).get("last_event_id", [None])[0]
+            try:
+                last_event_id = int(last_event_id) if last_event_id is not None else None
+            except ValueError:
+                last_event_id = None
+
+            stream = self.manager.open_stream(session_id, last_event_id, loop=asyncio.get_running_loop())
+            if stream is None:
+                _write_error(writer, 404, "Session not found")
+                return
+
+            subscription, replay = stream
+            try:
+                await self._stream(writer, session_id, subscription, replay)
+            finally:
+                subscription.close()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass  # Client went away
+        except ValueError:
+            _write_error(writer, 400, "Bad request")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _stream(self, writer, session_id, subscription, replay):
+        writer.write((
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: text/event-stream\r\n"
+            "Cache-Control: no-cache\r\n"
+            "Connection: keep-alive\r\n"
+            f"{CORS_HEADERS}\r\n"
+            f"data: {json.dumps({'type': 'connected'})}\n\n"
+        ).encode())
+
+        last_sent = 0
+        for update in replay:
+            last_sent = update['seq']
+            writer.write(format_sse(update).encode())
+        await writer.drain()
+
+        while True:
+            # Read before draining: once the session has ended, this drain
+            # holds everything published before the end
+            closed = subscription.closed
+            if not closed and not await subscription.wait_async(HEARTBEAT_SECONDS):
+                writer.write(f"data: {json.dumps({'type': 'heartbeat'})}\n\n".encode())
+                await writer.drain()
+                continue
+
+            updates, dropped = subscription.drain()
+            if dropped:
+                # Fell behind and lost updates - send a snapshot instead of a gap
+                resync = self.manager.resync_update(session_id)
+                if resync:
+                    updates = [resync] + [u for u in updates if u['seq'] > resync['seq']]
+
+            for update in updates:
+                if update['seq'] <= last_sent:
+                    continue  # Already replayed
+                last_sent = update['seq']
+                writer.write(format_sse(update).encode())
+            await writer.drain()
+            subscription.observe_delivery()
+
+            if closed:
+                return
+
+
+async def _read_request(reader):
+    """(method, target, lower-cased headers) or None for an empty connection"""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+def _write_error(writer, status, message):
+    body = json.dumps({'error': message}).encode()
+    reason = {400: "Bad Request", 404: "Not Found"}.get(status, "Error")
+    writer.write((
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json\r\n"
+        f"{CORS_HEADERS}"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body)
@@ -0,0 +1,92 @@
+"""
+Streaming transcript export
+Builds the export body piece by piece from transcript storage, so memory stays flat however long the record is
+
+Formats:
+    txt    the court header, then the transcript text
+    jsonl  a header object, then one object per piece of text with its
+           character offset and the time it was saved:
+           {"type": "segment", "offset": 1024, "saved_at": "...", "text": "..."}
+
+Any format can be gzip-compressed on the fly (``compress=gzip``).
+"""
+
+import json
+import zlib
+
+FORMATS = {
+    "txt": ("text/plain", "txt"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+COMPRESSIONS = {
+    "gzip": ("application/gzip", "gz"),
+}
+
+GZIP_LEVEL = 6
+# gzip container (header and CRC) around a raw deflate stream
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def text_chunks(header, pieces):
+    """Plain-text export: the header, then each piece's text"""
+    yield header.encode("utf-8")
+    first = True
+    for _, _, text in pieces:
+        if first:
+            yield b"\n\n"
+            first = False
+        yield text.encode("utf-8")
+
+
+def jsonl_chunks(proceeding, pieces):
+    """JSON Lines export: a header line, then one line per piece"""
+    yield _json_line({"type": "header", **proceeding})
+    for offset, saved_at, text in pieces:
+        yield _json_line({
+            "type": "segment",
+            "offset": offset,
+            "saved_at": saved_at.isoformat() if saved_at else None,
+            "text": text
+        })
+
+
+def _json_line(record):
+    # default=str covers datetimes and ObjectIds stored on proceedings
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    """Compress a stream of byte chunks into one gzip stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_chunks(fmt, proceeding, header, pieces, compress=None):
+    """
+    Body of an export as byte chunks
+
+    Args:
+        fmt: A key of FORMATS
+        proceeding: The proceeding document (for the jsonl header)
+        header: The plain-text court header (for txt)
+        pieces: (offset, saved_at, text) from TranscriptStore.iter_export
+        compress: None or a key of COMPRESSIONS
+    """
+    chunks = text_chunks(header, pieces) if fmt == "txt" else jsonl_chunks(proceeding, pieces)
+    if compress == "gzip":
+        chunks = gzip_chunks(chunks)
+    return chunks
+
+
+def content_type_and_filename(fmt, proceeding_id, compress=None):
+    """Response mimetype and download filename for an export"""
+    mimetype, extension = FORMATS[fmt]
+    filename = f"transcript_{proceeding_id}.{extension}"
+    if compress:
+        mimetype, suffix = COMPRESSIONS[compress]
+        filename += f".{suffix}"
+    return mimetype, filename
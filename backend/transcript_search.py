@@ -0,0 +1,262 @@
+"""
+Full-text search across proceeding transcripts
+Transcript text is mirrored into small chunks under a MongoDB text index, kept up to date save by save
+
+Each transcript is split at word boundaries into chunks of at most
+CHUNK_CHARS characters in ``transcript_search``:
+
+    {proceeding_id, start, end, text}
+
+A save that truncates to ``offset`` and appends text rewrites only the
+chunk containing ``offset`` and those after it - for a plain append, just
+the last chunk. ``transcript_search_state`` records the seq of the last
+segment applied per proceeding. A save that arrives out of order (or a
+proceeding saved before search existed) is rebuilt from its segments
+instead.
+
+Transcripts saved before search existed are indexed in the background at
+API startup. Rebuild every proceeding by hand (after restoring a backup,
+for instance):
+    python transcript_search.py             # index transcripts never indexed
+    python transcript_search.py --rebuild   # rebuild every transcript
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python'))
+import metrics  # noqa: E402
+
+CHUNKS = "transcript_search"
+STATE = "transcript_search_state"
+
+# Small chunks keep each append's rewrite cheap and each hit precise
+CHUNK_CHARS = 2000
+SNIPPET_CHARS = 160
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+SEARCH_SECONDS = metrics.histogram(
+    'transcript_search_seconds', 'Full-text query over all transcripts, including snippets'
+)
+INDEX_UPDATE_SECONDS = metrics.histogram(
+    'transcript_search_update_seconds', 'Updating the search chunks for one transcript save'
+)
+
+
+def split_chunks(text, start=0, max_chars=CHUNK_CHARS):
+    """
+    Cut ``text`` (which sits at ``start`` in the transcript) into chunks
+
+    Cuts fall just after whitespace so no word is split, unless a single
+    word is longer than ``max_chars``.
+
+    Returns:
+        [(start, text)] covering ``text`` exactly
+    """
+    chunks = []
+    position = 0
+    while position < len(text):
+        end = position + max_chars
+        if end < len(text):
+            cut = max(text.rfind(" ", position, end), text.rfind("\n", position, end))
+            if cut > position:
+                end = cut + 1
+        chunks.append((start + position, text[position:end]))
+        position = end
+    return chunks
+
+
+def query_terms(query):
+    """Words of a $text query, without negated terms (used to place snippets)"""
+    terms = []
+    for token in re.findall(r'-?"[^"]*"|\S+', query):
+        if token.startswith("-"):
+            continue
+        terms.extend(re.findall(r"\w+", token.strip('"')))
+    return terms
+
+
+def snippet_at(text, terms, max_chars=SNIPPET_CHARS):
+    """
+    Where the first of ``terms`` occurs in ``text`` and a snippet around it
+
+    Returns:
+        (position, snippet) - position 0 when no term is found verbatim
+    """
+    position = 0
+    matches = [re.search(rf"\b{re.escape(term)}", text, re.IGNORECASE) for term in terms]
+    matches = [match for match in matches if match]
+    if matches:
+        position = min(match.start() for match in matches)
+
+    begin = max(0, position - max_chars // 3)
+    end = min(len(text), begin + max_chars)
+    snippet = text[begin:end]
+    # Don't start or end on a partial word
+    if begin > 0 and " " in snippet:
+        snippet = "…" + snippet[snippet.index(" ") + 1:]
+    if end < len(text) and " " in snippet:
+        snippet = snippet[:snippet.rindex(" ")] + "…"
+    return position, " ".join(snippet.split())
+
+
+class TranscriptSearch:
+    """Search chunks for every transcript, maintained by TranscriptStore"""
+
+    def __init__(self, db, chunk_chars=CHUNK_CHARS):
+        self.db = db
+        self.chunks = db[CHUNKS]
+        self.state = db[STATE]
+        self.chunk_chars = chunk_chars
+
+    # Maintenance
+
+    def indexed_seq(self, proceeding_id):
+        """Seq of the last segment applied, or None if the proceeding was never indexed"""
+        state = self.state.find_one({"_id": proceeding_id}, {"seq": 1})
+        return state["seq"] if state else None
+
+    def apply(self, proceeding_id, seq, offset, text):
+        """
+        Apply one saved segment (truncate to ``offset``, append ``text``)
+
+        Returns:
+            False if the segment doesn't directly follow the last one
+            applied; the caller should rebuild the proceeding
+        """
+        previous = self.indexed_seq(proceeding_id)
+        if previous is None and seq != 0 or previous is not None and previous != seq - 1:
+            return False
+
+        with INDEX_UPDATE_SECONDS.time():
+            # Chunks end at word boundaries, so rewrite from the start of the
+            # chunk holding ``offset`` to keep the words there whole
+            chunk = self.chunks.find_one(
+                {"proceeding_id": proceeding_id, "start": {"$lte": offset}},
+                {"_id": 0, "start": 1, "text": 1},
+                sort=[("start", DESCENDING)]
+            )
+            start = chunk["start"] if chunk else 0
+            kept = chunk["text"][:offset - start] if chunk else ""
+            self._replace_from(proceeding_id, start, kept + text)
+            return self._advance(proceeding_id, previous, seq)
+
+    def advance(self, proceeding_id, seq):
+        """Record a segment that didn't change the text (a compaction snapshot)"""
+        previous = self.indexed_seq(proceeding_id)
+        return previous == seq - 1 and self._advance(proceeding_id, previous, seq)
+
+    def rebuild(self, proceeding_id, text, seq):
+        """Replace a proceeding's chunks with ``text``, the transcript as of ``seq``"""
+        self._replace_from(proceeding_id, 0, text)
+        self.state.replace_one({"_id": proceeding_id}, {"_id": proceeding_id, "seq": seq}, upsert=True)
+
+    def forget(self, proceeding_id):
+        """Drop the state so the next save rebuilds the proceeding"""
+        self.state.delete_one({"_id": proceeding_id})
+
+    def delete(self, proceeding_id):
+        self.chunks.delete_many({"proceeding_id": proceeding_id})
+        self.state.delete_one({"_id": proceeding_id})
+
+    def _replace_from(self, proceeding_id, start, text):
+        self.chunks.delete_many({"proceeding_id": proceeding_id, "start": {"$gte": start}})
+        chunks = split_chunks(text, start, self.chunk_chars)
+        if chunks:
+            self.chunks.insert_many([
+                {"proceeding_id": proceeding_id, "start": chunk_start,
+                 "end": chunk_start + len(chunk_text), "text": chunk_text}
+                for chunk_start, chunk_text in chunks
+            ], ordered=False)
+
+    def _advance(self, proceeding_id, previous, seq):
+        if previous is None:
+            try:
+                self.state.insert_one({"_id": proceeding_id, "seq": seq})
+            except DuplicateKeyError:
+                return False
+            return True
+        # Fails if another writer moved the state meanwhile
+        result = self.state.update_one({"_id": proceeding_id, "seq": previous}, {"$set": {"seq": seq}})
+        return result.modified_count == 1
+
+    # Querying
+
+    def search(self, query, limit=DEFAULT_LIMIT, proceeding_id=None):
+        """
+        Ranked hits for a MongoDB $text query (words, "phrases", -excluded)
+
+        Returns:
+            list of {proceeding_id, case_number, offset, snippet, score},
+            best first
+        """
+        with SEARCH_SECONDS.time():
+            criteria = {"$text": {"$search": query}}
+            if proceeding_id:
+                criteria["proceeding_id"] = proceeding_id
+            chunks = list(self.chunks.find(
+                criteria,
+                {"_id": 0, "proceeding_id": 1, "start": 1, "text": 1, "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).limit(max(1, min(limit, MAX_LIMIT))))
+
+            case_numbers = {
+                proceeding["proceeding_id"]: proceeding.get("case_number")
+                for proceeding in self.db.proceedings.find(
+                    {"proceeding_id": {"$in": list({chunk["proceeding_id"] for chunk in chunks})}},
+                    {"_id": 0, "proceeding_id": 1, "case_number": 1}
+                )
+            }
+
+            terms = query_terms(query)
+            hits = []
+            for chunk in chunks:
+                position, snippet = snippet_at(chunk["text"], terms)
+                hits.append({
+                    "proceeding_id": chunk["proceeding_id"],
+                    "case_number": case_numbers.get(chunk["proceeding_id"]),
+                    "offset": chunk["start"] + position,
+                    "snippet": snippet,
+                    "score": round(chunk["score"], 3),
+                })
+            return hits
+
+
+def main():
+    from dotenv import load_dotenv
+    from gridfs import GridFS
+
+    from db_indexes import ensure_indexes
+    from mongo_connection import create_client, get_database
+    from transcript_store import SEGMENTS, TranscriptStore
+
+    parser = argparse.ArgumentParser(description="Build the transcript search index")
+    parser.add_argument("--uri", help="MongoDB URI (defaults to MONGO_URI)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Rebuild every transcript, not only ones never indexed")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = get_database(create_client(args.uri))
+    for error in ensure_indexes(db):
+        print(f"❌ {error}")
+
+    store = TranscriptStore(db, GridFS(db), search=TranscriptSearch(db))
+    started = time.perf_counter()
+    if args.rebuild:
+        proceeding_ids = db[SEGMENTS].distinct("proceeding_id")
+        for proceeding_id in proceeding_ids:
+            store.reindex(proceeding_id)
+        count = len(proceeding_ids)
+    else:
+        count = store.index_missing()
+    print(f"✅ Indexed {count} transcripts in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
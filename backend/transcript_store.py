@@ -0,0 +1,396 @@
+"""
+Append-only segmented transcript storage
+Each save writes only what changed; nothing is deleted until a compacted snapshot is safely stored
+
+A transcript is the ordered list of its segments in ``transcript_segments``:
+
+    {proceeding_id, seq, offset, end, text, created_at}
+
+Applying a segment truncates the text to ``offset`` and appends ``text``
+(``end`` is the resulting length). A plain append has offset == current
+length; an edit further back truncates there. ``seq`` is unique per
+proceeding, so two concurrent writers can never both claim a slot.
+
+Exports stream the text a segment at a time: a segment's text survives up
+to the lowest offset any later segment truncates to, so one pass over the
+offsets tells how much of each segment to emit before any text is read.
+"""
+
+import logging
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SEGMENTS = "transcript_segments"
+
+# Compact once this many segments have piled up
+COMPACT_AFTER_SEGMENTS = 200
+# A snapshot is a single document, so keep it well under the 16 MB BSON limit
+MAX_SNAPSHOT_CHARS = 4_000_000
+# Exports fetch this many segments per round trip and emit at most this many characters at once
+EXPORT_BATCH_SEGMENTS = 16
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+
+class TranscriptConflict(Exception):
+    """An append was based on a length the stored transcript no longer has"""
+
+    def __init__(self, current_length):
+        super().__init__(f"Transcript length is {current_length}")
+        self.current_length = current_length
+
+
+class TranscriptChanged(Exception):
+    """Segments read for an export were compacted away before they could be streamed"""
+
+
+def legacy_filename(proceeding_id):
+    """GridFS filename used before segmented storage"""
+    return f"transcript_{proceeding_id}"
+
+
+def apply_segments(segments):
+    """
+    Assemble text from segments in seq order
+
+    Pieces are collected in a list and joined once; a truncating segment
+    only trims the tail, so the cost is linear in the stored text.
+    """
+    pieces = []
+    length = 0
+    for segment in segments:
+        offset = min(segment["offset"], length)
+        while length > offset:
+            last = pieces.pop()
+            length -= len(last)
+            if length < offset:
+                keep = last[:offset - length]
+                pieces.append(keep)
+                length += len(keep)
+        if segment["text"]:
+            pieces.append(segment["text"])
+            length += len(segment["text"])
+    return "".join(pieces)
+
+
+def truncation_limits(segments):
+    """
+    Where later segments cut each segment's text
+
+    Args:
+        segments: ``seq``, ``offset`` and ``end`` of every segment, in seq
+            order (any iterable - only the edits are kept)
+    Returns:
+        [(seq, limit)] for each truncating segment in seq order, where
+        ``limit`` is the lowest offset it or any later segment truncates to.
+        This stays small for append-only transcripts.
+    """
+    cuts = []
+    length = 0
+    for segment in segments:
+        if segment["offset"] < length:
+            cuts.append((segment["seq"], segment["offset"]))
+        length = segment["end"]
+
+    limits = []
+    lowest = None
+    for seq, offset in reversed(cuts):
+        lowest = offset if lowest is None else min(lowest, offset)
+        limits.append((seq, lowest))
+    limits.reverse()
+    return limits
+
+
+def surviving_pieces(segments, limits, chunk_chars=EXPORT_CHUNK_CHARS):
+    """
+    The final text of ``segments`` as (offset, created_at, text) pieces
+
+    Yields the same text as apply_segments, in order and at most
+    ``chunk_chars`` at a time, holding one segment in memory.
+    ``limits`` comes from truncation_limits over the same segments.
+    """
+    cut = 0
+    for segment in segments:
+        # The first truncation made after this segment, and every one after it
+        while cut < len(limits) and limits[cut][0] <= segment["seq"]:
+            cut += 1
+        offset = segment["offset"]
+        keep = len(segment["text"])
+        if cut < len(limits):
+            keep = min(keep, limits[cut][1] - offset)
+        for start in range(0, keep, chunk_chars):
+            yield offset + start, segment["created_at"], segment["text"][start:min(keep, start + chunk_chars)]
+
+
+def common_prefix_length(a, b):
+    """Length of the shared prefix of two strings (binary search on slices)"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class TranscriptStore:
+    """Segmented transcript storage on top of courtroom_db"""
+
+    def __init__(self, db, fs, search=None):
+        """
+        Args:
+            search: Optional TranscriptSearch kept up to date with every save
+        """
+        self.segments = db[SEGMENTS]
+        self.fs = fs
+        self.search = search
+        self._migrated = set()  # Proceedings already checked for a legacy file
+
+    # Reading
+
+    def _last_segment(self, proceeding_id):
+        return self.segments.find_one(
+            {"proceeding_id": proceeding_id},
+            {"_id": 0, "seq": 1, "end": 1, "created_at": 1},
+            sort=[("seq", DESCENDING)]
+        )
+
+    def iter_segments(self, proceeding_id):
+        """Segments in order, without their ids"""
+        self._migrate_legacy(proceeding_id)
+        return self.segments.find(
+            {"proceeding_id": proceeding_id},
+            {"_id": 0, "seq": 1, "offset": 1, "text": 1, "created_at": 1}
+        ).sort("seq", ASCENDING)
+
+    def read(self, proceeding_id):
+        """
+        Returns:
+            (text, last_modified) - ("", None) when nothing was saved
+        """
+        segments = list(self.iter_segments(proceeding_id))
+        if not segments:
+            return "", None
+        return apply_segments(segments), segments[-1]["created_at"]
+
+    def iter_export(self, proceeding_id, chunk_chars=EXPORT_CHUNK_CHARS):
+        """
+        Stream the transcript as (offset, created_at, text) pieces
+
+        Reads offsets first, then the text a few segments at a time, so
+        memory does not grow with the length of the transcript. Segments
+        saved after the export started are left out.
+
+        Raises:
+            TranscriptChanged: while streaming, if a compaction removed
+                segments that had not been read yet
+        """
+        self._migrate_legacy(proceeding_id)
+        last = self._last_segment(proceeding_id)
+        if last is None:
+            return iter(())
+        first = self.segments.find_one(
+            {"proceeding_id": proceeding_id}, {"_id": 0, "seq": 1}, sort=[("seq", ASCENDING)]
+        )
+        span = {"proceeding_id": proceeding_id, "seq": {"$gte": first["seq"], "$lte": last["seq"]}}
+        limits = truncation_limits(self.segments.find(
+            span, {"_id": 0, "seq": 1, "offset": 1, "end": 1}
+        ).sort("seq", ASCENDING))
+
+        segments = self.segments.find(
+            span, {"_id": 0, "seq": 1, "offset": 1, "text": 1, "created_at": 1}
+        ).sort("seq", ASCENDING).batch_size(EXPORT_BATCH_SEGMENTS)
+        return surviving_pieces(self._contiguous(segments, first["seq"], last["seq"]), limits, chunk_chars)
+
+    @staticmethod
+    def _contiguous(segments, first, last):
+        """Pass segments through, checking none from ``first`` to ``last`` went missing"""
+        expected = first
+        for segment in segments:
+            if segment["seq"] != expected:
+                break
+            yield segment
+            expected += 1
+        if expected != last + 1:
+            raise TranscriptChanged(f"Segment {expected} was compacted during the export")
+
+    def length(self, proceeding_id):
+        """Current transcript length, from the newest segment only"""
+        self._migrate_legacy(proceeding_id)
+        last = self._last_segment(proceeding_id)
+        return last["end"] if last else 0
+
+    # Writing
+
+    def _insert(self, proceeding_id, seq, offset, text, **extra):
+        segment = {
+            "proceeding_id": proceeding_id,
+            "seq": seq,
+            "offset": offset,
+            "end": offset + len(text),
+            "text": text,
+            "created_at": datetime.utcnow(),
+            **extra
+        }
+        self.segments.insert_one(segment)
+        return segment
+
+    def append(self, proceeding_id, text, base_length=None):
+        """
+        Append ``text``; writes only the new text
+
+        Args:
+            base_length: Length the client believes is stored. If given and
+                different, TranscriptConflict is raised so the client can
+                resend its full content instead.
+
+        Returns:
+            The new transcript length
+        """
+        return self.patch(proceeding_id, base_length, text, base_length=base_length)
+
+    def patch(self, proceeding_id, offset, text, base_length=None):
+        """Truncate to ``offset`` (None = current length) and append ``text``"""
+        self._migrate_legacy(proceeding_id)
+        for _ in range(3):
+            last = self._last_segment(proceeding_id)
+            current = last["end"] if last else 0
+            if base_length is not None and base_length != current:
+                raise TranscriptConflict(current)
+            start = current if offset is None else min(offset, current)
+            try:
+                segment = self._insert(
+                    proceeding_id, (last["seq"] + 1) if last else 0, start, text
+                )
+            except DuplicateKeyError:
+                continue  # Another writer took this seq - re-read and retry
+            self._index(segment)
+            self._maybe_compact(proceeding_id, segment["seq"])
+            return segment["end"]
+        raise TranscriptConflict(self.length(proceeding_id))
+
+    def save_full(self, proceeding_id, content):
+        """
+        Store ``content`` as the whole transcript, writing only the changed tail
+
+        Returns:
+            The new transcript length
+        """
+        current, _ = self.read(proceeding_id)
+        if current == content:
+            return len(content)
+        if content.startswith(current):
+            shared = len(current)  # The usual case: text was only added
+        else:
+            shared = common_prefix_length(current, content)
+        return self.patch(proceeding_id, shared, content[shared:])
+
+    def delete(self, proceeding_id):
+        """Remove every segment and any legacy GridFS file"""
+        self._migrated.discard(proceeding_id)
+        self.segments.delete_many({"proceeding_id": proceeding_id})
+        if self.search:
+            self.search.delete(proceeding_id)
+        legacy = self.fs.find_one({"filename": legacy_filename(proceeding_id)})
+        if legacy:
+            self.fs.delete(legacy._id)
+
+    # Maintenance
+
+    def _maybe_compact(self, proceeding_id, last_seq):
+        if last_seq and last_seq % COMPACT_AFTER_SEGMENTS == 0:
+            self.compact(proceeding_id)
+
+    def compact(self, proceeding_id):
+        """
+        Replace all segments with one snapshot
+
+        The snapshot is inserted first and older segments are deleted only
+        afterwards, so a crash in between leaves a readable transcript.
+        Returns False if a concurrent write got in first or the text is too
+        large for a single document.
+        """
+        segments = list(self.segments.find(
+            {"proceeding_id": proceeding_id},
+            {"_id": 0, "seq": 1, "offset": 1, "text": 1}
+        ).sort("seq", ASCENDING))
+        if len(segments) < 2:
+            return False
+
+        text = apply_segments(segments)
+        if len(text) > MAX_SNAPSHOT_CHARS:
+            return False
+
+        snapshot_seq = segments[-1]["seq"] + 1
+        try:
+            self._insert(proceeding_id, snapshot_seq, 0, text, snapshot=True)
+        except DuplicateKeyError:
+            return False
+        self.segments.delete_many({"proceeding_id": proceeding_id, "seq": {"$lt": snapshot_seq}})
+        # Same text, so search only needs to know the seq was used
+        self._index({"proceeding_id": proceeding_id, "seq": snapshot_seq}, text_changed=False)
+        return True
+
+    def _migrate_legacy(self, proceeding_id):
+        """Move a pre-segmentation GridFS transcript into a first snapshot segment"""
+        if proceeding_id in self._migrated:
+            return
+        legacy = self.fs.find_one({"filename": legacy_filename(proceeding_id)})
+        if legacy:
+            if self.segments.find_one({"proceeding_id": proceeding_id}, {"_id": 1}) is None:
+                try:
+                    self._index(self._insert(proceeding_id, 0, 0, legacy.read().decode("utf-8"), snapshot=True))
+                except DuplicateKeyError:
+                    pass  # Migrated concurrently
+            # Only removed once the snapshot segment exists
+            self.fs.delete(legacy._id)
+        self._migrated.add(proceeding_id)
+
+    # Search
+
+    def _index(self, segment, text_changed=True):
+        """Bring search up to date with a segment just stored; never fails the save"""
+        if not self.search:
+            return
+        proceeding_id = segment["proceeding_id"]
+        try:
+            if text_changed:
+                applied = self.search.apply(proceeding_id, segment["seq"], segment["offset"], segment["text"])
+            else:
+                applied = self.search.advance(proceeding_id, segment["seq"])
+            if not applied:
+                self.reindex(proceeding_id)
+        except PyMongoError as e:
+            logger.error("search_update_failed proceeding=%s error=%s", proceeding_id, e)
+            try:
+                self.search.forget(proceeding_id)  # Rebuilt on the next save
+            except PyMongoError:
+                pass
+
+    def reindex(self, proceeding_id):
+        """Rebuild a proceeding's search chunks from its segments"""
+        segments = list(self.segments.find(
+            {"proceeding_id": proceeding_id},
+            {"_id": 0, "seq": 1, "offset": 1, "text": 1}
+        ).sort("seq", ASCENDING))
+        if segments:
+            self.search.rebuild(proceeding_id, apply_segments(segments), segments[-1]["seq"])
+        else:
+            self.search.delete(proceeding_id)
+
+    def index_missing(self):
+        """Index every transcript saved before search existed; returns how many"""
+        prefix = legacy_filename("")
+        # Legacy GridFS transcripts are indexed as they migrate (which deletes the file)
+        legacy_ids = [legacy.filename[len(prefix):] for legacy in self.fs.find({"filename": {"$regex": f"^{prefix}"}})]
+        for proceeding_id in legacy_ids:
+            self._migrate_legacy(proceeding_id)
+        indexed = set(self.search.state.distinct("_id"))
+        missing = [pid for pid in self.segments.distinct("proceeding_id") if pid not in indexed]
+        for proceeding_id in missing:
+            self.reindex(proceeding_id)
+        return len(missing)
@@ -6,12 +6,28 @@
 const { spawn } = require('child_process');
 const path = require('path');
 
+// Wire protocol (python/bridge_protocol.py): 1 byte version, 4 byte
+// big-endian payload length, UTF-8 JSON payload
+const PROTOCOL_VERSION = 2;
+const FRAME_HEADER_BYTES = 5;
+
+function encodeFrame(message) {
+    const payload = Buffer.from(JSON.stringify(message), 'utf8');
+    const header = Buffer.alloc(FRAME_HEADER_BYTES);
+    header.writeUInt8(PROTOCOL_VERSION, 0);
+    header.writeUInt32BE(payload.length, 1);
+    return Buffer.concat([header, payload]);
+}
+
 class TranscriptionManager {
     constructor() {
         this.pythonProcess = null;
         this.isRunning = false;
         this.currentSession = null;
         this.transcriptBuffer = '';
+        // Running text and last applied seq per session, rebuilt from deltas
+        this.transcripts = new Map();
+        this.pending = Buffer.alloc(0);
         this.callbacks = {
             onTranscription: null,
             onError: null,
@@ -36,19 +52,16 @@ class TranscriptionManager {
             const pythonScript = path.join(__dirname, '..', 'python', 'transcription_server.py');
             
             // Spawn Python process
-            this.pythonProcess = spawn('python', [pythonScript], {
+            this.pythonProcess = spawn('python', [pythonScript, '--protocol', String(PROTOCOL_VERSION)], {
                 stdio: ['pipe', 'pipe', 'pipe'],
                 cwd: path.join(__dirname, '..')
             });
+            this.pending = Buffer.alloc(0);
+            this.transcripts.clear();
 
-            // Handle stdout (transcription output)
+            // Handle stdout (framed transcription output)
             this.pythonProcess.stdout.on('data', (data) => {
-                const lines = data.toString().split('\n');
-                lines.forEach(line => {
-                    if (line.trim()) {
-                        this._handlePythonOutput(line);
-                    }
-                });
+                this._readFrames(data);
             });
 
             // Handle stderr (Python errors/logs)
@@ -124,8 +137,7 @@ class TranscriptionManager {
         }
 
         try {
-            const commandStr = JSON.stringify(command) + '\n';
-            this.pythonProcess.stdin.write(commandStr);
+            this.pythonProcess.stdin.write(encodeFrame(command));
             return true;
         } catch (error) {
             console.error('Error sending command to Python server:', error);
@@ -133,13 +145,35 @@ class TranscriptionManager {
         }
     }
 
+    /**
+     * Split stdout chunks into frames; a frame may span several chunks
+     */
+    _readFrames(chunk) {
+        let buffer = this.pending.length ? Buffer.concat([this.pending, chunk]) : chunk;
+        while (buffer.length >= FRAME_HEADER_BYTES) {
+            const version = buffer.readUInt8(0);
+            const length = buffer.readUInt32BE(1);
+            if (version !== PROTOCOL_VERSION) {
+                console.error(`Unsupported transcription protocol version ${version}`);
+                buffer = Buffer.alloc(0);
+                break;
+            }
+            if (buffer.length < FRAME_HEADER_BYTES + length) {
+                break;
+            }
+            this._handlePythonOutput(buffer.toString('utf8', FRAME_HEADER_BYTES, FRAME_HEADER_BYTES + length));
+            buffer = buffer.subarray(FRAME_HEADER_BYTES + length);
+        }
+        this.pending = buffer;
+    }
+
     /**
      * Handle output from Python transcription server
      */
-    _handlePythonOutput(line) {
+    _handlePythonOutput(payload) {
         try {
-            const message = JSON.parse(line);
-            const { type, data, timestamp } = message;
+            const message = JSON.parse(payload);
+            const { type, data, session_id } = message;
 
             switch (type) {
                 case 'ready':
@@ -151,10 +185,32 @@ class TranscriptionManager {
                     break;
 
                 case 'transcription':
-                    console.log('Received transcription:', data);
                     this._handleTranscription(data);
                     break;
 
+                case 'transcript':
+                    // Full text after a gap - deltas up to data.seq are in it
+                    this.transcripts.set(session_id, { seq: data.seq, text: data.full_transcript });
+                    this.transcriptBuffer = data.full_transcript;
+                    if (this.callbacks.onTranscription) {
+                        this.callbacks.onTranscription({
+                            type: 'transcript',
+                            full_transcript: data.full_transcript,
+                            seq: data.seq,
+                            session_id: session_id,
+                            timestamp: message.timestamp
+                        });
+                    }
+                    break;
+
+                case 'response':
+                    console.log('Command response:', data);
+                    if (data.command === 'start' && data.success) {
+                        // A (re)started session numbers its events from 1 again
+                        this.transcripts.delete(session_id);
+                    }
+                    break;
+
                 case 'error':
                     console.error('Transcription server error:', data);
                     if (this.callbacks.onError) {
@@ -174,7 +230,7 @@ class TranscriptionManager {
                     console.log('Clear response:', data);
                     break;
 
-                case 'status_response':
+                case 'status':
                     console.log('Status response:', data);
                     if (this.callbacks.onStatus) {
                         this.callbacks.onStatus(data);
@@ -185,49 +241,79 @@ class TranscriptionManager {
                     console.log('Unknown message type:', type, data);
             }
         } catch (error) {
-            console.error('Error parsing Python output:', error, 'Raw line:', line);
+            console.error('Error parsing Python output:', error, 'Raw frame:', payload);
         }
     }
 
     /**
-     * Handle transcription data
+     * Apply a transcription delta or clear to the session's running text
+     *
+     * Deltas: { type: 'transcription', text, seq, from_seq?, session_id, timestamp }.
+     * from_seq is set when the server merged a burst of deltas into one.
+     * Deltas are passed on as they are, so the renderer appends them too;
+     * the whole text only goes out in 'transcript' and 'clear' messages.
      */
     _handleTranscription(data) {
-        console.log('Handling transcription data:', data);
-        
-        // The data from Python server has the structure:
-        // { type: 'transcription', text: '...', full_transcript: '...', session_id: '...', timestamp: '...' }
-        if (data.type === 'transcription') {
-            this.transcriptBuffer = data.full_transcript;
-            if (this.callbacks.onTranscription) {
-                this.callbacks.onTranscription({
-                    type: 'transcription',
-                    text: data.text,
-                    full_transcript: data.full_transcript,
-                    session_id: data.session_id,
-                    timestamp: data.timestamp
-                });
-            }
-        } else if (data.type === 'clear') {
+        const session = this.transcripts.get(data.session_id) || { seq: 0, text: '' };
+
+        if (data.type === 'clear') {
+            this.transcripts.set(data.session_id, { seq: data.seq, text: '' });
             this.transcriptBuffer = '';
             if (this.callbacks.onTranscription) {
                 this.callbacks.onTranscription({
                     type: 'clear',
                     text: '',
                     full_transcript: '',
+                    seq: data.seq,
                     session_id: data.session_id,
                     timestamp: data.timestamp
                 });
             }
-        } else {
+            return;
+        }
+        if (data.type !== 'transcription') {
             console.log('Unknown transcription data type:', data.type);
+            return;
+        }
+
+        if (data.seq <= session.seq) {
+            return; // Already part of a transcript snapshot
+        }
+        if ((data.from_seq || data.seq) > session.seq + 1) {
+            // Missed deltas - ask for the whole text rather than show a gap
+            this._sendCommand({ type: 'transcript', session_id: data.session_id });
+        }
+        session.text = session.text ? `${session.text} ${data.text}` : data.text;
+        session.seq = data.seq;
+        this.transcripts.set(data.session_id, session);
+        this.transcriptBuffer = session.text;
+        if (this.callbacks.onTranscription) {
+            this.callbacks.onTranscription({
+                type: 'transcription',
+                text: data.text,
+                seq: data.seq,
+                from_seq: data.from_seq,
+                session_id: data.session_id,
+                timestamp: data.timestamp
+            });
         }
     }
 
+    /**
+     * Text of a session so far, for a window that missed deltas
+     * @returns {{seq: number, full_transcript: string}}
+     */
+    getTranscript(sessionId) {
+        const session = this.transcripts.get(sessionId) || { seq: 0, text: '' };
+        return { seq: session.seq, full_transcript: session.text };
+    }
+
     /**
      * Start transcription session
+     * @param {string} sessionId
+     * @param {number|string} [device] - Input device from the `devices` command (default: system input)
      */
-    startTranscription(sessionId) {
+    startTranscription(sessionId, device) {
         if (!this.isRunning) {
             console.error('Transcription server not running');
             return false;
@@ -236,34 +322,39 @@ class TranscriptionManager {
         this.currentSession = sessionId;
         return this._sendCommand({
             type: 'start',
-            session_id: sessionId
+            session_id: sessionId,
+            device: device
         });
     }
 
     /**
-     * Stop transcription session
+     * Stop transcription session (the current one by default)
      */
-    stopTranscription() {
+    stopTranscription(sessionId = this.currentSession) {
         if (!this.isRunning) {
             return false;
         }
 
-        this.currentSession = null;
+        if (sessionId === this.currentSession) {
+            this.currentSession = null;
+        }
         return this._sendCommand({
-            type: 'stop'
+            type: 'stop',
+            session_id: sessionId
         });
     }
 
     /**
-     * Clear transcript
+     * Clear transcript (of the current session by default)
      */
-    clearTranscript() {
+    clearTranscript(sessionId = this.currentSession) {
         if (!this.isRunning) {
             return false;
         }
 
         return this._sendCommand({
-            type: 'clear'
+            type: 'clear',
+            session_id: sessionId
         });
     }
 
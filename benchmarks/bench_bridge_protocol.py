@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark: stdout bridge from the stdio transcription server to Electron
+
+Replays a synthetic three-hour hearing (150 words a minute, one update per
+2 s window) through TranscriptionServer and RealtimeTranscriber's output
+path into a pipe read by a separate process, once per protocol version:
+
+    1  JSON lines, full_transcript in every update
+    2  length-prefixed frames, deltas only, bursts coalesced
+
+and reports bytes over the pipe, throughput, and send-to-parse latency
+(p50 / p95 / max), both flat out and paced. The reader rebuilds the
+transcript from what it received and checks it is complete.
+
+The Whisper model is replaced by a no-op loader - only the bridge is measured.
+
+    python benchmarks/bench_bridge_protocol.py --hours 3 --rate 200
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from bridge_protocol import LEGACY_VERSION, PROTOCOL_VERSION, read_frame, read_line  # noqa: E402
+
+WORDS_PER_MINUTE = 150
+WINDOW_SECONDS = 2.0
+VOCABULARY = ("the court will now hear the matter of counsel objection sustained overruled witness "
+              "please state your name for the record your honour exhibit evidence adjourned").split()
+
+
+def synthetic_updates(hours):
+    """Text of each window of an ``hours`` long hearing"""
+    words_per_window = int(WORDS_PER_MINUTE * WINDOW_SECONDS / 60)
+    windows = int(hours * 3600 / WINDOW_SECONDS)
+    return [
+        ' '.join(VOCABULARY[(i * words_per_window + j) % len(VOCABULARY)] for j in range(words_per_window))
+        for i in range(windows)
+    ]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] if ordered else None
+
+
+def read_stream(version):
+    """Reader process: parse stdout of the server, time every message, rebuild the transcript"""
+    stream = sys.stdin.buffer
+    read = read_frame if version == PROTOCOL_VERSION else read_line
+    latencies = []
+    messages = 0
+    text = ''
+    last_seq = 0
+    gaps = 0
+    while True:
+        message = read(stream)
+        if message is None:
+            break
+        received = time.time()
+        if message['type'] != 'transcription':
+            continue
+        messages += 1
+        latencies.append((received - message['timestamp']) * 1000)
+        data = message['data']
+        if version == PROTOCOL_VERSION:
+            if data.get('from_seq', data['seq']) != last_seq + 1:
+                gaps += 1
+            last_seq = data['seq']
+            text = f"{text} {data['text']}" if text else data['text']
+        else:
+            text = data['full_transcript']
+    json.dump({
+        'messages': messages,
+        'words': len(text.split()),
+        'seq_gaps': gaps,
+        'p50_latency_ms': round(percentile(latencies, 50), 3),
+        'p95_latency_ms': round(percentile(latencies, 95), 3),
+        'max_latency_ms': round(max(latencies), 3),
+    }, sys.stdout)
+
+
+def run(version, updates, rate):
+    """Send ``updates`` through a TranscriptionServer into a reader process, ``rate`` per second (0 = flat out)"""
+    from transcription_server import TranscriptionServer
+
+    reader = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--read', str(version)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    server = TranscriptionServer(protocol=version, output=reader.stdin)
+    transcriber = server._create_transcriber('bench', None)
+    transcriber.current_session = 'bench'
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    for i, text in enumerate(updates):
+        if rate:
+            delay = started + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        transcriber._handle_transcription(text)
+    server.writer.close(timeout=None)
+    sender_cpu = time.process_time() - cpu_started
+    reader.stdin.close()
+    report = json.loads(reader.stdout.read())
+    reader.wait()
+    elapsed = time.perf_counter() - started
+
+    stats = server.writer.stats
+    return dict(
+        protocol=version,
+        rate=rate or 'max',
+        updates=len(updates),
+        frames=stats['frames'],
+        writes=stats['writes'],
+        pipe_mb=round(stats['bytes'] / 1e6, 2),
+        seconds=round(elapsed, 3),
+        throughput_mb_s=round(stats['bytes'] / 1e6 / elapsed, 1),
+        updates_per_s=round(len(updates) / elapsed),
+        sender_cpu_seconds=round(sender_cpu, 3),
+        **report,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hours', type=float, default=3.0)
+    parser.add_argument('--rate', type=float, default=200,
+                        help='Updates per second for the paced run (a real hearing is 0.5)')
+    parser.add_argument('--protocols', nargs='+', type=int, default=[LEGACY_VERSION, PROTOCOL_VERSION])
+    parser.add_argument('--output', help='Also write the results here as JSON')
+    parser.add_argument('--read', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.read:
+        read_stream(args.read)
+        return
+
+    import model_registry
+    model_registry.registry = model_registry.ModelRegistry(loader=lambda *a: object(), warmup=False)
+
+    updates = synthetic_updates(args.hours)
+    expected_words = sum(len(text.split()) for text in updates)
+    results = []
+    for version in args.protocols:
+        for rate in (0, args.rate):
+            result = run(version, updates, rate)
+            result['complete'] = result['words'] == expected_words
+            results.append(result)
+            print(f"protocol {version} rate {result['rate']}: {result['pipe_mb']} MB in {result['seconds']} s "
+                  f"({result['throughput_mb_s']} MB/s, {result['updates_per_s']} updates/s, "
+                  f"{result['frames']} frames)\n"
+                  f"  latency p50 {result['p50_latency_ms']} ms   p95 {result['p95_latency_ms']} ms   "
+                  f"max {result['max_latency_ms']} ms   sender CPU {result['sender_cpu_seconds']} s   "
+                  f"complete {result['complete']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chunk-ready latency and allocations of the real-time chunker
+
+Compares the old _process_audio_chunks loop (np.concatenate per 0.1s block,
+another concatenate per chunk, time.sleep(0.1) polling) with the ring
+buffer + blocking queue consumer now used by RealtimeTranscriber.
+
+- Latency: a producer thread feeds 0.1s blocks at real-time pace; latency is
+  the time from the block that completes a chunk being queued to the chunk
+  window being ready for the model.
+- Allocations: one minute of audio is pushed through each chunker offline
+  and the transient bytes it allocates are measured with tracemalloc.
+"""
+
+import argparse
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from audio_ring_buffer import AudioRingBuffer
+
+SAMPLE_RATE = 16000
+BLOCK = int(SAMPLE_RATE * 0.1)
+
+
+class LegacyChunker:
+    """The pre-ring-buffer logic, kept here only for comparison"""
+
+    def __init__(self, chunk_samples, overlap_samples):
+        self.chunk_samples = chunk_samples
+        self.overlap_samples = overlap_samples
+        self.audio_buffer = np.array([], dtype=np.float32)
+        self.last_overlap = np.array([], dtype=np.float32)
+
+    def feed(self, block, on_chunk):
+        self.audio_buffer = np.concatenate([self.audio_buffer, block])
+        if len(self.audio_buffer) >= self.chunk_samples:
+            current_chunk = self.audio_buffer[:self.chunk_samples]
+            self.audio_buffer = self.audio_buffer[self.chunk_samples:]
+            if len(self.last_overlap) > 0:
+                process_chunk = np.concatenate([self.last_overlap, current_chunk])
+            else:
+                process_chunk = current_chunk
+            self.last_overlap = current_chunk[-self.overlap_samples:].copy()
+            on_chunk(process_chunk)
+
+
+class RingChunker:
+    """Same logic as RealtimeTranscriber._feed_block"""
+
+    def __init__(self, chunk_samples, overlap_samples):
+        self.chunk_samples = chunk_samples
+        self.ring = AudioRingBuffer(
+            capacity=overlap_samples + 2 * chunk_samples + BLOCK,
+            history=overlap_samples
+        )
+
+    def feed(self, block, on_chunk):
+        ring = self.ring
+        while len(block):
+            n = min(len(block), ring.free_space)
+            ring.write(block[:n])
+            block = block[n:]
+            while ring.available >= self.chunk_samples:
+                window, _ = ring.window(self.chunk_samples)
+                on_chunk(window)
+                ring.advance(self.chunk_samples)
+
+
+def measure_latency(chunker, seconds, polling):
+    """Real-time producer/consumer run; returns chunk-ready latencies in ms"""
+    audio_queue = queue.Queue()
+    latencies = []
+    running = True
+    chunk_blocks = chunker.chunk_samples // BLOCK
+
+    def producer():
+        # The sound card clock is independent of the consumer's, so shift the
+        # phase after every chunk instead of running in lockstep with a poller
+        rng = np.random.default_rng(1)
+        block = np.zeros(BLOCK, dtype=np.float32)
+        for i in range(int(seconds / 0.1)):
+            audio_queue.put((i, time.perf_counter(), block))
+            time.sleep(0.1)
+            if (i + 1) % chunk_blocks == 0:
+                time.sleep(rng.uniform(0, 0.1))
+
+    def consumer():
+        def feed(item):
+            index, queued_at, block = item
+            completes_chunk = (index + 1) % chunk_blocks == 0
+            chunker.feed(block, lambda window: latencies.append(
+                (time.perf_counter() - queued_at) * 1000) if completes_chunk else None)
+
+        while running:
+            if polling:
+                while not audio_queue.empty():
+                    feed(audio_queue.get_nowait())
+                time.sleep(0.1)
+            else:
+                try:
+                    feed(audio_queue.get(timeout=0.5))
+                except queue.Empty:
+                    continue
+
+    producer_thread = threading.Thread(target=producer)
+    consumer_thread = threading.Thread(target=consumer)
+    consumer_thread.start()
+    producer_thread.start()
+    producer_thread.join()
+    time.sleep(0.3)
+    running = False
+    consumer_thread.join()
+    return latencies
+
+
+def measure_allocations(chunker, seconds):
+    """Transient bytes allocated per minute of audio (tracemalloc peak deltas)"""
+    rng = np.random.default_rng(0)
+    blocks = [rng.standard_normal(BLOCK).astype(np.float32) for _ in range(int(seconds / 0.1))]
+
+    tracemalloc.start()
+    allocated = 0
+    for block in blocks:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        chunker.feed(block, lambda window: None)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current
+    tracemalloc.stop()
+    return allocated * 60 / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--chunk-duration', type=float, default=2.0)
+    parser.add_argument('--overlap-duration', type=float, default=0.5)
+    parser.add_argument('--seconds', type=float, default=30.0,
+                        help='Real-time audio to stream for the latency run')
+    args = parser.parse_args()
+
+    chunk = int(SAMPLE_RATE * args.chunk_duration)
+    overlap = int(SAMPLE_RATE * args.overlap_duration)
+
+    print(f"Chunk {args.chunk_duration}s, overlap {args.overlap_duration}s, "
+          f"{args.seconds}s real-time stream")
+    for name, cls, polling in (('legacy (concat + sleep poll)', LegacyChunker, True),
+                               ('ring buffer + blocking get', RingChunker, False)):
+        latencies = measure_latency(cls(chunk, overlap), args.seconds, polling)
+        allocated = measure_allocations(cls(chunk, overlap), 60.0)
+        print(f"  {name:<30} chunk-ready latency median {statistics.median(latencies):7.2f} ms"
+              f"  max {max(latencies):7.2f} ms   allocated {allocated / 1e6:8.2f} MB/min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-chunk overhead of the WAV temp-file path vs passing
+the float32 array straight to Whisper
+
+Only the work done before inference is measured - the model itself is
+not loaded. The legacy path is what RealtimeTranscriber._transcribe_chunk
+used to do every chunk: float32 -> int16, write a WAV with `wave`, let
+faster-whisper decode it back from disk, then delete it.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import wave
+
+import numpy as np
+from faster_whisper.audio import decode_audio
+
+SAMPLE_RATE = 16000
+
+
+def legacy_wav_path(audio_chunk):
+    """Old path: int16 round trip through a temporary WAV file"""
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+        temp_filename = temp_file.name
+    try:
+        audio_int16 = (audio_chunk * 32767).astype(np.int16)
+        with wave.open(temp_filename, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(audio_int16.tobytes())
+        # WhisperModel.transcribe(str) decodes the file the same way
+        return decode_audio(temp_filename, sampling_rate=SAMPLE_RATE)
+    finally:
+        os.unlink(temp_filename)
+
+
+def direct_array_path(audio_chunk):
+    """New path: same as realtime_transcriber.to_model_input"""
+    return np.ascontiguousarray(audio_chunk, dtype=np.float32)
+
+
+def time_path(fn, chunk, iterations):
+    """Return per-call timings in milliseconds"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(chunk)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--chunk-duration', type=float, default=2.0)
+    parser.add_argument('--overlap-duration', type=float, default=0.5)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    samples = int(SAMPLE_RATE * (args.chunk_duration + args.overlap_duration))
+    chunk = (rng.standard_normal(samples) * 0.1).astype(np.float32)
+
+    # Warm up PyAV and the filesystem cache
+    legacy_wav_path(chunk)
+    direct_array_path(chunk)
+
+    legacy = time_path(legacy_wav_path, chunk, args.iterations)
+    direct = time_path(direct_array_path, chunk, args.iterations)
+
+    print(f"Chunk: {args.chunk_duration}s + {args.overlap_duration}s overlap "
+          f"({samples} samples), {args.iterations} iterations")
+    for name, timings in (('wav temp file', legacy), ('direct array', direct)):
+        print(f"  {name:<14} median {statistics.median(timings):8.3f} ms   "
+              f"p95 {np.percentile(timings, 95):8.3f} ms")
+
+    saved = statistics.median(legacy) - statistics.median(direct)
+    chunks_per_hour = 3600 / args.chunk_duration
+    print(f"Saved per chunk: {saved:.3f} ms "
+          f"(~{saved * chunks_per_hour / 1000:.1f} s per hour of audio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: face login latency and encoding agreement, full-frame vs downscaled pipeline
+
+The legacy path is what app.process_image_data used to do: detect on the
+full-resolution image, then encode on the full image. The new path is
+face_pipeline.single_face_encoding. For each fixture image both encodings
+are compared; a distance far below the 0.6 match threshold means login
+decisions are unchanged.
+
+    python benchmarks/bench_face_pipeline.py fixtures/*.jpg
+"""
+
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+
+import face_recognition
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import face_pipeline  # noqa: E402
+
+
+def legacy_encoding(image_data):
+    """Old path: full-resolution detection and encoding"""
+    image = face_pipeline.decode_image(image_data)
+    locations = face_recognition.face_locations(image)
+    if len(locations) != 1:
+        return None
+    return face_recognition.face_encodings(image, locations)[0]
+
+
+def time_path(fn, image_data, iterations):
+    """Return (last result, per-call timings in milliseconds)"""
+    timings = []
+    result = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            result = fn(image_data)
+        except face_pipeline.FaceImageError:
+            result = None
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('images', nargs='+', help='Fixture images with one face each')
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"model={face_pipeline.DETECTION_MODEL} upsample={face_pipeline.UPSAMPLE} "
+          f"detection max side={face_pipeline.DETECTION_MAX_SIDE}px")
+
+    legacy_all, fast_all = [], []
+    for path in args.images:
+        with open(path, 'rb') as f:
+            image_data = base64.b64encode(f.read()).decode('ascii')
+
+        legacy, legacy_times = time_path(legacy_encoding, image_data, args.iterations)
+        fast, fast_times = time_path(face_pipeline.single_face_encoding, image_data, args.iterations)
+        legacy_all += legacy_times
+        fast_all += fast_times
+
+        if legacy is None or fast is None:
+            agreement = f"face found: legacy={legacy is not None} fast={fast is not None}"
+        else:
+            distance = face_recognition.face_distance([legacy], fast)[0]
+            agreement = f"encoding distance {distance:.4f}"
+        print(f"  {os.path.basename(path):<24} legacy {statistics.median(legacy_times):8.1f} ms   "
+              f"fast {statistics.median(fast_times):8.1f} ms   {agreement}")
+
+    legacy_median = statistics.median(legacy_all)
+    fast_median = statistics.median(fast_all)
+    print(f"Median over all fixtures: legacy {legacy_median:.1f} ms, fast {fast_median:.1f} ms "
+          f"({legacy_median / fast_median:.1f}x faster), "
+          f"p95 {np.percentile(legacy_all, 95):.1f} -> {np.percentile(fast_all, 95):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: MongoDB round trips per proceeding endpoint
+
+Seeds a throwaway database with judges, clerks and proceedings, then calls
+the proceeding endpoints through Flask's test client while a pymongo
+CommandListener counts the commands each request sends.
+
+Point it at a local mongod (never the production cluster):
+    python benchmarks/bench_mongo_round_trips.py --uri mongodb://localhost:27017
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to the server"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def seed(db, clerk, proceedings, judges):
+    judge_ids = [f"JUDGE_BENCH{i:03d}" for i in range(judges)]
+    db.judges.insert_many([{"matricule": m, "name": f"Judge {m}"} for m in judge_ids])
+    db.clerks.insert_one({"matricule": clerk, "name": "Bench Clerk"})
+    docs = [{
+        "proceeding_id": str(uuid.uuid4()),
+        "case_number": f"CASE-{i}",
+        "case_type": "civil",
+        "plaintiff": {"appelation": "Mr", "name": "Plaintiff"},
+        "defendant": {"appelation": "Mr", "name": "Defendant"},
+        "judge_matricule": judge_ids[i % judges],
+        "charges": "none",
+        "clerk_matricule": clerk,
+        "schedule_datetime": "2025-01-01T09:00:00",
+        "status": "scheduled"
+    } for i in range(proceedings)]
+    db.proceedings.insert_many(docs)
+    return docs[0]["proceeding_id"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='courtroom_bench')
+    parser.add_argument('--proceedings', type=int, default=200)
+    parser.add_argument('--judges', type=int, default=20)
+    args = parser.parse_args()
+
+    # Must be in place before app.py creates its client
+    os.environ["MONGO_URI"] = args.uri
+    os.environ["MONGO_DB_NAME"] = args.db
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    import app as court_app
+
+    db = court_app.db
+    db.client.drop_database(args.db)
+    clerk = "CLERK_BENCH"
+    proceeding_id = seed(db, clerk, args.proceedings, args.judges)
+    client = court_app.app.test_client()
+
+    endpoints = [
+        ("GET /api/proceedings", f"/api/proceedings?clerk_matricule={clerk}"),
+        ("GET /api/proceeding/<id>", f"/api/proceeding/{proceeding_id}"),
+        ("GET /api/proceedings/<id>", f"/api/proceedings/{proceeding_id}"),
+    ]
+
+    print(f"{args.proceedings} proceedings, {args.judges} judges, db={args.db}")
+    try:
+        for label in ("cold cache", "warm cache"):
+            print(f"  {label}:")
+            for name, url in endpoints:
+                counter.count = 0
+                start = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"    {name:<26} status {response.status_code}  "
+                      f"round trips {counter.count:4d}  {elapsed:8.2f} ms")
+    finally:
+        db.client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SSE fan-out to many viewers of one transcription session
+
+Opens N EventSource-style connections to the async SSE server, publishes
+updates through SimpleTranscriptionManager, and reports publish-to-receive
+latency, whether every viewer got every update, and how many threads the
+process needed.
+
+The Whisper model is replaced by a no-op loader - only streaming is measured.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+import model_registry  # noqa: E402
+
+model_registry.registry = model_registry.ModelRegistry(loader=lambda *args: object(), warmup=False)
+
+from sse_server import AsyncSSEServer  # noqa: E402
+from simple_transcription import SimpleTranscriptionManager  # noqa: E402
+
+
+async def viewer(port, session_id, expected, latencies, ready):
+    """Read events until ``expected`` transcription updates arrived"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"GET /api/transcription/stream/{session_id} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+    await writer.drain()
+    received = 0
+    while received < expected:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.startswith(b"data: "):
+            continue
+        update = json.loads(line[6:])
+        if update['type'] == 'connected':
+            ready.release()
+        elif update['type'] == 'transcription':
+            latencies.append((time.perf_counter() - float(update['text'])) * 1000)
+            received += 1
+    writer.close()
+    return received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--viewers', type=int, default=300)
+    parser.add_argument('--updates', type=int, default=50)
+    parser.add_argument('--interval-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    # No inference here - don't start worker processes
+    manager = SimpleTranscriptionManager(workers=0)
+    server = AsyncSSEServer(manager, port=0).start()
+    session_id = manager.start_session('bench')
+    threads_before = threading.active_count()
+
+    latencies = []
+    ready = threading.Semaphore(0)
+    results = []
+
+    def run_viewers():
+        async def run():
+            results.extend(await asyncio.gather(*[
+                viewer(server.port, session_id, args.updates, latencies, ready)
+                for _ in range(args.viewers)
+            ]))
+        asyncio.run(run())
+
+    client_thread = threading.Thread(target=run_viewers)
+    client_thread.start()
+    for _ in range(args.viewers):
+        ready.acquire()
+
+    peak_threads = threading.active_count()
+    for _ in range(args.updates):
+        # The send time travels as the text so each viewer can time delivery
+        manager._append_transcript(session_id, repr(time.perf_counter()))
+        time.sleep(args.interval_ms / 1000)
+    client_thread.join()
+
+    complete = sum(1 for received in results if received == args.updates)
+    print(f"{args.viewers} viewers x {args.updates} updates")
+    print(f"  complete streams  {complete}/{args.viewers}")
+    print(f"  latency           median {statistics.median(latencies):.2f} ms   "
+          f"p95 {sorted(latencies)[int(len(latencies) * 0.95)]:.2f} ms")
+    print(f"  threads           {threads_before} before viewers, {peak_threads} with "
+          f"{args.viewers} connected (1 is the benchmark's own client loop)")
+    print(f"  hub               {manager.hub.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
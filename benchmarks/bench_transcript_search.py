@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-text transcript search
+
+Seeds a throwaway database with proceedings whose transcripts are saved
+the way autosave does (many small appends, the odd edit), so the search
+chunks are built incrementally. It then times:
+
+- each save's search update
+- ranked searches across every transcript
+- the same lookups done the old way, assembling each transcript and scanning it
+
+Point it at a local mongod (never the production cluster):
+    python benchmarks/bench_transcript_search.py --uri mongodb://localhost:27017 --proceedings 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from gridfs import GridFS  # noqa: E402
+
+from db_indexes import ensure_indexes  # noqa: E402
+from mongo_connection import create_client  # noqa: E402
+from transcript_search import TranscriptSearch  # noqa: E402
+from transcript_store import TranscriptStore  # noqa: E402
+
+VOCABULARY = ("the court will now hear the matter of counsel objection sustained overruled witness "
+              "please state your name for the record your honour exhibit evidence adjourned recess "
+              "cross examination defendant plaintiff contract payment delivery signature").split()
+# Rare words, so queries have a handful of hits rather than all of them
+NAMES = [f"mbarga{i}" for i in range(500)] + [f"exhibit{i}" for i in range(500)]
+QUERIES = ["mbarga17", "exhibit42 signature", '"cross examination" mbarga3', "witness -objection mbarga250"]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def seed(db, store, proceedings, saves, rng):
+    """Save transcripts through the store; returns per-save search update times (ms)"""
+    update_ms = []
+    ids = [f"bench-{i}" for i in range(proceedings)]
+    db.proceedings.insert_many([{"proceeding_id": pid, "case_number": f"CASE-{i}"} for i, pid in enumerate(ids)])
+    search_apply = store.search.apply
+
+    def timed_apply(*args):
+        started = time.perf_counter()
+        try:
+            return search_apply(*args)
+        finally:
+            update_ms.append((time.perf_counter() - started) * 1000)
+
+    store.search.apply = timed_apply
+    for pid in ids:
+        for _ in range(saves):
+            words = rng.choices(VOCABULARY, k=rng.randint(8, 30))
+            if rng.random() < 0.1:
+                words.insert(rng.randrange(len(words)), rng.choice(NAMES))
+            length = store.length(pid)
+            if length and rng.random() < 0.03:
+                store.patch(pid, max(0, length - 40), " " + " ".join(words))
+            else:
+                store.append(pid, " " + " ".join(words))
+    store.search.apply = search_apply
+    return ids, update_ms
+
+
+def scan_search(store, ids, term):
+    """The old way: assemble every transcript and look for the term"""
+    hits = []
+    for pid in ids:
+        text, _ = store.read(pid)
+        position = text.find(term)
+        if position >= 0:
+            hits.append((pid, position))
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='courtroom_search_bench')
+    parser.add_argument('--proceedings', type=int, default=2000)
+    parser.add_argument('--saves', type=int, default=60, help='Autosaves per transcript')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs of each query')
+    args = parser.parse_args()
+
+    client = create_client(args.uri)
+    client.drop_database(args.db)
+    db = client[args.db]
+    try:
+        for error in ensure_indexes(db):
+            print(f"Index error: {error}")
+        search = TranscriptSearch(db)
+        store = TranscriptStore(db, GridFS(db), search=search)
+
+        started = time.perf_counter()
+        ids, update_ms = seed(db, store, args.proceedings, args.saves, random.Random(1))
+        chunks = db.transcript_search.estimated_document_count()
+        print(f"{args.proceedings} proceedings x {args.saves} saves seeded in {time.perf_counter() - started:.1f}s "
+              f"({chunks} search chunks)")
+        print(f"  search update per save   p50 {percentile(update_ms, 50):.2f} ms   "
+              f"p95 {percentile(update_ms, 95):.2f} ms")
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                hits = search.search(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"  search {query!r:<32} {len(hits):3d} hits   p50 {percentile(timings, 50):7.2f} ms   "
+                  f"p95 {percentile(timings, 95):7.2f} ms")
+
+        started = time.perf_counter()
+        hits = scan_search(store, ids, QUERIES[0])
+        print(f"  scan every transcript for {QUERIES[0]!r}: {len(hits)} hits in "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms")
+    finally:
+        client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
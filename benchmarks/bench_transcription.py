@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Benchmark: transcription speed of both engines across model and chunking settings
+
+Streams WAV/WebM fixtures through RealtimeTranscriber (the Electron engine,
+fed block by block instead of from a microphone) and through
+SimpleTranscriptionManager (the upload path, one chunk per upload) for every
+combination of the swept settings, and writes a JSON report:
+
+    rtf                    processing time / audio time (below 1 keeps up live)
+    first_token_latency_s  from stream start until the first text is out (worst fixture)
+    eou_latency_s          median time from the end of an utterance to its text
+    calls_per_minute       model calls per minute of audio (silence skipped by VAD is free)
+    chunk_latency_ms       p50 / p95 processing time per chunk
+    peak_rss_mb            peak resident memory, model included
+
+Latencies are simulated live: chunk k is ready once its audio has been
+captured, and starts when both it is ready and the previous chunk is done.
+Each fixture is followed by TRAILING_SILENCE_SECONDS of silence, as a live
+stream would be, so its last utterance can be closed. Utterance ends are
+found in the fixture with the VAD's energy thresholds. Every configuration
+runs in its own process, so peak RSS is per model.
+
+    python benchmarks/bench_transcription.py --models tiny small --beam-sizes 1 5
+    python benchmarks/bench_transcription.py --engines realtime --segmentations pause fixed
+    python benchmarks/bench_transcription.py --baseline last.json   # exit 1 on regression
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, os.path.join(ROOT, 'python'))
+
+SAMPLE_RATE = 16000
+BLOCK_SECONDS = 0.1  # RealtimeTranscriber's callback block
+TRAILING_SILENCE_SECONDS = 2.0
+# A pause at least this long ends an utterance
+UTTERANCE_PAUSE_SECONDS = 0.5
+DEFAULT_FIXTURES = ['temp.wav', 'temp_chunk_*.wav']
+# Metrics compared against --baseline; all are "lower is better"
+REGRESSION_METRICS = ('rtf', 'first_token_latency_s', 'eou_latency_s', 'p95_chunk_latency_ms', 'peak_rss_mb')
+CONFIG_KEYS = ('engine', 'model', 'compute_type', 'beam_size', 'segmentation', 'workers', 'chunk_duration',
+               'overlap_duration')
+
+
+def load_fixtures(patterns):
+    """[(name, float32 samples)] - containers are decoded the same way uploads are"""
+    from faster_whisper.audio import decode_audio
+
+    paths = sorted({path for pattern in patterns for path in glob.glob(os.path.join(ROOT, pattern))
+                    or glob.glob(pattern)})
+    if not paths:
+        raise SystemExit(f"No fixtures match {patterns}")
+    return [(os.path.basename(path), decode_audio(path, sampling_rate=SAMPLE_RATE)) for path in paths]
+
+
+def with_trailing_silence(audio):
+    import numpy as np
+
+    return np.concatenate([audio, np.zeros(int(SAMPLE_RATE * TRAILING_SILENCE_SECONDS), dtype=np.float32)])
+
+
+def utterance_ends(audio):
+    """Seconds at which speech is followed by a pause (or the end of the audio)"""
+    import numpy as np
+    from voice_activity import FRAME_MS, MARGIN_DB, MIN_LEVEL_DB, NOISE_PERCENTILE, frame_levels_db
+
+    frame = int(SAMPLE_RATE * FRAME_MS / 1000)
+    levels = frame_levels_db(audio, frame)
+    if not len(levels):
+        return []
+    threshold = max(MIN_LEVEL_DB, float(np.percentile(levels, NOISE_PERCENTILE)) + MARGIN_DB)
+    speech = levels > threshold
+    pause_frames = int(UTTERANCE_PAUSE_SECONDS * 1000 / FRAME_MS)
+
+    ends = []
+    last_speech = None
+    for i, is_speech in enumerate(speech):
+        if is_speech:
+            last_speech = i
+        elif last_speech is not None and i - last_speech >= pause_frames:
+            ends.append((last_speech + 1) * frame / SAMPLE_RATE)
+            last_speech = None
+    if last_speech is not None:
+        ends.append((last_speech + 1) * frame / SAMPLE_RATE)
+    return ends
+
+
+def simulate_live(chunks):
+    """
+    Time each chunk is done, given per-chunk (ready_s, latency_s, produced_text)
+
+    Chunks are processed in order, each once its audio is captured and the
+    previous one is finished.
+    """
+    done = 0.0
+    finished = []
+    for ready, latency, _ in chunks:
+        done = max(done, ready) + latency
+        finished.append(done)
+    return finished
+
+
+def first_token_latency(chunks, finished):
+    """Seconds from stream start until the first text, or None if nothing was produced"""
+    return next((done for (_, _, produced), done in zip(chunks, finished) if produced), None)
+
+
+def eou_latencies(chunks, finished, ends):
+    """For each utterance end: done time of the first chunk whose audio covers it, minus the end"""
+    latencies = []
+    for end in ends:
+        done = next((done for (ready, _, _), done in zip(chunks, finished) if ready >= end), None)
+        if done is not None:
+            latencies.append(done - end)
+    return latencies
+
+
+def run_realtime(config, fixtures):
+    """Per-chunk timings of RealtimeTranscriber for every fixture"""
+    from realtime_transcriber import RealtimeTranscriber
+
+    transcriber = RealtimeTranscriber(
+        chunk_duration=config['chunk_duration'],
+        overlap_duration=config['overlap_duration'],
+        compute_type=config['compute_type'],
+        model_size=config['model'],
+        beam_size=config['beam_size'],
+        segmentation=config['segmentation'],
+    )
+    transcriber.model_handle.wait()
+
+    texts = []
+    transcriber.set_output_callback(lambda update: texts.append(update.get('text', '')))
+    transcribe_chunk = transcriber._transcribe_chunk
+    streams = []
+
+    for _, audio in fixtures:
+        chunks = []
+        fed = [0]
+
+        def timed(window, overlap_samples=0, **kwargs):
+            before = len(texts)
+            start = time.perf_counter()
+            transcribe_chunk(window, overlap_samples, **kwargs)
+            chunks.append((fed[0] / SAMPLE_RATE, time.perf_counter() - start, len(texts) > before))
+
+        transcriber._transcribe_chunk = timed
+        # Same state start_session sets up, without opening the microphone
+        transcriber.ring_buffer.reset()
+        transcriber.vad.reset()
+        if transcriber.segmenter:
+            transcriber.segmenter.reset()
+        transcriber.is_recording = True
+        block = int(SAMPLE_RATE * BLOCK_SECONDS)
+        for offset in range(0, len(audio), block):
+            fed[0] = min(offset + block, len(audio))
+            transcriber._feed_block(audio[offset:offset + block])
+        transcriber.is_recording = False
+        streams.append(chunks)
+
+    calls = transcriber.vad.stats.get_stats()['inference_calls']
+    return streams, transcriber.model_handle, ' '.join(texts), calls
+
+
+def run_upload(config, fixtures):
+    """Per-chunk timings of SimpleTranscriptionManager.process_audio for every fixture"""
+    from simple_transcription import SimpleTranscriptionManager
+
+    manager = SimpleTranscriptionManager(
+        model_size=config['model'],
+        compute_type=config['compute_type'],
+        beam_size=config['beam_size'],
+        workers=config['workers'],
+    )
+    manager.model_handle.wait()
+
+    chunk = int(SAMPLE_RATE * config['chunk_duration'])
+    texts = []
+    streams = []
+    for _, audio in fixtures:
+        session_id = manager.start_session('benchmark')
+        chunks = []
+        for offset in range(0, len(audio), chunk):
+            start = time.perf_counter()
+            text = manager.process_audio(session_id, audio[offset:offset + chunk])
+            chunks.append((min(offset + chunk, len(audio)) / SAMPLE_RATE, time.perf_counter() - start, bool(text)))
+            if text:
+                texts.append(text)
+        manager.stop_session(session_id)
+        streams.append(chunks)
+
+    calls = manager.vad_stats.get_stats()['inference_calls']
+    if manager.pool:
+        # Reaped workers count towards RUSAGE_CHILDREN
+        manager.pool.close()
+    return streams, manager.model_handle, ' '.join(texts), calls
+
+
+ENGINES = {'realtime': run_realtime, 'upload': run_upload}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_config(config, fixture_patterns):
+    """Benchmark one configuration in this process"""
+    fixtures = [(name, with_trailing_silence(audio)) for name, audio in load_fixtures(fixture_patterns)]
+    streams, handle, text, calls = ENGINES[config['engine']](config, fixtures)
+
+    audio_seconds = sum(len(audio) for _, audio in fixtures) / SAMPLE_RATE
+    latencies = [latency for chunks in streams for _, latency, _ in chunks]
+    first_tokens, eou = [], []
+    for (_, audio), chunks in zip(fixtures, streams):
+        finished = simulate_live(chunks)
+        first_token = first_token_latency(chunks, finished)
+        if first_token is not None:
+            first_tokens.append(first_token)
+        eou += eou_latencies(chunks, finished, utterance_ends(audio))
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if config.get('workers'):
+        # Each worker holds its own model; ru_maxrss is the largest of them
+        peak_rss += config['workers'] * resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+    return dict(
+        config,
+        audio_seconds=round(audio_seconds, 2),
+        chunks=len(latencies),
+        processing_seconds=round(sum(latencies), 3),
+        rtf=round(sum(latencies) / audio_seconds, 4),
+        first_token_latency_s=round(max(first_tokens), 3) if first_tokens else None,
+        eou_latency_s=round(percentile(eou, 50), 3) if eou else None,
+        utterances=len(eou),
+        inference_calls=calls,
+        calls_per_minute=round(calls / (audio_seconds / 60), 1),
+        p50_chunk_latency_ms=round(percentile(latencies, 50) * 1000, 1),
+        p95_chunk_latency_ms=round(percentile(latencies, 95) * 1000, 1),
+        peak_rss_mb=round(peak_rss_mb, 1),
+        model_load_seconds=handle.load_seconds,
+        text=text[:200],
+    )
+
+
+def run_isolated(config, fixture_patterns):
+    """Run one configuration in a fresh interpreter (own model, own peak RSS)"""
+    result = subprocess.run(
+        [sys.executable, __file__, '--single', json.dumps(config), '--fixtures', *fixture_patterns],
+        capture_output=True, text=True
+    )
+    try:
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        error = (result.stderr.strip().splitlines() or ['no output'])[-1]
+        return dict(config, error=error)
+
+
+def compare(results, baseline_path, tolerance):
+    """Regressions against a previous report: [(config key, metric, old, new)]"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(result):
+        return tuple(result.get(name) for name in CONFIG_KEYS)
+
+    previous = {key(result): result for result in baseline['results'] if 'error' not in result}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if not old or 'error' in result:
+            continue
+        for metric in REGRESSION_METRICS:
+            if old.get(metric) and result.get(metric) and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append((key(result), metric, old[metric], result[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--fixtures', nargs='+', default=DEFAULT_FIXTURES,
+                        help='Audio files or globs (relative to the repo root or cwd)')
+    parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument('--models', nargs='+', default=['small'])
+    parser.add_argument('--compute-types', nargs='+', default=['int8'])
+    parser.add_argument('--beam-sizes', nargs='+', type=int, default=[1])
+    parser.add_argument('--chunk-durations', nargs='+', type=float, default=[2.0])
+    parser.add_argument('--overlap-durations', nargs='+', type=float, default=[0.2])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1],
+                        help='Upload engine inference processes (0 = in the API process)')
+    parser.add_argument('--segmentations', nargs='+', choices=['pause', 'fixed'], default=['pause', 'fixed'],
+                        help='Real-time engine windowing (chunk durations apply to fixed)')
+    parser.add_argument('--output', default='bench_transcription.json')
+    parser.add_argument('--baseline', help='Previous report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed relative slowdown before a metric counts as a regression')
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        # Child process: one configuration, result as the last stdout line
+        print(json.dumps(run_config(json.loads(args.single), args.fixtures)))
+        return
+
+    configs = []
+    for engine, model, compute_type, beam_size, chunk_duration in itertools.product(
+            args.engines, args.models, args.compute_types, args.beam_sizes, args.chunk_durations):
+        # Uploads are independent chunks - overlap and segmentation only apply to the real-time engine,
+        # worker processes only to uploads
+        overlaps = args.overlap_durations if engine == 'realtime' else [0.0]
+        segmentations = args.segmentations if engine == 'realtime' else ['upload']
+        workers = args.workers if engine == 'upload' else [0]
+        for overlap_duration, segmentation, worker_count in itertools.product(overlaps, segmentations, workers):
+            config = dict(engine=engine, model=model, compute_type=compute_type, beam_size=beam_size,
+                          segmentation=segmentation, workers=worker_count, chunk_duration=chunk_duration,
+                          overlap_duration=overlap_duration)
+            if config not in configs:  # pause windows don't depend on chunk_duration
+                configs.append(config)
+
+    results = []
+    for config in configs:
+        result = run_isolated(config, args.fixtures)
+        results.append(result)
+        label = ' '.join(f"{k}={v}" for k, v in config.items())
+        if 'error' in result:
+            print(f"{label}\n  failed: {result['error']}")
+        else:
+            print(f"{label}\n  rtf {result['rtf']:.3f}   first token {result['first_token_latency_s']} s   "
+                  f"end of utterance {result['eou_latency_s']} s   {result['calls_per_minute']} calls/min\n  "
+                  f"chunk p50 {result['p50_chunk_latency_ms']} ms p95 {result['p95_chunk_latency_ms']} ms   "
+                  f"peak RSS {result['peak_rss_mb']} MB")
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'fixtures': args.fixtures,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for key, metric, old, new in regressions:
+            print(f"REGRESSION {key}: {metric} {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
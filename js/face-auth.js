@@ -18,6 +18,7 @@ class FaceAuth {
     this.stream = null;
     this.isRecognizing = false;
     this.userData = null;
+    this.faceOnly = false; // Face-only login: the server finds who this is
     
     this.init();
   }
@@ -36,6 +37,12 @@ class FaceAuth {
   getUserData() {
     // Get user data passed from login page
     const urlParams = new URLSearchParams(window.location.search);
+    if (urlParams.get('mode') === 'face') {
+      this.faceOnly = true;
+      this.userData = {};
+      return;
+    }
+    
     this.userData = {
       matricule: urlParams.get('matricule') || localStorage.getItem('temp_matricule'),
       name: urlParams.get('name') || localStorage.getItem('temp_name'),
@@ -160,21 +167,30 @@ class FaceAuth {
       this.ctx.drawImage(this.video, 0, 0, this.canvas.width, this.canvas.height);
       const imageData = this.canvas.toDataURL('image/jpeg', 0.8);
       
-      // Send to server for recognition
-      const response = await fetch('http://localhost:5001/api/face-auth', {
+      // Send to server for recognition (face-only login matches against all staff)
+      const endpoint = this.faceOnly ? 'face-login' : 'face-auth';
+      const body = this.faceOnly
+        ? { image_data: imageData }
+        : { matricule: this.userData.matricule, image_data: imageData };
+      const response = await fetch(`http://localhost:5001/api/${endpoint}`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json'
         },
-        body: JSON.stringify({
-          matricule: this.userData.matricule,
-          image_data: imageData
-        })
+        body: JSON.stringify(body)
       });
       
       const result = await response.json();
       
       if (result.success) {
+        if (this.faceOnly) {
+          this.userData = {
+            matricule: result.user.matricule,
+            name: result.user.name,
+            role: result.role
+          };
+        }
+        
         this.updateStatus('Face recognized successfully!', 'ready');
         this.showSuccess('Facial recognition successful! Logging you in...');
         
@@ -11,6 +11,10 @@ class RealtimeTranscriptManager {
         this.isRecording = false;
         this.isPaused = false;
         this.sessionId = null;
+        // This session's text, rebuilt from updates; shown after sessionBaseContent
+        this.sessionText = '';
+        this.sessionBaseContent = '';
+        this.transcriptSeq = 0;
         
         this.initializeElements();
         this.setupEventListeners();
@@ -186,6 +190,10 @@ class RealtimeTranscriptManager {
     async startTranscription() {
         try {
             this.sessionId = `session_${this.proceedingId}_${Date.now()}`;
+            // A new session numbers its updates from 1 and adds to what is shown
+            this.transcriptSeq = 0;
+            this.sessionText = '';
+            this.sessionBaseContent = this.transcriptContent ? `${this.transcriptContent.trimEnd()} ` : '';
             
             // Show loading state
             this.updateStatus('loading', 'Starting transcription...');
@@ -221,16 +229,31 @@ class RealtimeTranscriptManager {
 
     handleTranscriptionUpdate(data) {
         console.log('Handling transcription update:', data);
+        if (data.session_id !== this.sessionId) {
+            return; // Left over from an earlier session
+        }
         if (data.type === 'transcription') {
-            console.log('Updating transcript with text:', data.text);
-            console.log('Full transcript:', data.full_transcript);
-            this.transcriptContent = data.full_transcript;
-            this.transcriptTextarea.value = this.transcriptContent;
-            this.transcriptTextarea.scrollTop = this.transcriptTextarea.scrollHeight;
+            // Updates carry only the new text - append it
+            if (data.seq <= this.transcriptSeq) {
+                return; // Already part of a transcript snapshot
+            }
+            if ((data.from_seq || data.seq) > this.transcriptSeq + 1) {
+                // Missed updates - fetch the whole text rather than show a gap
+                this.requestTranscript(data.session_id);
+                return;
+            }
+            this.transcriptSeq = data.seq;
+            this.sessionText = this.sessionText ? `${this.sessionText} ${data.text}` : data.text;
+            this.showSessionText();
             this.updateLastSavedTime();
-            console.log('Transcript updated in UI');
+        } else if (data.type === 'transcript') {
+            // Full text after a gap - updates up to data.seq are in it
+            this.applyTranscript(data);
         } else if (data.type === 'clear') {
             console.log('Clearing transcript');
+            this.transcriptSeq = data.seq || 0;
+            this.sessionText = '';
+            this.sessionBaseContent = '';
             this.transcriptContent = '';
             this.transcriptTextarea.value = '';
         } else {
@@ -238,6 +261,31 @@ class RealtimeTranscriptManager {
         }
     }
 
+    async requestTranscript(sessionId) {
+        try {
+            const { ipcRenderer } = window.require('electron');
+            this.applyTranscript(await ipcRenderer.invoke('get-transcript', sessionId));
+        } catch (error) {
+            console.error('Error fetching transcript:', error);
+        }
+    }
+
+    applyTranscript(snapshot) {
+        if (snapshot.seq < this.transcriptSeq) {
+            return; // Older than what is already shown
+        }
+        this.transcriptSeq = snapshot.seq;
+        this.sessionText = snapshot.full_transcript;
+        this.showSessionText();
+    }
+
+    showSessionText() {
+        // Text from before this session stays in front of it
+        this.transcriptContent = this.sessionBaseContent + this.sessionText;
+        this.transcriptTextarea.value = this.transcriptContent;
+        this.transcriptTextarea.scrollTop = this.transcriptTextarea.scrollHeight;
+    }
+
     updateStatusFromServer(status) {
         if (status.is_recording) {
             this.updateStatus('recording', 'Recording in progress...');
@@ -192,6 +192,11 @@ class SimpleTranscriptManager {
       
       const data = await response.json();
       this.sessionId = data.session_id;
+      this.streamUrl = data.stream_url;
+      
+      // Session deltas are appended to whatever was already saved
+      this.sessionBaseContent = this.transcriptContent ? this.transcriptContent.trimEnd() + ' ' : '';
+      this.transcriptContent = this.sessionBaseContent;
       
       // Request microphone access
       this.audioStream = await navigator.mediaDevices.getUserMedia({
@@ -333,7 +338,12 @@ class SimpleTranscriptManager {
   startEventStream() {
     if (!this.sessionId) return;
     
-    this.eventSource = new EventSource(`http://localhost:5001/api/transcription/stream/${this.sessionId}`);
+    // EventSource resends the last event id on reconnect, so the server
+    // replays only what was missed
+    // stream_url points at the async SSE server that serves every viewer
+    this.eventSource = new EventSource(
+      this.streamUrl || `http://localhost:5001/api/transcription/stream/${this.sessionId}`
+    );
     
     this.eventSource.onmessage = (event) => {
       try {
@@ -352,15 +362,22 @@ class SimpleTranscriptManager {
   handleTranscriptionUpdate(data) {
     switch (data.type) {
       case 'transcription':
-        // Update transcript content
-        this.transcriptContent = data.full_transcript;
+        // Events carry only the new segment
+        this.transcriptContent += data.text + ' ';
         this.transcriptTextarea.value = this.transcriptContent;
         this.transcriptTextarea.scrollTop = this.transcriptTextarea.scrollHeight;
         this.updateLastSavedTime();
         break;
       
+      case 'resync':
+        // Missed too many deltas while disconnected - server sent a snapshot
+        this.transcriptContent = (this.sessionBaseContent || '') + data.full_transcript + ' ';
+        this.transcriptTextarea.value = this.transcriptContent;
+        break;
+      
       case 'clear':
         this.transcriptContent = '';
+        this.sessionBaseContent = '';
         this.transcriptTextarea.value = '';
         break;
       
@@ -8,6 +8,7 @@ class TranscriptManager {
     this.isPaused = false;
     this.saveInterval = null;
     this.lastSaveTime = null;
+    this.savedContent = ''; // What the server has, so autosave can send only the new text
     this.sessionId = null;
     this.socket = null;
     this.mediaRecorder = null;
@@ -174,6 +175,7 @@ class TranscriptManager {
         const data = await response.json();
         if (data.content) {
           this.transcriptContent = data.content;
+          this.savedContent = data.content;
           this.transcriptTextarea.value = data.content;
           this.lastSaveTime = new Date(data.last_modified);
           this.updateLastSavedTime();
@@ -372,19 +374,26 @@ class TranscriptManager {
   async saveTranscript() {
     if (!this.transcriptContent.trim()) return;
     
+    const content = this.transcriptContent;
+    if (content === this.savedContent) return;
+    
     try {
-      const response = await fetch(`http://localhost:5001/api/transcript/${this.proceedingId}`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          content: this.transcriptContent,
-          proceeding_id: this.proceedingId
-        })
-      });
+      // Text only added since the last save: send just the new part
+      let response;
+      if (this.savedContent && content.startsWith(this.savedContent)) {
+        response = await this.postTranscript({
+          append: content.slice(this.savedContent.length),
+          base_length: this.savedContent.length
+        });
+      }
+      
+      // Edited further back, or the server has a different length (409)
+      if (!response || response.status === 409) {
+        response = await this.postTranscript({ content });
+      }
       
       if (response.ok) {
+        this.savedContent = content;
         this.lastSaveTime = new Date();
         this.updateLastSavedTime();
         console.log('Transcript saved successfully');
@@ -396,6 +405,16 @@ class TranscriptManager {
     }
   }
 
+  postTranscript(body) {
+    return fetch(`http://localhost:5001/api/transcript/${this.proceedingId}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ ...body, proceeding_id: this.proceedingId })
+    });
+  }
+
   updateLastSavedTime() {
     const now = new Date();
     this.lastSavedSpan.textContent = `Last updated: ${now.toLocaleTimeString()}`;
@@ -16,7 +16,6 @@ function initializeTranscriptionManager() {
         console.log('Main process received transcription:', data);
         console.log('Transcription type:', data.type);
         console.log('Transcription text:', data.text);
-        console.log('Full transcript:', data.full_transcript);
         
         // Forward transcription to the transcript window
         const transcriptWindow = getCurrentTranscriptWindow();
@@ -189,6 +188,13 @@ ipcMain.handle('get-transcript-buffer', async (event) => {
   return '';
 });
 
+ipcMain.handle('get-transcript', async (event, sessionId) => {
+  if (transcriptionManager) {
+    return transcriptionManager.getTranscript(sessionId);
+  }
+  return { seq: 0, full_transcript: '' };
+});
+
 // Handle logout navigation
 ipcMain.on('navigate-to-login', () => {
   // Close dashboard window if it exists
@@ -0,0 +1,98 @@
+"""
+Fixed-capacity audio ring buffer for the real-time transcriber
+Preallocated once per session; chunk windows are returned as views, not copies
+"""
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Mirrored ring buffer of float32 samples
+
+    Every sample is written twice, at ``i`` and ``i + capacity``, so any
+    window of up to ``capacity`` samples is one contiguous slice of the
+    backing array - no wrap-around copy is ever needed to hand a chunk to
+    the model.
+
+    Positions are absolute sample counts since the last reset:
+        history_floor <= read_pos <= write_pos
+    Samples before ``read_pos`` are kept as history (the overlap) until
+    they fall more than ``history`` samples behind it.
+    """
+
+    def __init__(self, capacity, history=0):
+        """
+        Args:
+            capacity: Most samples held at once (history + unread)
+            history: Samples kept before read_pos for overlapping windows
+        """
+        if history >= capacity:
+            raise ValueError("history must be smaller than capacity")
+        self.capacity = int(capacity)
+        self.history = int(history)
+        self._buffer = np.zeros(2 * self.capacity, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Forget all buffered audio (no reallocation)"""
+        self.write_pos = 0
+        self.read_pos = 0
+        self.history_floor = 0
+
+    def drop_history(self):
+        """Start the next window without overlap, keeping unread audio"""
+        self.history_floor = self.read_pos
+
+    @property
+    def available(self):
+        """Unread samples"""
+        return self.write_pos - self.read_pos
+
+    @property
+    def _retained_start(self):
+        return max(self.read_pos - self.history, self.history_floor)
+
+    @property
+    def free_space(self):
+        """Samples that can be written without overwriting kept audio"""
+        return self.capacity - (self.write_pos - self._retained_start)
+
+    def write(self, samples):
+        """Append samples; raises BufferError if they do not fit"""
+        n = len(samples)
+        if n > self.free_space:
+            raise BufferError(f"Ring buffer full ({n} samples, {self.free_space} free)")
+
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        rest = n - first
+
+        buf = self._buffer
+        cap = self.capacity
+        buf[start:start + first] = samples[:first]
+        buf[start + cap:start + cap + first] = samples[:first]
+        if rest:
+            buf[:rest] = samples[first:]
+            buf[cap:cap + rest] = samples[first:]
+
+        self.write_pos += n
+
+    def window(self, length):
+        """
+        View of the next ``length`` unread samples plus up to ``history``
+        samples before them (the overlap). Valid until the next write.
+
+        Returns:
+            (view, overlap_samples)
+        """
+        if length > self.available:
+            raise ValueError(f"Only {self.available} samples available, {length} requested")
+        start = self._retained_start
+        overlap = self.read_pos - start
+        offset = start % self.capacity
+        return self._buffer[offset:offset + overlap + length], overlap
+
+    def advance(self, length):
+        """Mark ``length`` unread samples as consumed"""
+        self.read_pos += min(length, self.available)
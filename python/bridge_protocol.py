@@ -0,0 +1,202 @@
+"""
+Wire protocol between the stdio transcription server and Electron
+Version 2: length-prefixed JSON frames carrying transcript deltas, with bursts coalesced by one writer thread
+
+Frame layout (both directions):
+
+    +---------+----------------------+--------------------------+
+    | version | payload length       | payload                  |
+    | 1 byte  | 4 bytes, big-endian  | UTF-8 JSON, no spaces    |
+    +---------+----------------------+--------------------------+
+
+Transcription events carry only the new ``text`` and a per-session ``seq``;
+the client keeps the running transcript. When several deltas of one
+session are waiting together they go out as one event whose text is their
+concatenation, with ``from_seq`` set to the first seq it covers. A client
+that sees a gap in seq asks for the whole text with a ``transcript``
+command.
+
+Version 1 is the original one JSON object per line with ``full_transcript``
+in every event; the server still speaks it with ``--protocol 1``.
+
+Settings (.env):
+    TRANSCRIPTION_BRIDGE_COALESCE_MS  how long the writer gathers a burst (default 10)
+"""
+
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+PROTOCOL_VERSION = 2
+LEGACY_VERSION = 1
+
+HEADER = struct.Struct('>BI')
+# Far above any real message; a larger length means the stream is out of sync
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+COALESCE_MS = float(os.getenv("TRANSCRIPTION_BRIDGE_COALESCE_MS", "10"))
+
+
+class ProtocolError(ValueError):
+    """A frame could not be read (wrong version, bad length or bad JSON)"""
+
+
+def encode_frame(message):
+    """One version 2 frame for ``message``"""
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(PROTOCOL_VERSION, len(payload)) + payload
+
+
+def encode_line(message):
+    """One version 1 line for ``message``"""
+    return (json.dumps(message) + '\n').encode('utf-8')
+
+
+def _read_exactly(stream, size):
+    data = stream.read(size)
+    # Pipes may return short reads
+    while data and len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def read_frame(stream):
+    """
+    Next message from a binary stream of version 2 frames
+
+    Returns:
+        The decoded message, or None at end of stream
+    Raises:
+        ProtocolError: the stream is not valid version 2 framing
+    """
+    header = _read_exactly(stream, HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise ProtocolError("Stream ended inside a frame header")
+    version, length = HEADER.unpack(header)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}")
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    payload = _read_exactly(stream, length)
+    if len(payload) < length:
+        raise ProtocolError("Stream ended inside a frame")
+    try:
+        return json.loads(payload)
+    except ValueError as e:
+        raise ProtocolError(f"Invalid frame payload: {e}")
+
+
+def read_line(stream):
+    """Next message from a binary stream of version 1 lines (None at end, skips blank lines)"""
+    for line in stream:
+        if line.strip():
+            try:
+                return json.loads(line)
+            except ValueError as e:
+                raise ProtocolError(f"Invalid JSON command: {e}")
+    return None
+
+
+def coalesce(messages):
+    """
+    Merge each session's consecutive transcription deltas into one
+
+    A session's deltas are merged only up to its next other message (a
+    clear, a response...), so its events keep their order. Messages of
+    other sessions in between don't stop a merge.
+    """
+    merged = []
+    open_delta = {}  # session_id -> index in merged of its mergeable delta
+    for message in messages:
+        session_id = message.get('session_id')
+        data = message.get('data') or {}
+        if message.get('type') != 'transcription' or data.get('type') != 'transcription':
+            if session_id is not None:
+                open_delta.pop(session_id, None)
+            merged.append(message)
+            continue
+
+        index = open_delta.get(session_id)
+        if index is None:
+            open_delta[session_id] = len(merged)
+            merged.append(message)
+            continue
+
+        previous = merged[index]
+        previous_data = previous['data']
+        merged[index] = dict(previous, data=dict(
+            data,
+            text=f"{previous_data['text']} {data['text']}",
+            from_seq=previous_data.get('from_seq', previous_data.get('seq'))
+        ), timestamp=previous['timestamp'])
+    return merged
+
+
+class MessageWriter:
+    """
+    Writes messages to a binary stream from one background thread
+
+    Callers never block on the pipe. The thread takes everything queued,
+    waits up to ``coalesce_ms`` for the rest of a burst, merges deltas
+    (version 2) and writes the lot with a single write and flush.
+    """
+
+    def __init__(self, stream, version=PROTOCOL_VERSION, coalesce_ms=COALESCE_MS):
+        self.stream = stream
+        self.version = version
+        self.encode = encode_frame if version == PROTOCOL_VERSION else encode_line
+        self.coalesce_wait = coalesce_ms / 1000.0
+        self._queue = queue.SimpleQueue()
+        self.stats = {'messages': 0, 'frames': 0, 'writes': 0, 'bytes': 0}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, message):
+        self._queue.put(message)
+
+    def close(self, timeout=5.0):
+        """Write out everything queued so far, then stop"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Gather the rest of a burst
+            deadline = time.perf_counter() + self.coalesce_wait
+            while batch[-1] is not None:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            closing = batch[-1] is None
+            messages = [message for message in batch if message is not None]
+            if messages:
+                self._write(messages)
+            if closing:
+                return
+
+    def _write(self, messages):
+        frames = coalesce(messages) if self.version == PROTOCOL_VERSION else messages
+        data = b''.join(self.encode(message) for message in frames)
+        try:
+            self.stream.write(data)
+            self.stream.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            # Electron went away; nothing left to tell it
+            return
+        self.stats['messages'] += len(messages)
+        self.stats['frames'] += len(frames)
+        self.stats['writes'] += 1
+        self.stats['bytes'] += len(data)
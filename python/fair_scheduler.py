@@ -0,0 +1,89 @@
+"""
+Fair turns on the shared Whisper model for concurrent real-time sessions
+Every session decodes on the one model in arrival order, so a busy room cannot starve a quiet one
+
+Each session's processing thread asks for a turn before decoding a window
+and gives it back afterwards. Waiting sessions are served first come,
+first served, and a freed slot is handed straight to the next one in line
+rather than raced for. A session never has more than one window waiting,
+so this is round-robin across sessions.
+
+Settings (.env):
+    TRANSCRIPTION_DECODE_SLOTS  windows decoded at once on the shared model (default 1)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+
+DEFAULT_SLOTS = int(os.getenv("TRANSCRIPTION_DECODE_SLOTS", "1"))
+
+TURN_WAIT_SECONDS = metrics.histogram(
+    'transcription_turn_wait_seconds', 'Time a session waited for its turn on the shared model'
+)
+
+
+class FairScheduler:
+    """First-come-first-served turns on a model shared by several sessions"""
+
+    def __init__(self, slots=DEFAULT_SLOTS):
+        self.slots = max(1, int(slots))
+        self._free = self.slots
+        self._waiting = deque()  # (session_id, event) in arrival order
+        self._lock = threading.Lock()
+        self._sessions = {}  # session_id -> {'turns', 'wait_seconds'}
+
+    @contextmanager
+    def turn(self, session_id):
+        """Hold one decode slot for the duration of the ``with`` block"""
+        started = time.perf_counter()
+        with self._lock:
+            if self._free and not self._waiting:
+                self._free -= 1
+                ticket = None
+            else:
+                ticket = threading.Event()
+                self._waiting.append((session_id, ticket))
+        if ticket:
+            ticket.wait()
+
+        waited = time.perf_counter() - started
+        TURN_WAIT_SECONDS.observe(waited)
+        with self._lock:
+            stats = self._sessions.setdefault(session_id, {'turns': 0, 'wait_seconds': 0.0})
+            stats['turns'] += 1
+            stats['wait_seconds'] += waited
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            if self._waiting:
+                # Hand the slot over directly so nobody can jump the line
+                _, ticket = self._waiting.popleft()
+                ticket.set()
+            else:
+                self._free += 1
+
+    def forget(self, session_id):
+        """Drop a finished session's counters"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'slots': self.slots,
+                'busy': self.slots - self._free,
+                'waiting': len(self._waiting),
+                'sessions': {
+                    session_id: {'turns': s['turns'], 'wait_seconds': round(s['wait_seconds'], 3)}
+                    for session_id, s in self._sessions.items()
+                },
+            }
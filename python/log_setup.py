@@ -0,0 +1,45 @@
+"""
+Leveled logging for the API and the transcription engine
+Records are queued and written by a listener thread, so request and inference threads never wait on the console
+
+Hot-path messages are logged at DEBUG with %-style arguments, so at the
+default INFO level they cost a level check and nothing is formatted.
+Messages are ``event key=value`` so they can be grepped and aggregated.
+
+Settings (.env):
+    LOG_LEVEL  DEBUG, INFO, WARNING or ERROR (default INFO)
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+_listener = None
+
+
+def configure_logging(level=None, stream=None):
+    """
+    Route all logging through a queue to ``stream`` (stderr by default)
+
+    Safe to call more than once; later calls only change the level.
+    """
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener:
+        return
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = queue.SimpleQueue()
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    # Write out whatever is still queued on exit
+    atexit.register(_listener.stop)
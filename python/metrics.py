@@ -0,0 +1,184 @@
+"""
+In-process latency histograms and gauges, rendered in the Prometheus text format
+Shared by the API (GET /metrics) and the transcription engine (its status command)
+
+Mirrors the small part of prometheus_client's API the app needs - metrics
+are module-level objects, ``labels(...)`` picks a child, ``observe`` and
+``time()`` record - without adding a dependency.
+
+    DECODE_SECONDS = metrics.histogram('transcription_audio_decode_seconds', 'Upload decode time')
+    with DECODE_SECONDS.time():
+        ...
+"""
+
+import threading
+import time
+
+# Seconds; covers sub-millisecond VAD checks up to multi-second decodes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = {}
+_lock = threading.Lock()
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _HistogramChild:
+    """Buckets, count and sum for one label combination"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        """(cumulative bucket counts, count, sum)"""
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        cumulative = []
+        running = 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return cumulative, count, total
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _HistogramChild(self.buckets)
+        return child
+
+    def observe(self, seconds):
+        self.labels().observe(seconds)
+
+    def time(self):
+        return self.labels().time()
+
+    def summary(self):
+        """{label values: {'count', 'sum', 'mean'}} for status responses"""
+        with self._lock:
+            children = list(self._children.items())
+        result = {}
+        for key, child in children:
+            _, count, total = child.snapshot()
+            result[','.join(key) or 'all'] = {
+                'count': count,
+                'sum': round(total, 4),
+                'mean': round(total / count, 4) if count else 0.0,
+            }
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            cumulative, count, total = child.snapshot()
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            for bound, n in zip(self.buckets, cumulative):
+                bucket_labels = _labels(labels + ['le="%s"' % bound])
+                lines.append(f"{self.name}_bucket{bucket_labels} {n}")
+            bucket_labels = _labels(labels + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """Current value read from a callback when metrics are rendered"""
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            lines.append(f"{self.name} {float(self.callback())}")
+        except Exception as e:
+            lines[0] += f" (unavailable: {e})"
+        return lines
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """
+    The process-wide histogram ``name`` (created on first call)
+
+    Raises:
+        ValueError: ``name`` is already registered as a different metric
+    """
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        elif (not isinstance(metric, Histogram) or metric.documentation != documentation
+              or metric.labelnames != tuple(labelnames)):
+            raise ValueError(f"Metric {name} is already registered with different help or labels")
+    return metric
+
+
+def gauge(name, documentation, callback):
+    """Register (or replace) the gauge ``name``"""
+    with _lock:
+        _metrics[name] = Gauge(name, documentation, callback)
+    return _metrics[name]
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    with _lock:
+        metrics = sorted(_metrics.items())
+    lines = []
+    for _, metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,178 @@
+"""
+Process-wide Whisper model registry
+Each (size, device, compute_type) is loaded once, warmed up, and shared by every caller in the process
+
+Callers get a ModelHandle straight away; the model loads on a background
+thread and the handle reports its readiness (loading / ready / failed) and
+can be waited on.
+
+Settings (.env):
+    WHISPER_MODEL         default model size (default small)
+    WHISPER_DEVICE        cpu or cuda (default cpu)
+    WHISPER_COMPUTE_TYPE  int8, int16, float16, float32 (default int8)
+"""
+
+import logging
+import os
+import threading
+import time
+
+DEFAULT_SIZE = os.getenv("WHISPER_MODEL", "small")
+DEFAULT_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+DEFAULT_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+
+# Named variants callers can ask for instead of spelling out every setting
+VARIANTS = {
+    "default": {},
+    "fast": {"size": "base"},
+    "accurate": {"size": "medium"},
+}
+
+logger = logging.getLogger(__name__)
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+# Seconds of silence for warmup - enough to build the encoder/decoder kernels
+WARMUP_SECONDS = 1
+
+
+class ModelLoadError(RuntimeError):
+    """The requested model failed to load"""
+
+
+class ModelHandle:
+    """One registry entry: a model that is loading, ready or failed"""
+
+    def __init__(self, size, device, compute_type):
+        self.size = size
+        self.device = device
+        self.compute_type = compute_type
+        self.state = LOADING
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self._done = threading.Event()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def wait(self, timeout=None):
+        """
+        Block until loading finishes or ``timeout`` seconds pass
+
+        Returns:
+            The model, or None if it is still loading
+        Raises:
+            ModelLoadError: loading failed
+        """
+        self._done.wait(timeout)
+        if self.state == FAILED:
+            raise ModelLoadError(self.error)
+        return self.model
+
+    def on_loaded(self, callback):
+        """Call ``callback(handle)`` once loading finishes (now, if it already has)"""
+        with self._lock:
+            if not self._done.is_set():
+                self._listeners.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, state, model=None, error=None):
+        with self._lock:
+            self.state = state
+            self.model = model
+            self.error = error
+            self._done.set()
+            listeners, self._listeners = self._listeners, []
+        for callback in listeners:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception("model_listener_failed size=%s", self.size)
+
+    def status(self):
+        return {
+            "size": self.size,
+            "device": self.device,
+            "compute_type": self.compute_type,
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+        }
+
+
+class ModelRegistry:
+    """Loads each Whisper configuration at most once per process"""
+
+    def __init__(self, loader=None, warmup=True):
+        self._loader = loader or _load_whisper
+        self._warmup = warmup
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def request(self, size=None, device=None, compute_type=None):
+        """
+        Handle for a model, starting its background load on first request
+
+        Returns immediately; use handle.wait() or handle.ready.
+        """
+        key = (size or DEFAULT_SIZE, device or DEFAULT_DEVICE, compute_type or DEFAULT_COMPUTE_TYPE)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._handles[key] = ModelHandle(*key)
+                threading.Thread(target=self._load, args=(handle,), daemon=True).start()
+        return handle
+
+    def variant(self, name):
+        """Handle for a named entry of VARIANTS"""
+        if name not in VARIANTS:
+            raise KeyError(f"Unknown model variant '{name}' (known: {', '.join(VARIANTS)})")
+        return self.request(**VARIANTS[name])
+
+    def status(self):
+        """Readiness of every model requested so far"""
+        with self._lock:
+            handles = list(self._handles.values())
+        return [handle.status() for handle in handles]
+
+    def _load(self, handle):
+        start = time.perf_counter()
+        try:
+            logger.info("model_loading size=%s device=%s compute_type=%s",
+                        handle.size, handle.device, handle.compute_type)
+            model = self._loader(handle.size, handle.device, handle.compute_type)
+            if self._warmup:
+                warm_up(model)
+        except Exception as e:
+            logger.exception("model_load_failed size=%s", handle.size)
+            handle._finish(FAILED, error=str(e))
+            return
+        handle.load_seconds = round(time.perf_counter() - start, 2)
+        handle._finish(READY, model=model)
+        logger.info("model_ready size=%s load_seconds=%s", handle.size, handle.load_seconds)
+
+
+def _load_whisper(size, device, compute_type):
+    from faster_whisper import WhisperModel
+    return WhisperModel(size, device=device, compute_type=compute_type)
+
+
+def warm_up(model):
+    """Run one short inference so the first real request doesn't pay for lazy init"""
+    import numpy as np
+
+    silence = np.zeros(16000 * WARMUP_SECONDS, dtype=np.float32)
+    segments, _ = model.transcribe(silence, beam_size=1, language="en")
+    for _ in segments:  # transcribe() is lazy; decoding happens while iterating
+        pass
+
+
+# The registry shared by everything in this process
+registry = ModelRegistry()
@@ -0,0 +1,45 @@
+"""
+Word-timestamp stitching for overlapping transcription windows
+Keeps only the words that belong to a window's new audio, so overlap is never emitted twice
+"""
+
+
+def select_new_words(words, overlap_seconds, window_seconds, guard_seconds, end_guard_seconds=None):
+    """
+    Pick the words a window should commit
+
+    Each window is ``overlap_seconds`` of already-seen audio followed by new
+    audio. Words are assigned to exactly one window by their midpoint:
+
+        commit if  start_edge <= midpoint < window_seconds - guard_seconds
+
+    where ``start_edge`` is ``overlap_seconds - guard_seconds`` (0 for a window
+    without overlap). Words in the last ``guard_seconds`` are likely cut off,
+    so they are left for the next window, which hears them whole inside its
+    overlap. ``guard_seconds`` must not exceed the overlap.
+
+    Args:
+        words: Iterable of faster-whisper Word objects (start, end, word)
+        overlap_seconds: Length of the already-transcribed prefix
+        window_seconds: Total window length
+        guard_seconds: Tail region deferred to the next window
+        end_guard_seconds: Tail region of this window if it differs from the
+            previous one's (0 when the window ends in a pause)
+
+    Returns:
+        List of the committed words, in order
+    """
+    start_edge = max(overlap_seconds - guard_seconds, 0.0) if overlap_seconds > 0 else 0.0
+    end_edge = window_seconds - (guard_seconds if end_guard_seconds is None else end_guard_seconds)
+
+    selected = []
+    for word in words:
+        midpoint = (word.start + word.end) / 2
+        if start_edge <= midpoint < end_edge:
+            selected.append(word)
+    return selected
+
+
+def words_to_text(words):
+    """Join faster-whisper words (which carry their own leading spaces)"""
+    return "".join(word.word for word in words).strip()
@@ -0,0 +1,95 @@
+"""
+Pause-aware segmentation for the real-time transcriber
+Closes a window when the speaker pauses instead of every fixed chunk_duration
+
+Decisions are made per audio block (0.1 s) from its level against a
+tracked noise floor, using the same thresholds as the voice-activity gate:
+
+- a window is cut at the first pause of ``pause_seconds`` once it holds at
+  least ``min_seconds`` (so a cough or a "Yes." is not decoded on its own,
+  but it is not held back longer than ``min_seconds`` either)
+- a window of continuous speech is cut at ``max_seconds``; only these
+  forced cuts can split a word, so only they need the overlap
+- audio with no speech at all is skipped without being decoded, keeping a
+  short lead-in so the next utterance's onset is not clipped
+"""
+
+from voice_activity import MARGIN_DB, MIN_LEVEL_DB, NOISE_RISE_RATE, frame_levels_db
+
+CONTINUE = "continue"
+CUT = "cut"
+SKIP = "skip"
+
+# Silence kept before speech when silent audio is skipped
+LEAD_IN_SECONDS = 0.2
+
+
+class PauseSegmenter:
+    """Decides where the unread audio of a ring buffer should be cut"""
+
+    def __init__(self, sample_rate=16000, min_seconds=1.0, max_seconds=4.0, pause_seconds=0.35,
+                 min_level_db=MIN_LEVEL_DB, margin_db=MARGIN_DB):
+        if not 0 < min_seconds <= max_seconds:
+            raise ValueError("need 0 < min_seconds <= max_seconds")
+        self.min_samples = int(sample_rate * min_seconds)
+        self.max_samples = int(sample_rate * max_seconds)
+        self.pause_samples = int(sample_rate * pause_seconds)
+        self.lead_in_samples = int(sample_rate * LEAD_IN_SECONDS)
+        self.min_level_db = min_level_db
+        self.margin_db = margin_db
+        self.noise_floor_db = None
+        self.reset()
+
+    def reset(self):
+        """Start a new window (the noise floor is kept)"""
+        self.speech_seen = False
+        self.silence_run = 0
+
+    def is_speech(self, block):
+        """Whether one block is louder than the noise floor plus the margin"""
+        levels = frame_levels_db(block, len(block))
+        if not len(levels):
+            return False
+        level = float(levels[0])
+        # Judged against the floor before this block, so a stream that opens
+        # mid-sentence isn't taken as its own background
+        floor = self.noise_floor_db
+        threshold = self.min_level_db if floor is None else max(self.min_level_db, floor + self.margin_db)
+        if floor is None or level < floor:
+            self.noise_floor_db = level
+        else:
+            self.noise_floor_db += NOISE_RISE_RATE * (level - floor)
+        return level > threshold
+
+    def push(self, block, pending):
+        """
+        Account for ``block``, just written, with ``pending`` unread samples now buffered
+
+        Returns:
+            (CONTINUE, 0) - keep buffering
+            (CUT, n, natural) - transcribe the next n samples; natural is
+                False for a forced cut at max_seconds (may split a word)
+            (SKIP, n) - discard the next n samples, they hold no speech
+        """
+        if self.is_speech(block):
+            self.speech_seen = True
+            self.silence_run = 0
+        else:
+            self.silence_run += len(block)
+
+        if not self.speech_seen:
+            if pending > self.pause_samples + self.lead_in_samples:
+                return SKIP, pending - self.lead_in_samples
+            return CONTINUE, 0
+
+        if pending >= self.max_samples:
+            # Still mid-utterance: the next window must be decoded (with its
+            # overlap) even if it turns out to be mostly pause
+            self.silence_run = 0
+            return CUT, self.max_samples, False
+
+        if self.silence_run >= self.pause_samples and pending >= self.min_samples:
+            self.reset()
+            return CUT, pending, True
+
+        return CONTINUE, 0
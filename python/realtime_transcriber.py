@@ -9,43 +9,104 @@ import threading
 import queue
 import time
 import json
-import sys
-import os
-from faster_whisper import WhisperModel
+import logging
+from contextlib import nullcontext
 from datetime import datetime
-import tempfile
-import wave
+import metrics
+from audio_ring_buffer import AudioRingBuffer
+from overlap_stitcher import select_new_words, words_to_text
+from pause_segmenter import CUT, SKIP, PauseSegmenter
+from model_registry import registry as model_registry
+from voice_activity import VAD_SECONDS, VoiceActivityDetector, is_speech_output
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_SECONDS = metrics.histogram(
+    'transcription_window_inference_seconds', 'Whisper decode time per realtime chunk window', ['batch_size']
+)
+
+
+def to_model_input(audio_chunk):
+    """
+    Return the chunk as a contiguous float32 array for WhisperModel.transcribe
+
+    No copy is made when the chunk already is one, which is the normal case
+    for sounddevice float32 input.
+    """
+    return np.ascontiguousarray(audio_chunk, dtype=np.float32)
 
 class RealtimeTranscriber:
-    def __init__(self, sample_rate=16000, chunk_duration=2.0, overlap_duration=0.2, device="cpu", compute_type="int8"):
+    def __init__(self, sample_rate=16000, chunk_duration=2.0, overlap_duration=0.2, device="cpu", compute_type="int8",
+                 model_size="small", beam_size=1, segmentation="pause", min_chunk_duration=1.0,
+                 max_chunk_duration=4.0, pause_duration=0.35, input_device=None, scheduler=None,
+                 send_full_transcript=True):
         """
         Initialize the real-time transcriber with overlap buffering
         
         Args:
             sample_rate: Audio sample rate (Hz)
-            chunk_duration: Duration of each audio chunk in seconds (reduced to 2.0s)
+            chunk_duration: Duration of each audio chunk in seconds, for fixed segmentation
             overlap_duration: Duration of overlap between chunks in seconds (0.5s)
             device: Device to use for Whisper ("cpu" or "cuda")
             compute_type: Compute type for Whisper ("int8", "int16", "float16", "float32")
+            model_size: Whisper model size ("tiny", "base", "small", ...)
+            beam_size: Decoding beam width (1 = greedy, fastest)
+            segmentation: "pause" cuts windows at pauses in speech (see
+                pause_segmenter), "fixed" every chunk_duration seconds
+            min_chunk_duration: Shortest window decoded, pause segmentation
+            max_chunk_duration: Longest window before a forced cut, pause segmentation
+            pause_duration: Silence that ends a window, pause segmentation
+            input_device: sounddevice input device index or name (None = system default)
+            scheduler: Optional FairScheduler shared with other transcribers
+                using the same model
+            send_full_transcript: Include the whole transcript in every
+                output event; False sends only the new text and its seq
         """
+        if segmentation not in ("pause", "fixed"):
+            raise ValueError(f"Unknown segmentation '{segmentation}' (use 'pause' or 'fixed')")
         self.sample_rate = sample_rate
         self.chunk_duration = chunk_duration
         self.overlap_duration = overlap_duration
         self.chunk_samples = int(sample_rate * chunk_duration)
+        self.segmentation = segmentation
+        # Pause-driven windows, or None for fixed chunk_duration windows
+        self.segmenter = PauseSegmenter(
+            sample_rate, min_chunk_duration, max_chunk_duration, pause_duration
+        ) if segmentation == "pause" else None
+        max_window_samples = self.segmenter.max_samples if self.segmenter else self.chunk_samples
         self.overlap_samples = int(sample_rate * overlap_duration)
+        self.blocksize = int(sample_rate * 0.1)  # 0.1s audio callback blocks
+        # Words ending this close to a window's end are committed by the next window
+        self.boundary_guard = overlap_duration / 2
         self.device = device
         self.compute_type = compute_type
+        self.model_size = model_size
+        self.beam_size = beam_size
+        self.input_device = input_device
+        self.scheduler = scheduler
+        self.send_full_transcript = send_full_transcript
         
         # Audio processing with overlap buffering
         self.audio_queue = queue.Queue()
         self.is_recording = False
         self.audio_thread = None
         self.processing_thread = None
-        self.last_overlap = np.array([], dtype=np.float32)  # Buffer for overlap
+        
+        # Preallocated ring buffer: overlap history + the longest window + room
+        # for the blocks that arrive while a window is being transcribed
+        self.ring_buffer = AudioRingBuffer(
+            capacity=self.overlap_samples + 2 * max_window_samples + self.blocksize,
+            history=self.overlap_samples
+        )
+        
+        # Energy gate - windows with no new speech never reach the model
+        self.vad = VoiceActivityDetector(sample_rate)
         
         # Transcription
-        self.whisper_model = None
+        self.model_handle = None
         self.transcript_buffer = ""
+        self.transcript_seq = 0  # Numbers output events so clients can spot gaps
+        self.transcript_lock = threading.Lock()
         self.current_session = None
         
         # Output handling
@@ -56,22 +117,19 @@ class RealtimeTranscriber:
         self._initialize_whisper()
     
     def _initialize_whisper(self):
-        """Initialize Whisper model in background thread"""
-        def load_model():
-            try:
-                print("Loading Whisper model...", file=sys.stderr)
-                self.whisper_model = WhisperModel(
-                    "small", 
-                    device=self.device, 
-                    compute_type=self.compute_type
-                )
-                print(f"Whisper model loaded successfully on {self.device} with {self.compute_type}", file=sys.stderr)
-            except Exception as e:
-                print(f"Error loading Whisper model: {e}", file=sys.stderr)
-                if self.error_callback:
-                    self.error_callback(f"Failed to load Whisper model: {e}")
+        """Request the shared Whisper model (loaded once per process, in the background)"""
+        self.model_handle = model_registry.request(self.model_size, self.device, self.compute_type)
+        
+        def report_failure(handle):
+            if handle.error and self.error_callback:
+                self.error_callback(f"Failed to load Whisper model: {handle.error}")
         
-        threading.Thread(target=load_model, daemon=True).start()
+        self.model_handle.on_loaded(report_failure)
+    
+    @property
+    def whisper_model(self):
+        """The shared model, or None while it is still loading"""
+        return self.model_handle.model
     
     def set_output_callback(self, callback):
         """Set callback function for transcription output"""
@@ -88,7 +146,12 @@ class RealtimeTranscriber:
         
         self.current_session = session_id
         self.transcript_buffer = ""
-        self.last_overlap = np.array([], dtype=np.float32)  # Reset overlap buffer
+        self.transcript_seq = 0
+        self.ring_buffer.reset()  # Reset audio and overlap
+        self.vad.reset()
+        if self.segmenter:
+            self.segmenter.reset()
+        self._drain_audio_queue()
         self.is_recording = True
         
         # Start audio recording thread
@@ -99,7 +162,8 @@ class RealtimeTranscriber:
         self.processing_thread = threading.Thread(target=self._process_audio_chunks, daemon=True)
         self.processing_thread.start()
         
-        print(f"Started transcription session: {session_id} with {self.chunk_duration}s chunks and {self.overlap_duration}s overlap", file=sys.stderr)
+        logger.info("session_started session=%s chunk_seconds=%s overlap_seconds=%s",
+                    session_id, self.chunk_duration, self.overlap_duration)
         return True
     
     def stop_session(self):
@@ -112,18 +176,26 @@ class RealtimeTranscriber:
         if self.processing_thread and self.processing_thread.is_alive():
             self.processing_thread.join(timeout=1.0)
         
+        if self.processing_thread and self.processing_thread.is_alive():
+            logger.warning("session_flush_skipped reason=processing_thread_busy")
+        else:
+            self._buffer_queued_audio()
+            self._flush_window()
         self.current_session = None
-        self.last_overlap = np.array([], dtype=np.float32)  # Clear overlap buffer
-        print("Transcription session stopped", file=sys.stderr)
+        self.ring_buffer.reset()  # Clear audio and overlap
+        logger.info("session_stopped")
     
     def clear_transcript(self):
         """Clear the current transcript buffer"""
-        self.transcript_buffer = ""
-        self.last_overlap = np.array([], dtype=np.float32)  # Clear overlap buffer
+        with self.transcript_lock:
+            self.transcript_buffer = ""
+            self.transcript_seq += 1
+        self.ring_buffer.drop_history()  # Next chunk starts without overlap
         if self.output_callback:
             self.output_callback({
                 'type': 'clear',
                 'session_id': self.current_session,
+                'seq': self.transcript_seq,
                 'text': '',
                 'full_transcript': ''
             })
@@ -133,7 +205,7 @@ class RealtimeTranscriber:
         try:
             def callback(indata, frames, time, status):
                 if status:
-                    print(f"Audio callback status: {status}", file=sys.stderr)
+                    logger.warning("audio_callback_status status=%s", status)
                 
                 if self.is_recording:
                     # Convert to float32 and add to queue
@@ -141,122 +213,193 @@ class RealtimeTranscriber:
                     self.audio_queue.put(audio_data)
             
             # Improved blocksize for better real-time responsiveness (0.1s)
-            blocksize = int(self.sample_rate * 0.1)
+            blocksize = self.blocksize
             
             # Start audio stream
             with sd.InputStream(
                 callback=callback,
+                device=self.input_device,
                 channels=1,
                 samplerate=self.sample_rate,
                 dtype=np.float32,
                 blocksize=blocksize  # Improved: 0.1s blocksize for better responsiveness
             ):
-                print(f"Audio stream started with {blocksize} samples blocksize (0.1s)", file=sys.stderr)
+                logger.info("audio_stream_started blocksize=%d", blocksize)
                 while self.is_recording:
                     time.sleep(0.1)
                 
-                print("Audio stream stopped", file=sys.stderr)
+                logger.info("audio_stream_stopped")
                 
         except Exception as e:
-            print(f"Error in audio callback: {e}", file=sys.stderr)
+            logger.exception("audio_stream_failed")
             if self.error_callback:
                 self.error_callback(f"Audio recording error: {e}")
     
+    def _drain_audio_queue(self):
+        """Discard audio left in the queue from a previous session"""
+        while True:
+            try:
+                self.audio_queue.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _buffer_queued_audio(self):
+        """
+        Move blocks still queued at stop into the ring buffer for _flush_window
+    
+        The processing thread exits as soon as recording stops, leaving the
+        last few callback blocks (the end of the last sentence) in the queue.
+        """
+        ring = self.ring_buffer
+        while True:
+            try:
+                block = self.audio_queue.get_nowait()
+            except queue.Empty:
+                return
+            while len(block):
+                if not ring.free_space:
+                    self._flush_window()
+                n = min(len(block), ring.free_space)
+                ring.write(block[:n])
+                block = block[n:]
+    
     def _process_audio_chunks(self):
         """Process audio chunks with overlap buffering to prevent word truncation"""
-        audio_buffer = np.array([], dtype=np.float32)
-        
         while self.is_recording:
             try:
-                # Collect audio data
-                while not self.audio_queue.empty() and self.is_recording:
-                    chunk = self.audio_queue.get_nowait()
-                    audio_buffer = np.concatenate([audio_buffer, chunk])
-                
-                # Process when we have enough data for a chunk
-                if len(audio_buffer) >= self.chunk_samples:
-                    # Extract chunk for processing
-                    current_chunk = audio_buffer[:self.chunk_samples]
-                    audio_buffer = audio_buffer[self.chunk_samples:]
-                    
-                    # Create processing chunk with overlap from previous chunk
-                    if len(self.last_overlap) > 0:
-                        # Prepend previous overlap to current chunk
-                        process_chunk = np.concatenate([self.last_overlap, current_chunk])
-                        print(f"Processing chunk with {len(self.last_overlap)} overlap samples + {len(current_chunk)} new samples", file=sys.stderr)
-                    else:
-                        process_chunk = current_chunk
-                        print(f"Processing first chunk with {len(current_chunk)} samples (no overlap)", file=sys.stderr)
-                    
-                    # Prepare next overlap from the end of current chunk
-                    if len(current_chunk) >= self.overlap_samples:
-                        self.last_overlap = current_chunk[-self.overlap_samples:].copy()
-                    else:
-                        self.last_overlap = current_chunk.copy()
-                    
-                    # Transcribe the chunk with overlap
-                    self._transcribe_chunk(process_chunk)
+                # Block until audio arrives - no polling delay
+                try:
+                    block = self.audio_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
                 
-                time.sleep(0.1)  # Small delay to prevent busy waiting
+                self._feed_block(block)
                 
             except Exception as e:
-                print(f"Error processing audio chunks: {e}", file=sys.stderr)
+                logger.exception("chunk_processing_failed")
                 if self.error_callback:
                     self.error_callback(f"Audio processing error: {e}")
                 time.sleep(0.5)
     
-    def _transcribe_chunk(self, audio_chunk):
-        """Transcribe a single audio chunk with improved temp file management"""
+    def _feed_block(self, block):
+        """Write a block into the ring buffer, transcribing each chunk as it completes"""
+        ring = self.ring_buffer
+        while len(block):
+            n = min(len(block), ring.free_space)
+            ring.write(block[:n])
+            if self.segmenter:
+                self._segment(block[:n])
+            block = block[n:]
+            
+            while not self.segmenter and ring.available >= self.chunk_samples and self.is_recording:
+                # View of overlap + new chunk - no concatenate, no copy
+                window, overlap = ring.window(self.chunk_samples)
+                self._transcribe_chunk(window, overlap)
+                ring.advance(self.chunk_samples)
+            
+            if not self.is_recording:
+                return
+    
+    def _segment(self, block):
+        """Cut, skip or keep buffering after ``block`` was written (pause segmentation)"""
+        ring = self.ring_buffer
+        decision = self.segmenter.push(block, ring.available)
+        if decision[0] == CUT and self.is_recording:
+            length, natural = decision[1], decision[2]
+            window, overlap = ring.window(length)
+            # A window ending in a pause has no cut-off word to defer
+            self._transcribe_chunk(window, overlap, end_guard=0.0 if natural else None)
+            ring.advance(length)
+            if natural:
+                # The next window starts after a pause - no overlap needed
+                ring.drop_history()
+        elif decision[0] == SKIP:
+            ring.advance(decision[1])
+            ring.drop_history()
+    
+    def _flush_window(self):
+        """
+        Transcribe what is left in the ring buffer when the session stops
+
+        There is no next window to take the words deferred to it, so the
+        last one commits its tail too - including, when no new audio is
+        left, the guard words still sitting in the overlap.
+        """
+        ring = self.ring_buffer
+        window, overlap = ring.window(ring.available)
+        if len(window):
+            self._transcribe_chunk(window, overlap, end_guard=0.0)
+        ring.advance(ring.available)
+    
+    def _transcribe_chunk(self, audio_chunk, overlap_samples=0, end_guard=None):
+        """
+        Transcribe a single audio chunk straight from memory
+
+        The first ``overlap_samples`` were already transcribed with the previous
+        chunk; word timestamps are used to emit only the words in the new audio.
+        Words in the last ``end_guard`` seconds (default: the boundary guard)
+        are left for the next window.
+        """
         if not self.whisper_model:
-            print("Whisper model not loaded yet", file=sys.stderr)
+            logger.debug("chunk_dropped reason=model_loading")
+            return
+        
+        guard = self.boundary_guard if self.overlap_samples else 0.0
+        # Only audio this window can commit decides: the new audio, plus the
+        # guard tail the previous window deferred to it
+        commit_from = max(overlap_samples - int(guard * self.sample_rate), 0) if overlap_samples else 0
+        if not self.vad.has_speech(audio_chunk[commit_from:]):
             return
         
-        temp_filename = None
         try:
-            # Save audio chunk to temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_filename = temp_file.name
-            
-            # Convert float32 to int16 for WAV file
-            audio_int16 = (audio_chunk * 32767).astype(np.int16)
-            
-            # Save as WAV file
-            with wave.open(temp_filename, 'wb') as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_int16.tobytes())
+            # The chunk is already 16 kHz mono float32 - hand it to the model as-is
+            audio = to_model_input(audio_chunk)
             
-            # Transcribe with Whisper
-            segments, info = self.whisper_model.transcribe(
-                temp_filename,
-                beam_size=1,  # Fast processing
-                language="en",
-                condition_on_previous_text=False,  # Better for short chunks
-                vad_filter=True,  # Voice activity detection
-                vad_parameters=dict(min_silence_duration_ms=500)
+            # Sessions sharing the model take turns on it
+            turn = self.scheduler.turn(self.current_session) if self.scheduler else nullcontext()
+            with turn:
+                # Transcribe with Whisper
+                started = time.perf_counter()
+                cpu_started = time.process_time()
+                segments, info = self.whisper_model.transcribe(
+                    audio,
+                    beam_size=self.beam_size,
+                    language="en",
+                    condition_on_previous_text=False,  # Better for short chunks
+                    vad_filter=True,  # Voice activity detection
+                    vad_parameters=dict(min_silence_duration_ms=500),
+                    word_timestamps=True  # Needed to stitch overlapping chunks
+                )
+                
+                # Keep only words that belong to this chunk's new audio, from
+                # segments Whisper doesn't itself think are non-speech
+                words = [
+                    word for segment in segments if is_speech_output(segment.no_speech_prob)
+                    for word in (segment.words or [])
+                ]
+                # segments is lazy - decoding happens while it is consumed above
+                self.vad.stats.record_inference(time.process_time() - cpu_started)
+                INFERENCE_SECONDS.labels(batch_size=1).observe(time.perf_counter() - started)
+            new_words = select_new_words(
+                words,
+                overlap_seconds=overlap_samples / self.sample_rate,
+                window_seconds=len(audio) / self.sample_rate,
+                guard_seconds=guard,
+                end_guard_seconds=end_guard
             )
-            
-            # Combine segments
-            chunk_text = ""
-            for segment in segments:
-                chunk_text += segment.text + " "
-            
-            chunk_text = chunk_text.strip()
+            chunk_text = words_to_text(new_words)
             
             # Process transcribed text
             if chunk_text:
                 self._handle_transcription(chunk_text)
             
-        except Exception as e:
-            print(f"Error transcribing chunk: {e}", file=sys.stderr)
-        finally:
-            # Ensure cleanup of temp file even on exceptions
-            if temp_filename and os.path.exists(temp_filename):
-                try:
-                    os.unlink(temp_filename)
-                except Exception as cleanup_error:
-                    print(f"Warning: Could not delete temp file {temp_filename}: {cleanup_error}", file=sys.stderr)
+        except Exception:
+            logger.exception("chunk_transcription_failed session=%s", self.current_session)
+    
+    def get_transcript(self):
+        """(seq, text) of the transcript so far - the text covers every event up to seq"""
+        with self.transcript_lock:
+            return self.transcript_seq, self.transcript_buffer.strip()
     
     def _handle_transcription(self, text):
         """Handle transcribed text and send to output"""
@@ -264,32 +407,47 @@ class RealtimeTranscriber:
             return
         
         # Add to transcript buffer
-        self.transcript_buffer += text + " "
+        with self.transcript_lock:
+            self.transcript_buffer += text + " "
+            self.transcript_seq += 1
         
         # Send update via callback
         if self.output_callback:
-            self.output_callback({
+            update = {
                 'type': 'transcription',
                 'session_id': self.current_session,
+                'seq': self.transcript_seq,
                 'text': text,
-                'full_transcript': self.transcript_buffer.strip(),
                 'timestamp': datetime.now().isoformat()
-            })
+            }
+            if self.send_full_transcript:
+                # Copies the whole transcript - grows with the hearing
+                update['full_transcript'] = self.transcript_buffer.strip()
+            self.output_callback(update)
         
-        print(f"Transcribed: {text}", file=sys.stderr)
+        logger.debug("chunk_transcribed session=%s chars=%d", self.current_session, len(text))
     
     def get_status(self):
         """Get current transcription status"""
         return {
             'is_recording': self.is_recording,
             'session_id': self.current_session,
+            'input_device': self.input_device,
             'model_loaded': self.whisper_model is not None,
+            'model_state': self.model_handle.state,
+            'model_size': self.model_size,
             'device': self.device,
             'compute_type': self.compute_type,
             'sample_rate': self.sample_rate,
             'chunk_duration': self.chunk_duration,
+            'segmentation': self.segmentation,
             'overlap_duration': self.overlap_duration,
-            'overlap_samples': self.overlap_samples
+            'overlap_samples': self.overlap_samples,
+            'vad': self.vad.stats.get_stats(),
+            'latency': {
+                'inference': INFERENCE_SECONDS.summary(),
+                'vad': VAD_SECONDS.summary()
+            }
         }
 
 # Command-line interface for testing
@@ -1,21 +1,25 @@
 from flask import Flask, request, jsonify
-import whisper
-import os
+from model_registry import ModelLoadError, registry
 
 app = Flask(__name__)
-model = whisper.load_model("base")
+# Starts loading in the background; requests wait for it below
+model_handle = registry.request("base")
 
 @app.route("/transcribe", methods=["POST"])
 def transcribe():
     if "audio" not in request.files:
         return jsonify({"error": "No audio uploaded"}), 400
 
-    audio_file = request.files["audio"]
-    save_path = "temp.wav"
-    audio_file.save(save_path)
+    try:
+        model = model_handle.wait(timeout=30)
+    except ModelLoadError as e:
+        return jsonify({"error": f"Whisper model failed to load: {e}"}), 503
+    if model is None:
+        return jsonify({"error": "Whisper model is still loading"}), 503
 
-    result = model.transcribe(save_path, language="en")
-    return jsonify({"text": result["text"]})
+    # faster-whisper decodes the upload straight from the request stream
+    segments, _ = model.transcribe(request.files["audio"].stream, language="en")
+    return jsonify({"text": "".join(segment.text for segment in segments)})
 
 if __name__ == "__main__":
     app.run(port=5001)
@@ -3,50 +3,148 @@ Transcription Server for Electron Integration
 Runs the improved real-time transcription engine with overlap buffering
 """
 
-import json
+import argparse
+import os
 import sys
-import threading
 import time
+from bridge_protocol import LEGACY_VERSION, PROTOCOL_VERSION, MessageWriter, ProtocolError, read_frame, read_line
+from log_setup import configure_logging
+from fair_scheduler import FairScheduler
 from realtime_transcriber import RealtimeTranscriber
 
+# Concurrent sessions (rooms / microphones) one server accepts
+MAX_SESSIONS = int(os.getenv("TRANSCRIPTION_MAX_SESSIONS", "8"))
+
+# Every session's transcriber is built with these; the ready message reports them
+TRANSCRIBER_OPTIONS = {
+    'sample_rate': 16000,
+    'device': 'cpu',
+    'compute_type': 'int8',
+    'segmentation': 'pause',  # Windows end where the speaker pauses
+    'min_chunk_duration': 1.0,
+    'max_chunk_duration': 4.0,
+    'pause_duration': 0.35,
+    'chunk_duration': 2.0,  # Window length with 'fixed' segmentation
+    'overlap_duration': 0.5,  # Carried past windows cut mid-speech to prevent word loss
+}
+
+
+def segmentation_capabilities(options=TRANSCRIBER_OPTIONS):
+    """The window settings that apply to the transcriber's segmentation mode"""
+    if options['segmentation'] == 'pause':
+        keys = ('segmentation', 'min_chunk_duration', 'max_chunk_duration', 'pause_duration', 'overlap_duration')
+    else:
+        keys = ('segmentation', 'chunk_duration', 'overlap_duration')
+    return {key: options[key] for key in keys}
+
+
+def describe_segmentation(options=TRANSCRIBER_OPTIONS):
+    if options['segmentation'] == 'pause':
+        return (f"pause segmentation ({options['min_chunk_duration']}-{options['max_chunk_duration']}s windows, "
+                f"{options['pause_duration']}s pauses, {options['overlap_duration']}s overlap on forced cuts)")
+    return f"{options['chunk_duration']}s chunks and {options['overlap_duration']}s overlap"
+
 class TranscriptionServer:
-    def __init__(self):
-        """Initialize the transcription server with improved settings"""
-        self.transcriber = None
+    def __init__(self, protocol=PROTOCOL_VERSION, output=None, commands=None):
+        """
+        Initialize the transcription server with improved settings
+
+        Any number of sessions (up to MAX_SESSIONS) can record at once, each
+        from its own input device. Their transcribers share one model - the
+        registry loads it once per process - and take turns on it through one
+        FairScheduler. Every message sent carries the ``session_id`` it is
+        about (None for server-wide messages).
+
+        Args:
+            protocol: 2 for length-prefixed frames with transcript deltas,
+                1 for JSON lines with the full transcript (see bridge_protocol)
+            output, commands: Binary streams to Electron (default stdout/stdin)
+        """
+        self.protocol = protocol
+        self.sessions = {}  # session_id -> RealtimeTranscriber
+        self.scheduler = FairScheduler()
         self.running = True
-        self.command_thread = None
+        self.commands = commands or sys.stdin.buffer
+        # Sessions report from their own threads; one writer serializes and batches
+        self.writer = MessageWriter(output or sys.stdout.buffer, protocol)
         
-        # Initialize transcriber with improved parameters
-        self.transcriber = RealtimeTranscriber(
-            sample_rate=16000,
-            chunk_duration=2.0,  # Reduced from 3.0s to 2.0s for faster processing
-            overlap_duration=0.5,  # 0.5s overlap to prevent word loss
-            device="cpu",
-            compute_type="int8"
+        print(f"Improved transcription server initialized with {describe_segmentation()}", file=sys.stderr)
+    
+    def _create_transcriber(self, session_id, input_device):
+        """A transcriber with improved parameters, reporting as ``session_id``"""
+        transcriber = RealtimeTranscriber(
+            **TRANSCRIBER_OPTIONS,
+            input_device=input_device,
+            scheduler=self.scheduler,
+            # Version 2 clients keep the transcript from the deltas
+            send_full_transcript=self.protocol == LEGACY_VERSION
         )
         
         # Set up callbacks
-        self.transcriber.set_output_callback(self._handle_transcription_output)
-        self.transcriber.set_error_callback(self._handle_error)
-        
-        print("Improved transcription server initialized with 2.0s chunks and 0.5s overlap", file=sys.stderr)
+        transcriber.set_output_callback(
+            lambda data: self._send_message('transcription', data, session_id))
+        transcriber.set_error_callback(
+            lambda error: self._send_message('error', {'message': error}, session_id))
+        return transcriber
     
-    def _send_message(self, message_type, data):
-        """Send message to Electron via stdout"""
-        message = {
+    def _send_message(self, message_type, data, session_id=None):
+        """Queue a message to Electron (written by the writer thread)"""
+        self.writer.send({
             'type': message_type,
+            'session_id': session_id,
             'data': data,
             'timestamp': time.time()
-        }
-        print(json.dumps(message), flush=True)
+        })
+    
+    def _target_sessions(self, command):
+        """
+        Session ids a stop or clear command applies to
+
+        Without a ``session_id`` it applies to every session, as single-session
+        clients expect.
+        """
+        session_id = command.get('session_id')
+        if session_id is None:
+            return list(self.sessions)
+        return [session_id] if session_id in self.sessions else []
     
-    def _handle_transcription_output(self, data):
-        """Handle transcription output from the engine"""
-        self._send_message('transcription', data)
+    def _start_session(self, session_id, input_device):
+        """Start (or restart) one session; returns an error message or None"""
+        if session_id not in self.sessions and len(self.sessions) >= MAX_SESSIONS:
+            return f'Too many sessions (max {MAX_SESSIONS})'
+        for other_id, other in self.sessions.items():
+            if other_id != session_id and other.is_recording and other.input_device == input_device:
+                return f'Input device {input_device} is already used by session {other_id}'
+        
+        self._stop_session(session_id)
+        transcriber = self._create_transcriber(session_id, input_device)
+        self.sessions[session_id] = transcriber
+        if not transcriber.start_session(session_id):
+            self._stop_session(session_id)
+            return 'Failed to start session'
+        return None
+    
+    def _stop_session(self, session_id):
+        transcriber = self.sessions.pop(session_id, None)
+        if transcriber:
+            transcriber.stop_session()
+            self.scheduler.forget(session_id)
     
-    def _handle_error(self, error):
-        """Handle errors from the transcription engine"""
-        self._send_message('error', {'message': error})
+    def _list_devices(self):
+        """Input devices a session can be bound to"""
+        import sounddevice as sd
+        
+        default_input = sd.default.device[0]
+        return [
+            {
+                'id': index,
+                'name': device['name'],
+                'channels': device['max_input_channels'],
+                'default': index == default_input
+            }
+            for index, device in enumerate(sd.query_devices())
+            if device['max_input_channels'] > 0
+        ]
     
     def _handle_command(self, command):
         """Handle commands from Electron"""
@@ -54,30 +152,64 @@ class TranscriptionServer:
         
         if cmd_type == 'start':
             session_id = command.get('session_id', 'default')
-            success = self.transcriber.start_session(session_id)
+            input_device = command.get('device')
+            error = self._start_session(session_id, input_device)
             self._send_message('response', {
                 'command': 'start',
-                'success': success,
-                'session_id': session_id
-            })
+                'success': error is None,
+                'error': error,
+                'session_id': session_id,
+                'device': input_device
+            }, session_id)
             
         elif cmd_type == 'stop':
-            self.transcriber.stop_session()
+            stopped = self._target_sessions(command)
+            for session_id in stopped:
+                self._stop_session(session_id)
             self._send_message('response', {
                 'command': 'stop',
-                'success': True
-            })
+                'success': True,
+                'stopped': stopped
+            }, command.get('session_id'))
             
         elif cmd_type == 'clear':
-            self.transcriber.clear_transcript()
+            cleared = self._target_sessions(command)
+            for session_id in cleared:
+                self.sessions[session_id].clear_transcript()
             self._send_message('response', {
                 'command': 'clear',
-                'success': True
-            })
+                'success': True,
+                'cleared': cleared
+            }, command.get('session_id'))
             
         elif cmd_type == 'status':
-            status = self.transcriber.get_status()
-            self._send_message('status', status)
+            session_id = command.get('session_id')
+            if session_id is not None:
+                transcriber = self.sessions.get(session_id)
+                status = transcriber.get_status() if transcriber else {'error': f'Unknown session {session_id}'}
+            else:
+                status = {
+                    'sessions': {sid: t.get_status() for sid, t in self.sessions.items()},
+                    'max_sessions': MAX_SESSIONS,
+                    'scheduler': self.scheduler.get_stats()
+                }
+            self._send_message('status', status, session_id)
+            
+        elif cmd_type == 'transcript':
+            # Whole text, for a client that missed deltas or just attached
+            session_id = command.get('session_id')
+            transcriber = self.sessions.get(session_id)
+            if transcriber:
+                seq, text = transcriber.get_transcript()
+                self._send_message('transcript', {'seq': seq, 'full_transcript': text}, session_id)
+            else:
+                self._send_message('error', {'message': f'Unknown session {session_id}'}, session_id)
+            
+        elif cmd_type == 'devices':
+            try:
+                self._send_message('devices', {'devices': self._list_devices()})
+            except Exception as e:
+                self._send_message('error', {'message': f'Could not list audio devices: {e}'})
             
         elif cmd_type == 'quit':
             self.running = False
@@ -85,25 +217,21 @@ class TranscriptionServer:
         else:
             self._send_message('error', {
                 'message': f'Unknown command type: {cmd_type}'
-            })
+            }, command.get('session_id'))
     
     def _read_commands(self):
-        """Read commands from stdin in a separate thread"""
+        """Handle commands as they arrive, until quit or end of input"""
+        read = read_frame if self.protocol == PROTOCOL_VERSION else read_line
         while self.running:
             try:
-                line = sys.stdin.readline()
-                if not line:
+                command = read(self.commands)
+                if command is None:
                     break
-                
-                if line.strip():
-                    command = json.loads(line)
-                    self._handle_command(command)
-            except EOFError:
-                break
-            except json.JSONDecodeError as e:
-                self._send_message('error', {
-                    'message': f'Invalid JSON command: {str(e)}'
-                })
+                self._handle_command(command)
+            except ProtocolError as e:
+                self._send_message('error', {'message': str(e)})
+                if self.protocol == PROTOCOL_VERSION:
+                    break  # Framing is lost - nothing after this can be trusted
             except Exception as e:
                 self._send_message('error', {
                     'message': f'Error reading command: {str(e)}'
@@ -114,45 +242,55 @@ class TranscriptionServer:
         """Start the transcription server"""
         print("Improved transcription server starting...", file=sys.stderr)
         
+        features = [
+            'overlap_buffering',
+            'improved_responsiveness',
+            'reduced_word_loss',
+            'faster_processing',
+            'multi_session'
+        ]
+        if TRANSCRIBER_OPTIONS['segmentation'] == 'pause':
+            features.append('pause_segmentation')
+        if self.protocol == PROTOCOL_VERSION:
+            features.append('transcript_deltas')
+        
         # Send ready signal with improved capabilities
         self._send_message('ready', {
             'message': 'Improved transcription server ready',
+            'protocol': self.protocol,
             'capabilities': {
-                'device': 'cpu',
-                'compute_type': 'int8',
-                'sample_rate': 16000,
-                'chunk_duration': 2.0,  # Improved: reduced from 3.0s
-                'overlap_duration': 0.5,  # New: overlap buffering
+                'device': TRANSCRIBER_OPTIONS['device'],
+                'compute_type': TRANSCRIBER_OPTIONS['compute_type'],
+                'sample_rate': TRANSCRIBER_OPTIONS['sample_rate'],
+                **segmentation_capabilities(),
                 'blocksize': 1600,  # New: 0.1s blocksize for better responsiveness
-                'features': [
-                    'overlap_buffering',
-                    'improved_responsiveness',
-                    'reduced_word_loss',
-                    'faster_processing'
-                ]
+                'max_sessions': MAX_SESSIONS,
+                'features': features
             }
         })
         
-        # Start command reading thread
-        self.command_thread = threading.Thread(target=self._read_commands, daemon=True)
-        self.command_thread.start()
-        
-        # Keep main thread alive
+        # Commands are handled on this thread as they arrive - it blocks on
+        # stdin instead of polling
         try:
-            while self.running:
-                time.sleep(0.1)
+            self._read_commands()
         except KeyboardInterrupt:
             print("Received interrupt signal", file=sys.stderr)
         
         # Cleanup
-        if self.transcriber:
-            self.transcriber.stop_session()
+        for session_id in list(self.sessions):
+            self._stop_session(session_id)
+        self.writer.close()
         
         print("Improved transcription server stopped", file=sys.stderr)
 
 def main():
     """Main entry point"""
-    server = TranscriptionServer()
+    # Engine logs go to stderr; stdout carries the protocol to Electron
+    configure_logging()
+    parser = argparse.ArgumentParser(description='Real-time transcription server for Electron')
+    parser.add_argument('--protocol', type=int, choices=[LEGACY_VERSION, PROTOCOL_VERSION],
+                        default=PROTOCOL_VERSION, help='Wire protocol version (see bridge_protocol.py)')
+    server = TranscriptionServer(protocol=parser.parse_args().protocol)
     server.start()
 
 if __name__ == "__main__":
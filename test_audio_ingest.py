@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test the raw PCM (audio/l16) upload path of the audio ingest
+"""
+
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from audio_ingest import (  # noqa: E402
+    UnsupportedAudioError, decode_pcm16, decode_upload, is_pcm_content_type,
+)
+
+SAMPLES = np.array([0, 1, -1, 16384, -32768, 32767], dtype=np.int16)
+
+
+@pytest.mark.parametrize("content_type", [
+    "audio/l16",
+    "audio/L16; rate=16000; channels=1",
+    "audio/l16;rate=16000;endianness=little",
+])
+def test_little_endian_pcm_decodes_to_float32(content_type):
+    assert is_pcm_content_type(content_type)
+    audio = decode_pcm16(SAMPLES.astype('<i2').tobytes(), content_type)
+
+    assert audio.dtype == np.float32
+    np.testing.assert_array_equal(audio, SAMPLES / 32768.0)
+
+
+def test_big_endian_pcm_decodes_to_the_same_samples():
+    audio = decode_pcm16(SAMPLES.astype('>i2').tobytes(), "audio/l16; rate=16000; endianness=big")
+    np.testing.assert_array_equal(audio, SAMPLES / 32768.0)
+
+
+@pytest.mark.parametrize("content_type", [
+    "audio/l16;rate=abc",
+    "audio/l16;rate=16000;channels=mono",
+    "audio/l16;rate=16k",
+    "audio/l16;rate=44100",
+    "audio/l16;rate=16000;channels=2",
+])
+def test_malformed_or_unsupported_parameters_are_rejected(content_type):
+    with pytest.raises(UnsupportedAudioError):
+        decode_pcm16(SAMPLES.tobytes(), content_type)
+
+
+def test_odd_length_payload_is_rejected():
+    with pytest.raises(UnsupportedAudioError):
+        decode_pcm16(SAMPLES.tobytes()[:-1])
+
+
+def test_upload_with_a_malformed_header_is_unsupported_audio():
+    # The upload route answers UnsupportedAudioError with 415, anything else with 500
+    with pytest.raises(UnsupportedAudioError):
+        decode_upload(io.BytesIO(SAMPLES.tobytes()), "audio/l16;rate=abc")
+
+
+def test_empty_upload_decodes_to_no_samples():
+    assert decode_upload(io.BytesIO(b""), "audio/l16;rate=abc").size == 0
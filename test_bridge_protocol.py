@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the framed protocol between the stdio transcription server and Electron
+
+Pure byte streams - no model, audio device or Electron needed.
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from bridge_protocol import (  # noqa: E402
+    LEGACY_VERSION, MessageWriter, ProtocolError, coalesce, encode_frame, read_frame, read_line
+)
+
+
+def delta(session_id, seq, text, timestamp=0.0):
+    return {
+        'type': 'transcription',
+        'session_id': session_id,
+        'data': {'type': 'transcription', 'text': text, 'seq': seq},
+        'timestamp': timestamp,
+    }
+
+
+def test_frames_round_trip():
+    messages = [delta('room-a', 1, 'the court'), {'type': 'ready', 'session_id': None, 'data': {'text': 'é ✓'}}]
+    stream = io.BytesIO(b''.join(encode_frame(message) for message in messages))
+
+    assert [read_frame(stream), read_frame(stream)] == messages
+    assert read_frame(stream) is None
+
+
+def test_bad_frames_raise_protocol_error():
+    frame = encode_frame({'type': 'status'})
+    with pytest.raises(ProtocolError):
+        read_frame(io.BytesIO(b'\x01' + frame[1:]))  # wrong version
+    with pytest.raises(ProtocolError):
+        read_frame(io.BytesIO(frame[:-1]))  # truncated payload
+    with pytest.raises(ProtocolError):
+        read_line(io.BytesIO(b'not json\n'))
+
+
+def test_coalesce_merges_each_sessions_deltas_in_order():
+    clear = {'type': 'transcription', 'session_id': 'room-a',
+             'data': {'type': 'clear', 'seq': 3}, 'timestamp': 2.0}
+    merged = coalesce([
+        delta('room-a', 1, 'the court', 1.0),
+        delta('room-b', 7, 'objection'),
+        delta('room-a', 2, 'will now hear', 1.5),
+        clear,
+        delta('room-a', 4, 'counsel'),
+    ])
+
+    assert [m['session_id'] for m in merged] == ['room-a', 'room-b', 'room-a', 'room-a']
+    assert merged[0]['data'] == {'type': 'transcription', 'text': 'the court will now hear', 'seq': 2, 'from_seq': 1}
+    # The oldest delta's timestamp, so latency isn't understated
+    assert merged[0]['timestamp'] == 1.0
+    assert merged[2] is clear
+    assert merged[3]['data']['text'] == 'counsel'
+
+
+def test_writer_flushes_everything_on_close():
+    stream = io.BytesIO()
+    writer = MessageWriter(stream, coalesce_ms=50)
+    for seq in range(1, 101):
+        writer.send(delta('room-a', seq, f'w{seq}'))
+    writer.close()
+
+    stream.seek(0)
+    frames = []
+    while (message := read_frame(stream)) is not None:
+        frames.append(message)
+    text = ' '.join(frame['data']['text'] for frame in frames)
+    assert text.split() == [f'w{seq}' for seq in range(1, 101)]
+    assert frames[-1]['data']['seq'] == 100
+    assert writer.stats['messages'] == 100 and writer.stats['frames'] == len(frames)
+
+
+def test_legacy_writer_sends_one_line_per_message():
+    stream = io.BytesIO()
+    writer = MessageWriter(stream, version=LEGACY_VERSION)
+    for seq in (1, 2):
+        writer.send(delta('room-a', seq, 'text'))
+    writer.close()
+
+    stream.seek(0)
+    assert [read_line(stream)['data']['seq'], read_line(stream)['data']['seq']] == [1, 2]
+    assert read_line(stream) is None
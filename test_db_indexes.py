@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test that every hot query uses an index once db_indexes has run
+
+Seeds a scratch database on a local mongod with thousands of proceedings
+(so the planner has a real choice to make), bootstraps the indexes and
+asserts that no hot query plan contains a COLLSCAN.
+
+Needs a local mongod; set TEST_MONGO_URI to use another one. Skipped when
+none is reachable.
+"""
+
+import os
+import sys
+import uuid
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from db_indexes import HOT_QUERIES, ensure_indexes, verify_query_plans
+from mongo_connection import create_client
+
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI", "mongodb://localhost:27017")
+TEST_DB_NAME = "courtroom_index_test"
+PROCEEDINGS = 5000
+
+
+@pytest.fixture(scope="module")
+def db():
+    client = create_client(TEST_MONGO_URI, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except ServerSelectionTimeoutError:
+        pytest.skip(f"No mongod reachable at {TEST_MONGO_URI}")
+
+    client.drop_database(TEST_DB_NAME)
+    database = client[TEST_DB_NAME]
+
+    clerks = [f"CLERK{i:03d}" for i in range(50)]
+    judges = [f"JUDGE{i:03d}" for i in range(50)]
+    database.clerks.insert_many([{"matricule": m, "name": m} for m in clerks])
+    database.judges.insert_many([{"matricule": m, "name": m} for m in judges])
+    database.proceedings.insert_many([{
+        "proceeding_id": str(uuid.uuid4()),
+        "case_number": f"CASE-{i}",
+        "clerk_matricule": clerks[i % len(clerks)],
+        "judge_matricule": judges[i % len(judges)],
+        "schedule_datetime": f"2025-01-{i % 28 + 1:02d}T09:00:00",
+        "status": "scheduled"
+    } for i in range(PROCEEDINGS)])
+    database["fs.files"].insert_many([{
+        "filename": f"transcript_{i}",
+        "length": 0,
+        "chunkSize": 261120
+    } for i in range(PROCEEDINGS)])
+    database.transcript_segments.insert_many([{
+        "proceeding_id": str(i % 500),
+        "seq": i // 500,
+        "offset": 0,
+        "end": 0,
+        "text": ""
+    } for i in range(PROCEEDINGS)])
+
+    assert ensure_indexes(database) == []
+    yield database
+    client.drop_database(TEST_DB_NAME)
+
+
+def test_ensure_indexes_is_idempotent(db):
+    assert ensure_indexes(db) == []
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(db, query):
+    result, = verify_query_plans(db, [query])
+    assert result["uses_index"], f"{result['description']}: {result['stages']}"
+    assert "COLLSCAN" not in result["stages"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test the packed float32 face encoding format and the migration to it
+
+The migration test runs against mongomock (skipped when it isn't installed).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from bson.binary import Binary
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from face_encodings import (  # noqa: E402
+    ENCODING_SIZE, FACE_ENCODING_VERSION, migrate_face_encodings, pack_encoding, unpack_encoding,
+)
+
+
+def legacy_encoding(seed):
+    """A version 1 encoding: 128 Python floats, as face_recognition's float64 output was stored"""
+    return np.random.default_rng(seed).normal(0, 0.1, ENCODING_SIZE).tolist()
+
+
+def test_float64_list_round_trips_as_float32():
+    encoding = legacy_encoding(1)
+    packed = pack_encoding(encoding)
+
+    assert isinstance(packed, Binary) and len(packed) == ENCODING_SIZE * 4
+    unpacked = unpack_encoding(packed)
+    assert unpacked.dtype == np.float32 and unpacked.shape == (ENCODING_SIZE,)
+    np.testing.assert_array_equal(unpacked, np.asarray(encoding, dtype=np.float32))
+    np.testing.assert_allclose(unpacked, encoding, rtol=1e-6)
+    # Legacy lists read back the same as their packed form
+    np.testing.assert_array_equal(unpack_encoding(encoding), unpacked)
+
+
+@pytest.mark.parametrize("stored", [
+    Binary(b""),
+    Binary(bytes(ENCODING_SIZE * 4 - 4)),
+    Binary(bytes(ENCODING_SIZE * 4 + 1)),
+    bytes(ENCODING_SIZE * 8),  # float64 bytes
+    [0.0] * (ENCODING_SIZE - 1),
+    [[0.0] * ENCODING_SIZE],
+])
+def test_wrong_length_encodings_are_rejected(stored):
+    with pytest.raises(ValueError):
+        unpack_encoding(stored)
+
+
+def test_migration_rewrites_legacy_documents():
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().courtroom
+    current = pack_encoding(legacy_encoding(3))
+    db.clerks.insert_many([
+        {"matricule": "CLERK001", "face_encoding": legacy_encoding(1)},
+        {"matricule": "CLERK002", "face_encoding": current, "face_encoding_version": 2},
+        {"matricule": "CLERK003"},
+        {"matricule": "CLERK004", "face_encoding": [0.5] * 3},  # Malformed: left alone
+    ])
+    db.judges.insert_one({"matricule": "JUDGE001", "face_encoding": legacy_encoding(2)})
+
+    assert migrate_face_encodings(db) == 2
+
+    for collection, matricule, seed in (("clerks", "CLERK001", 1), ("judges", "JUDGE001", 2)):
+        user = db[collection].find_one({"matricule": matricule})
+        assert user["face_encoding_version"] == FACE_ENCODING_VERSION
+        np.testing.assert_array_equal(unpack_encoding(user["face_encoding"]),
+                                      np.asarray(legacy_encoding(seed), dtype=np.float32))
+    assert db.clerks.find_one({"matricule": "CLERK002"})["face_encoding"] == current
+    assert "face_encoding" not in db.clerks.find_one({"matricule": "CLERK003"})
+    assert db.clerks.find_one({"matricule": "CLERK004"})["face_encoding"] == [0.5] * 3
+
+    # Already migrated documents are not touched again
+    assert migrate_face_encodings(db) == 0
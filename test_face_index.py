@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory face index used for face login
+
+Only numpy is needed: the database is a dict of stored documents, and
+encodings are random 128-d vectors at face_recognition's scale.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from face_encodings import pack_encoding  # noqa: E402
+from face_index import AMBIGUOUS, ENCODING_SIZE, NOT_RECOGNIZED, FaceIndex  # noqa: E402
+
+# Same values as app.py's face login
+THRESHOLD = 0.6
+MARGIN = 0.05
+
+
+class FakeCollection:
+    def __init__(self, users):
+        self.users = users
+
+    def find(self, query, projection=None):
+        return [user for user in self.users if user.get("face_encoding") is not None]
+
+
+def make_index(users_by_collection, capacity=256):
+    db = {name: FakeCollection(users) for name, users in users_by_collection.items()}
+    return FaceIndex(db, collections=tuple(db), capacity=capacity)
+
+
+def random_encodings(rng, count):
+    return rng.normal(0, 0.1, size=(count, ENCODING_SIZE)).astype(np.float32)
+
+
+def brute_force(encodings, keys, query, k):
+    distances = np.linalg.norm(encodings.astype(np.float64) - query.astype(np.float64), axis=1)
+    order = np.argsort(distances)[:k]
+    return [(distances[i], *keys[i]) for i in order]
+
+
+def assert_same_matches(found, expected):
+    assert [match[1:] for match in found] == [match[1:] for match in expected]
+    assert [match[0] for match in found] == pytest.approx([match[0] for match in expected], abs=1e-4)
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(1)
+    encodings = random_encodings(rng, 300)
+    keys = [("clerks" if i % 2 else "judges", f"M{i}") for i in range(300)]
+    index = make_index({
+        "clerks": [{"matricule": m, "face_encoding": pack_encoding(e)}
+                   for (c, m), e in zip(keys, encodings) if c == "clerks"],
+        # Legacy list-format encodings load too
+        "judges": [{"matricule": m, "face_encoding": e.tolist()}
+                   for (c, m), e in zip(keys, encodings) if c == "judges"],
+    })
+    index.load()
+    # Rows follow load order, not key order
+    rows = [index._keys.index(key) for key in keys]
+    assert len(index) == 300 and sorted(rows) == list(range(300))
+
+    for query in list(random_encodings(rng, 20)) + [encodings[17] + 0.001]:
+        for k in (1, 2, 5):
+            assert_same_matches(index.nearest(query, k=k), brute_force(encodings, keys, query, k))
+    assert index.nearest(encodings[17], k=1)[0][1:] == keys[17]
+
+
+def test_index_grows_past_its_initial_capacity():
+    rng = np.random.default_rng(2)
+    index = make_index({"clerks": []}, capacity=2)
+    index.load()
+    encodings = random_encodings(rng, 9)
+    for i, encoding in enumerate(encodings):
+        index.update("clerks", f"C{i}", encoding)
+
+    assert len(index) == 9 and len(index._matrix) == 16
+    for i, encoding in enumerate(encodings):
+        np.testing.assert_array_equal(index.get("clerks", f"C{i}"), encoding)
+    keys = [("clerks", f"C{i}") for i in range(9)]
+    query = random_encodings(rng, 1)[0]
+    assert_same_matches(index.nearest(query, k=9), brute_force(encodings, keys, query, 9))
+
+
+def test_update_replaces_and_remove_drops_a_key():
+    rng = np.random.default_rng(3)
+    encodings = random_encodings(rng, 5)
+    index = make_index({"judges": [{"matricule": f"J{i}", "face_encoding": pack_encoding(e)}
+                                   for i, e in enumerate(encodings)]})
+    index.load()
+
+    # Re-registering replaces the row rather than adding one
+    replacement = random_encodings(rng, 1)[0]
+    index.update("judges", "J1", replacement)
+    assert len(index) == 5
+    assert index.nearest(replacement, k=1)[0][1:] == ("judges", "J1")
+    assert index.nearest(encodings[1], k=1)[0][1:] != ("judges", "J1")
+
+    # Removing a middle row moves the last one into its place
+    index.remove("judges", "J2")
+    assert len(index) == 4 and index.get("judges", "J2") is None
+    np.testing.assert_array_equal(index.get("judges", "J4"), encodings[4])
+    assert index.nearest(encodings[4], k=1)[0][1:] == ("judges", "J4")
+    assert ("judges", "J2") not in [match[1:] for match in index.nearest(encodings[2], k=4)]
+
+    index.remove("judges", "J4")  # The last row
+    index.remove("judges", "unknown")
+    assert sorted(index._keys) == [("judges", "J0"), ("judges", "J1"), ("judges", "J3")]
+    for i in (0, 3):
+        assert index.nearest(encodings[i], k=1)[0][1:] == ("judges", f"J{i}")
+
+
+def test_identify_refuses_unknown_and_ambiguous_faces():
+    rng = np.random.default_rng(4)
+    alice, bob = random_encodings(rng, 2)
+    # Someone nearly identical to alice
+    twin = alice + np.full(ENCODING_SIZE, 0.002, dtype=np.float32)
+    index = make_index({"clerks": [{"matricule": "ALICE", "face_encoding": pack_encoding(alice)},
+                                   {"matricule": "BOB", "face_encoding": pack_encoding(bob)}]})
+
+    match, reason = index.identify(bob + 0.001, THRESHOLD, MARGIN)
+    assert reason is None and match[1:] == ("clerks", "BOB") and match[0] < 0.05
+
+    stranger = random_encodings(rng, 1)[0] * 10
+    assert index.identify(stranger, THRESHOLD, MARGIN) == (None, NOT_RECOGNIZED)
+
+    index.update("clerks", "TWIN", twin)
+    assert index.identify(alice, THRESHOLD, MARGIN) == (None, AMBIGUOUS)
+    # bob is still told apart from everyone
+    assert index.identify(bob, THRESHOLD, MARGIN)[0][1:] == ("clerks", "BOB")
+
+    assert make_index({"clerks": []}).identify(alice, THRESHOLD, MARGIN) == (None, NOT_RECOGNIZED)
+
+
+def test_load_skips_malformed_encodings():
+    rng = np.random.default_rng(5)
+    encoding = random_encodings(rng, 1)[0]
+    index = make_index({"clerks": [{"matricule": "GOOD", "face_encoding": pack_encoding(encoding)},
+                                   {"matricule": "TRUNCATED", "face_encoding": pack_encoding(encoding)[:64]}]})
+
+    assert index.nearest(encoding, k=2)[0][1:] == ("clerks", "GOOD")
+    assert len(index) == 1 and index.get("clerks", "TRUNCATED") is None
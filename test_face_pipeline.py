@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test the face pipeline's downscaled detection and face-region encoding
+
+face_recognition is stubbed: the tests check what the detector and encoder
+are given and how boxes are mapped between the detection copy and the
+full-resolution frame, not dlib itself.
+"""
+
+import base64
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import face_pipeline  # noqa: E402
+from face_pipeline import FaceImageError  # noqa: E402
+
+
+class StubDetector:
+    """Stands in for face_recognition, recording every call"""
+
+    def __init__(self, locations):
+        self.locations = locations
+        self.detections = []
+        self.encodings = []
+
+    def face_locations(self, image, number_of_times_to_upsample=1, model="hog"):
+        self.detections.append((image.shape, number_of_times_to_upsample, model))
+        return self.locations
+
+    def face_encodings(self, image, known_face_locations=None):
+        self.encodings.append((image.copy(), known_face_locations))
+        return [np.zeros(128)]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    def install(locations):
+        detector = StubDetector(locations)
+        monkeypatch.setattr(face_pipeline, "face_recognition", detector)
+        return detector
+    return install
+
+
+def synthetic_frame(height=480, width=640):
+    """Each pixel encodes its own coordinates, so a crop shows where it came from"""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:, :, 0] = (np.arange(height) % 256)[:, None]
+    frame[:, :, 1] = (np.arange(width) % 256)[None, :]
+    return frame
+
+
+def test_boxes_found_on_the_downscaled_copy_map_back_to_full_resolution(stub):
+    # 640x480 is searched at 320x240, so every coordinate doubles
+    detector = stub([(40, 200, 140, 100), (0, 320, 240, 250)])
+    boxes = face_pipeline.detect_faces(synthetic_frame(), model="hog", upsample=1, max_side=320)
+
+    assert detector.detections == [((240, 320, 3), 1, "hog")]
+    assert boxes == [(80, 400, 280, 200), (0, 640, 480, 500)]
+
+
+def test_mapped_boxes_stay_inside_the_frame(stub):
+    # 1000x750 at max_side 333: the scale is not a round number
+    detector = stub([(0, 333, 250, 0), (17, 101, 83, 35)])
+    boxes = face_pipeline.detect_faces(synthetic_frame(750, 1000), max_side=333)
+
+    assert detector.detections[0][0] == (250, 333, 3)
+    scale = 333 / 1000
+    assert boxes[0] == (0, 1000, 750, 0)
+    top, right, bottom, left = boxes[1]
+    assert (top, right, bottom, left) == (
+        int(17 / scale), round(101 / scale), round(83 / scale), int(35 / scale))
+
+
+def test_small_frames_are_searched_as_they_are(stub):
+    detector = stub([(10, 90, 70, 30)])
+    boxes = face_pipeline.detect_faces(synthetic_frame(120, 160), max_side=320)
+
+    assert detector.detections[0][0] == (120, 160, 3)
+    assert boxes == [(10, 90, 70, 30)]
+
+
+def test_detector_settings_fall_back_to_the_configured_defaults(stub, monkeypatch):
+    monkeypatch.setattr(face_pipeline, "DETECTION_MODEL", "cnn")
+    monkeypatch.setattr(face_pipeline, "UPSAMPLE", 2)
+    monkeypatch.setattr(face_pipeline, "DETECTION_MAX_SIDE", 160)
+    detector = stub([])
+
+    face_pipeline.detect_faces(synthetic_frame())
+    # An explicit 0 upsample is honoured, not replaced by the default
+    face_pipeline.detect_faces(synthetic_frame(), model="hog", upsample=0, max_side=320)
+
+    assert detector.detections == [((120, 160, 3), 2, "cnn"), ((240, 320, 3), 0, "hog")]
+
+
+def test_only_the_face_region_is_encoded(stub):
+    frame = synthetic_frame()
+    detector = stub([])
+    box = (80, 400, 280, 200)  # 200x200 face, 100 px margin on each side
+    face_pipeline.encode_face(frame, box)
+
+    roi, locations = detector.encodings[0]
+    np.testing.assert_array_equal(roi, frame[0:380, 100:500])
+    assert locations == [(80, 300, 280, 100)]
+    top, right, bottom, left = locations[0]
+    # The box inside the crop covers the same pixels as in the frame
+    np.testing.assert_array_equal(roi[top:bottom, left:right], frame[80:280, 200:400])
+
+
+def test_a_face_found_at_low_resolution_is_encoded_from_full_resolution_pixels(stub, monkeypatch):
+    frame = synthetic_frame()
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, format="PNG")
+    image_data = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+    monkeypatch.setattr(face_pipeline, "DETECTION_MAX_SIDE", 320)
+    detector = stub([(40, 200, 140, 100)])
+
+    face_pipeline.single_face_encoding(image_data)
+
+    roi, [(top, right, bottom, left)] = detector.encodings[0]
+    np.testing.assert_array_equal(roi[top:bottom, left:right], frame[80:280, 200:400])
+
+
+def test_frames_without_exactly_one_face_are_refused(stub, monkeypatch):
+    buffer = io.BytesIO()
+    Image.fromarray(synthetic_frame()).save(buffer, format="PNG")
+    image_data = base64.b64encode(buffer.getvalue()).decode()
+
+    stub([])
+    with pytest.raises(FaceImageError, match="No face"):
+        face_pipeline.single_face_encoding(image_data)
+    stub([(40, 200, 140, 100), (40, 300, 140, 220)])
+    with pytest.raises(FaceImageError, match="Multiple faces"):
+        face_pipeline.single_face_encoding(image_data)
+
+    monkeypatch.setattr(face_pipeline, "MAX_INPUT_PIXELS", 640 * 480 - 1)
+    with pytest.raises(FaceImageError, match="too large"):
+        face_pipeline.single_face_encoding(image_data)
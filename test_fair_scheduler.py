@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the fair turns real-time sessions take on the shared Whisper model
+
+No model or audio is needed: sessions are threads holding a turn for a
+fixed time.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from fair_scheduler import FairScheduler  # noqa: E402
+
+
+def test_waiting_sessions_are_served_in_arrival_order():
+    scheduler = FairScheduler(slots=1)
+    order = []
+    holding = threading.Event()
+    release = threading.Event()
+
+    def first():
+        with scheduler.turn('room-a'):
+            holding.set()
+            release.wait()
+            order.append('room-a')
+
+    def later(session_id):
+        with scheduler.turn(session_id):
+            order.append(session_id)
+
+    threading.Thread(target=first).start()
+    holding.wait()
+    threads = []
+    for session_id in ('room-b', 'room-c', 'room-d'):
+        thread = threading.Thread(target=later, args=(session_id,))
+        thread.start()
+        threads.append(thread)
+        # Let each one queue up before the next
+        while scheduler.get_stats()['waiting'] < len(threads):
+            time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert order == ['room-a', 'room-b', 'room-c', 'room-d']
+    assert scheduler.get_stats()['busy'] == 0
+
+
+def test_busy_session_cannot_starve_another():
+    scheduler = FairScheduler(slots=1)
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            with scheduler.turn('busy'):
+                time.sleep(0.002)
+
+    worker = threading.Thread(target=busy)
+    worker.start()
+    for _ in range(5):
+        with scheduler.turn('quiet'):
+            pass
+    stop.set()
+    worker.join()
+
+    stats = scheduler.get_stats()['sessions']
+    assert stats['quiet']['turns'] == 5
+    # Each quiet turn waited for at most the busy session's current window
+    assert stats['quiet']['wait_seconds'] < 5 * 0.1
+
+
+def test_slots_bound_concurrent_turns():
+    scheduler = FairScheduler(slots=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def session(session_id):
+        with scheduler.turn(session_id):
+            with lock:
+                active.append(session_id)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(session_id)
+
+    threads = [threading.Thread(target=session, args=(f'room-{i}',)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+    scheduler.forget('room-0')
+    assert 'room-0' not in scheduler.get_stats()['sessions']
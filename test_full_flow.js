@@ -14,7 +14,7 @@ async function testFullFlow() {
         console.log('✓ Received transcription:', data);
         console.log('  Type:', data.type);
         console.log('  Text:', data.text);
-        console.log('  Full transcript:', data.full_transcript);
+        console.log('  Seq:', data.seq);
     });
     
     manager.onError((error) => {
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Test the cross-session batched inference scheduler
+
+No model is needed. In-process decoding runs on a fake WhisperModel whose
+decoder answers from a script keyed on each chunk's first sample; with a
+worker pool, a fake pool hands each batch to the test, which answers it
+when it chooses.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import faster_whisper.tokenizer
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from inference_scheduler import InferenceScheduler, SchedulerBusyError, transcribe_batch  # noqa: E402
+
+REPETITIVE, UNSURE, SILENT = 100, 101, 102
+NON_SPEECH = [220, 221]
+
+
+class FakeTokenizer:
+    sot, sot_prev, sot_lm, transcribe, translate = 50258, 50361, 50360, 50359, 50358
+    no_timestamps, no_speech, eot = 50363, 50362, 50257
+    non_speech_tokens = NON_SPEECH
+
+    def __init__(self, hf_tokenizer, multilingual, task=None, language=None):
+        self.sot_sequence = (self.sot, self.transcribe)
+
+    def decode(self, tokens):
+        return " ".join(f"w{token}" for token in tokens)
+
+
+class FakeExtractor:
+    nb_max_frames = 3000
+    n_samples = 480000
+
+    def __call__(self, audio):
+        # The label survives into the "encoder output"
+        return np.full((80, 10), audio[0], dtype=np.float32)
+
+
+class FakeModel:
+    """Decodes chunk N to "wN"; some labels decode badly in a batch"""
+
+    def __init__(self):
+        self.feature_extractor = FakeExtractor()
+        self.model = self
+        self.is_multilingual = False
+        self.hf_tokenizer = None
+        self.max_length = 448
+        self.batches = []
+        self.singles = []
+        self.generate_options = None
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def encode(self, features):
+        return features
+
+    def generate(self, encoder_output, prompts, **options):
+        self.gate.wait()
+        labels = [int(features[0, 0]) for features in encoder_output]
+        self.batches.append(labels)
+        self.generate_options = options
+        results = []
+        for label in labels:
+            tokens, score, no_speech_prob = [label], -0.1, 0.01
+            if label == REPETITIVE:
+                tokens = [7] * 60
+            # One token: Whisper's average logprob is half the score
+            elif label == UNSURE:
+                score, no_speech_prob = -3.0, 0.1
+            elif label == SILENT:
+                score, no_speech_prob = -3.0, 0.7
+            results.append(SimpleNamespace(
+                sequences_ids=[tokens + [FakeTokenizer.eot]], scores=[score],
+                no_speech_prob=no_speech_prob))
+        return results
+
+    def transcribe(self, audio, **options):
+        self.gate.wait()
+        label = int(audio[0])
+        self.batches.append([label])
+        self.singles.append(label)
+        return [SimpleNamespace(text=f" w{label}", no_speech_prob=0.01)], None
+
+
+def chunk(label):
+    return np.full(1600, label, dtype=np.float32)
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(faster_whisper.tokenizer, 'Tokenizer', FakeTokenizer)
+    return FakeModel()
+
+
+def test_batch_suppresses_non_speech_and_retries_bad_decodes(model):
+    texts = transcribe_batch(model, [chunk(1), chunk(REPETITIVE), chunk(UNSURE), chunk(SILENT)])
+
+    assert model.batches[0] == [1, REPETITIVE, UNSURE, SILENT]
+    # Too repetitive or too unlikely: decoded again on their own
+    assert model.singles == [REPETITIVE, UNSURE]
+    assert texts == ["w1", f"w{REPETITIVE}", f"w{UNSURE}", ""]
+
+    suppressed = model.generate_options['suppress_tokens']
+    assert -1 not in suppressed
+    assert set(NON_SPEECH) <= set(suppressed)
+    assert {FakeTokenizer.sot, FakeTokenizer.no_speech} <= set(suppressed)
+
+
+def test_scheduler_batches_one_chunk_per_session_in_order(model):
+    scheduler = InferenceScheduler(lambda: model, max_batch_size=4, max_wait_ms=20, max_queue_size=16)
+    try:
+        model.gate.clear()
+        results = {'room-a': [], 'room-b': [], 'room-c': []}
+        futures = [scheduler.submit('room-a', chunk(0), on_result=results['room-a'].append)]
+        wait_until(lambda: scheduler.get_stats()['queue_depth'] == 0)
+        for label, session_id in [(1, 'room-a'), (2, 'room-a'), (10, 'room-b'),
+                                  (11, 'room-b'), (20, 'room-c')]:
+            futures.append(scheduler.submit(session_id, chunk(label), on_result=results[session_id].append))
+        model.gate.set()
+
+        for future in futures:
+            future.result(timeout=5)
+        assert results == {'room-a': ['w0', 'w1', 'w2'], 'room-b': ['w10', 'w11'], 'room-c': ['w20']}
+        for batch in model.batches:
+            sessions = [label // 10 for label in batch]
+            assert len(sessions) == len(set(sessions))
+        assert max(len(batch) for batch in model.batches) > 1
+        assert scheduler.get_stats()['completed'] == 6
+    finally:
+        scheduler.shutdown()
+
+
+def test_full_queue_raises_scheduler_busy(model):
+    scheduler = InferenceScheduler(lambda: model, max_batch_size=1, max_wait_ms=1, max_queue_size=2)
+    try:
+        model.gate.clear()
+        first = scheduler.submit('room-a', chunk(0))
+        # The scheduler takes it and is stuck decoding
+        wait_until(lambda: scheduler.get_stats()['queue_depth'] == 0)
+        queued = [scheduler.submit('room-b', chunk(10)), scheduler.submit('room-c', chunk(20))]
+        with pytest.raises(SchedulerBusyError):
+            scheduler.submit('room-d', chunk(30), submit_timeout=0.1)
+        assert scheduler.get_stats()['rejected'] == 1
+
+        model.gate.set()
+        assert [future.result(timeout=5) for future in [first] + queued] == ['w0', 'w10', 'w20']
+    finally:
+        scheduler.shutdown()
+
+
+class FakePool:
+    """Idle workers plus the batches handed to them, answered by the test"""
+
+    def __init__(self, workers=1):
+        self.idle = queue.Queue()
+        for worker in range(workers):
+            self.idle.put(worker)
+        self.batches = queue.Queue()
+
+    def acquire(self, timeout=None):
+        try:
+            return self.idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, worker):
+        self.idle.put(worker)
+
+    def submit(self, worker, audios, language, beam_size):
+        future = Future()
+        self.batches.put((worker, audios, future))
+        return future
+
+    def next_batch(self):
+        return self.batches.get(timeout=2)
+
+    def answer(self, batch):
+        worker, audios, future = batch
+        future.set_result(([f"text {audio}" for audio in audios], 0.0))
+        self.release(worker)
+
+
+@pytest.fixture
+def pool():
+    return FakePool(workers=2)
+
+
+@pytest.fixture
+def scheduler(pool):
+    scheduler = InferenceScheduler(lambda: None, max_batch_size=4, max_wait_ms=20,
+                                   max_queue_size=3, pool=pool)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_chunks_held_behind_a_busy_worker_count_toward_backpressure(scheduler, pool):
+    scheduler.submit('room-a', 'a0')
+    first = pool.next_batch()
+    assert first[1] == ['a0']
+
+    # room-a is on a worker, so its later chunks wait in the bounded queue
+    # even though the other worker is idle
+    futures = [scheduler.submit('room-a', f'a{i}') for i in range(1, 4)]
+    assert scheduler.get_stats()['queue_depth'] == 3
+    with pytest.raises(SchedulerBusyError):
+        scheduler.submit('room-a', 'a4', submit_timeout=0.1)
+    assert scheduler.get_stats()['rejected'] == 1
+
+    # Each answer frees room-a for exactly one more chunk, in order
+    pool.answer(first)
+    for i, future in enumerate(futures, start=1):
+        batch = pool.next_batch()
+        assert batch[1] == [f'a{i}']
+        assert not future.done()
+        pool.answer(batch)
+        assert future.result(timeout=2) == f'text a{i}'
+    assert scheduler.get_stats()['queue_depth'] == 0
+
+
+def test_other_sessions_pass_a_session_on_a_worker(scheduler, pool):
+    scheduler.submit('room-a', 'a0')
+    first = pool.next_batch()
+    held = scheduler.submit('room-a', 'a1')
+    passed = scheduler.submit('room-b', 'b0')
+
+    batch = pool.next_batch()
+    assert batch[1] == ['b0']
+    pool.answer(batch)
+    assert passed.result(timeout=2) == 'text b0'
+    assert not held.done()
+
+    pool.answer(first)
+    pool.answer(pool.next_batch())
+    assert held.result(timeout=2) == 'text a1'
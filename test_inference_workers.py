@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the inference worker pool with stub workers
+
+No model is needed: the pool starts a small script in place of the Whisper
+worker. It speaks the same protocol and answers each chunk with its length
+and first sample, read back from the shared-memory slab. Given ``crash`` or
+``hang`` it exits or stalls on the first batch of the test, then echoes
+again once restarted.
+"""
+
+import os
+import sys
+import textwrap
+import time
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+import inference_workers  # noqa: E402
+from inference_scheduler import InferenceScheduler  # noqa: E402
+from inference_workers import WorkerCrashedError, WorkerPool  # noqa: E402
+
+STUB_WORKER = textwrap.dedent('''
+    import argparse, json, os, random, sys, time
+    from multiprocessing import resource_tracker, shared_memory
+
+    import numpy as np
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mode')
+    parser.add_argument('marker')
+    parser.add_argument('--slab', required=True)
+    args, _ = parser.parse_known_args()
+
+    slab = shared_memory.SharedMemory(name=args.slab)
+    resource_tracker.unregister(slab._name, 'shared_memory')
+    samples = np.ndarray((slab.size // 4,), dtype=np.float32, buffer=slab.buf)
+
+    def reply(message):
+        sys.stdout.write(json.dumps(message) + '\\n')
+        sys.stdout.flush()
+
+    reply({'type': 'ready', 'load_seconds': 0})
+    for line in sys.stdin:
+        job = json.loads(line)
+        if args.mode != 'echo' and not os.path.exists(args.marker):
+            open(args.marker, 'w').close()
+            if args.mode == 'crash':
+                os._exit(3)
+            time.sleep(3600)
+        # Uneven decode times, so workers answer out of order
+        time.sleep(random.uniform(0, 0.02))
+        texts = ['%d:%g' % (length, samples[offset]) for offset, length in job['chunks']]
+        reply({'id': job['id'], 'texts': texts, 'cpu_seconds': 0.0})
+''')
+
+
+def wait_until(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def start_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference_workers, 'RESTART_DELAY', 0.05)
+    stub = tmp_path / 'stub_worker.py'
+    stub.write_text(STUB_WORKER)
+    pools = []
+
+    def start(mode='echo', workers=1, **kwargs):
+        command = [sys.executable, str(stub), mode, str(tmp_path / 'tripped')]
+        pool = WorkerPool(workers=workers, size='stub', device='cpu', compute_type='int8',
+                          max_batch_size=2, nice=0, worker_command=command, **kwargs)
+        pools.append(pool)
+        wait_until(lambda: all(worker.loaded for worker in pool.workers))
+        return pool
+
+    yield start
+    for pool in pools:
+        pool.close()
+
+
+def decode(pool, audios):
+    worker = pool.acquire(timeout=5)
+    assert worker is not None
+    return pool.submit(worker, audios).result(timeout=10)
+
+
+def test_batch_round_trips_through_the_slab(start_pool):
+    pool = start_pool()
+    assert pool.handle.wait(timeout=5) is pool
+
+    audios = [np.full(16000, 0.25, dtype=np.float32), np.full(8000, -0.5, dtype=np.float32)]
+    texts, cpu_seconds = decode(pool, audios)
+    assert texts == ['16000:0.25', '8000:-0.5']
+    # The slab is reused for the next batch
+    assert decode(pool, [np.full(4000, 0.75, dtype=np.float32)])[0] == ['4000:0.75']
+
+
+def test_crash_fails_the_batch_and_restarts_the_worker(start_pool):
+    pool = start_pool('crash')
+    worker = pool.acquire(timeout=5)
+    future = pool.submit(worker, [np.zeros(1600, dtype=np.float32)])
+    with pytest.raises(WorkerCrashedError):
+        future.result(timeout=10)
+
+    # The exit is handled on the reader thread, just after the batch fails
+    wait_until(lambda: pool.get_stats()['restarts'] == 1)
+    assert pool.get_stats()['crashed_jobs'] == 1
+    # Backoff doubles for the next crash
+    assert worker.restart_delay == pytest.approx(0.1)
+
+    assert decode(pool, [np.full(1600, 0.5, dtype=np.float32)])[0] == ['1600:0.5']
+    assert pool.get_stats()['alive'] == 1
+
+
+def test_watchdog_kills_a_hung_worker(start_pool):
+    pool = start_pool('hang', job_timeout=0.3)
+    worker = pool.acquire(timeout=5)
+    started = time.monotonic()
+    future = pool.submit(worker, [np.zeros(1600, dtype=np.float32)])
+    with pytest.raises(WorkerCrashedError):
+        future.result(timeout=10)
+    assert time.monotonic() - started < 5
+
+    assert pool.get_stats()['timeouts'] == 1
+    assert decode(pool, [np.full(1600, 0.5, dtype=np.float32)])[0] == ['1600:0.5']
+
+
+def test_sessions_keep_their_order_across_workers(start_pool):
+    pool = start_pool(workers=2)
+    scheduler = InferenceScheduler(lambda: None, max_batch_size=2, max_wait_ms=5,
+                                   max_queue_size=64, pool=pool)
+    try:
+        results = {'room-a': [], 'room-b': [], 'room-c': []}
+        futures = []
+        for i in range(12):
+            for session_id, texts in results.items():
+                futures.append(scheduler.submit(
+                    session_id, np.full(160 + i, i, dtype=np.float32), on_result=texts.append))
+        for future in futures:
+            future.result(timeout=10)
+
+        for texts in results.values():
+            assert texts == [f'{160 + i}:{i}' for i in range(12)]
+        assert scheduler.get_stats()['batches'] < len(futures)
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Test the process-wide metrics registry
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import metrics  # noqa: E402
+
+
+def test_histogram_is_shared_by_name():
+    first = metrics.histogram('test_shared_seconds', 'Shared histogram', ['kind'])
+    assert metrics.histogram('test_shared_seconds', 'Shared histogram', ['kind']) is first
+
+    first.labels(kind='a').observe(0.2)
+    assert 'test_shared_seconds_count{kind="a"} 1' in metrics.render()
+
+
+def test_histogram_name_cannot_mean_two_measurements():
+    metrics.histogram('test_decode_seconds', 'Decode time per batch', ['batch_size'])
+    with pytest.raises(ValueError):
+        metrics.histogram('test_decode_seconds', 'Decode time per window', ['batch_size'])
+    with pytest.raises(ValueError):
+        metrics.histogram('test_decode_seconds', 'Decode time per batch')
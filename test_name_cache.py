@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test judge/clerk name enrichment and how many database round trips it costs
+
+Runs against mongomock (skipped when it isn't installed); every find and
+aggregate call counts as one round trip.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from name_cache import StaffNameCache, find_proceeding_with_names  # noqa: E402
+
+
+class CountingCollection:
+    def __init__(self, collection, calls):
+        self._collection = collection
+        self._calls = calls
+
+    def find(self, *args, **kwargs):
+        self._calls.append((self._collection.name, "find"))
+        return self._collection.find(*args, **kwargs)
+
+    def aggregate(self, *args, **kwargs):
+        self._calls.append((self._collection.name, "aggregate"))
+        return self._collection.aggregate(*args, **kwargs)
+
+
+class CountingDatabase:
+    """A database whose collections record every query sent through them"""
+
+    def __init__(self, db):
+        self._db = db
+        self.calls = []
+
+    def __getitem__(self, name):
+        return CountingCollection(self._db[name], self.calls)
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip("mongomock")
+    database = mongomock.MongoClient().courtroom
+    database.judges.insert_many([{"matricule": "JUDGE001", "name": "Judge Ada"},
+                                 {"matricule": "JUDGE002", "name": "Judge Bo"}])
+    database.clerks.insert_one({"matricule": "CLERK001", "name": "Clerk Cy"})
+    database.proceedings.insert_many([
+        {"proceeding_id": "P1", "judge_matricule": "JUDGE001", "clerk_matricule": "CLERK001"},
+        {"proceeding_id": "P2", "judge_matricule": "JUDGE404", "clerk_matricule": "CLERK001"},
+    ])
+    return database
+
+
+def test_proceeding_and_both_names_come_back_in_one_round_trip(db):
+    counting = CountingDatabase(db)
+
+    proceeding = find_proceeding_with_names(counting, "P1")
+
+    assert counting.calls == [("proceedings", "aggregate")]
+    assert proceeding == {"proceeding_id": "P1", "judge_matricule": "JUDGE001",
+                          "clerk_matricule": "CLERK001",
+                          "judge_name": "Judge Ada", "clerk_name": "Clerk Cy"}
+
+
+def test_missing_names_and_proceedings_still_take_one_round_trip(db):
+    counting = CountingDatabase(db)
+
+    proceeding = find_proceeding_with_names(counting, "P2", include_clerk=False)
+    assert "judge_name" not in proceeding and "clerk_name" not in proceeding
+    assert find_proceeding_with_names(counting, "nope") is None
+    assert counting.calls == [("proceedings", "aggregate")] * 2
+
+
+def test_names_are_batched_into_one_query_then_served_from_cache(db):
+    counting = CountingDatabase(db)
+    cache = StaffNameCache(counting)
+
+    judges = ["JUDGE001", "JUDGE002", "JUDGE001"] * 100
+    assert cache.names("judges", judges) == {"JUDGE001": "Judge Ada", "JUDGE002": "Judge Bo"}
+    assert cache.names("judges", judges) == {"JUDGE001": "Judge Ada", "JUDGE002": "Judge Bo"}
+    assert cache.name("clerks", "CLERK001") == "Clerk Cy"
+    assert counting.calls == [("judges", "find"), ("clerks", "find")]
+
+    # Only the uncached matricule is asked for
+    del counting.calls[:]
+    db.judges.insert_one({"matricule": "JUDGE003", "name": "Judge Di"})
+    assert cache.names("judges", ["JUDGE001", "JUDGE003"])["JUDGE003"] == "Judge Di"
+    assert counting.calls == [("judges", "find")]
+
+
+def test_unknown_matricules_are_not_cached(db):
+    cache = StaffNameCache(db)
+
+    assert cache.name("judges", "JUDGE404") is None
+    # Added later by seed.py, outside this API
+    db.judges.insert_one({"matricule": "JUDGE404", "name": "Judge New"})
+    assert cache.name("judges", "JUDGE404") == "Judge New"
+
+
+def test_invalidate_drops_a_changed_name(db):
+    cache = StaffNameCache(db)
+    assert cache.name("clerks", "CLERK001") == "Clerk Cy"
+
+    db.clerks.update_one({"matricule": "CLERK001"}, {"$set": {"name": "Clerk Cy Renamed"}})
+    assert cache.name("clerks", "CLERK001") == "Clerk Cy"
+    cache.invalidate("clerks", "CLERK001")
+    assert cache.name("clerks", "CLERK001") == "Clerk Cy Renamed"
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test which words an overlapping transcription window commits
+
+Words are (start, end, word) stand-ins for faster-whisper's Word objects.
+"""
+
+import os
+import sys
+from collections import namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from overlap_stitcher import select_new_words, words_to_text  # noqa: E402
+
+Word = namedtuple('Word', 'start end word')
+
+
+def committed(words, **options):
+    return [word.word.strip() for word in select_new_words(words, **options)]
+
+
+def test_words_belong_to_the_window_holding_their_midpoint():
+    # 0.5 s overlap, 0.2 s guard: commit midpoints in [0.3, 1.8)
+    words = [
+        Word(0.0, 0.25, ' seen'),      # midpoint 0.125: the previous window's
+        Word(0.1, 0.6, ' straddles'),  # midpoint 0.35: deferred to this window
+        Word(0.8, 1.2, ' new'),
+        Word(1.6, 1.95, ' edge'),      # midpoint 1.775: just inside
+        Word(1.7, 2.0, ' cut'),        # midpoint 1.85: in the guard
+    ]
+    options = dict(overlap_seconds=0.5, window_seconds=2.0, guard_seconds=0.2)
+    assert committed(words, **options) == ['straddles', 'new', 'edge']
+
+    # The next window (starting 1.5 s later) commits the guarded word once
+    shifted = [Word(w.start - 1.5, w.end - 1.5, w.word) for w in words[3:]]
+    assert committed(shifted, **options) == ['cut']
+
+
+def test_start_edge_is_zero_without_overlap():
+    words = [Word(0.0, 0.1, ' first'), Word(0.5, 0.9, ' second')]
+    assert committed(words, overlap_seconds=0.0, window_seconds=2.0, guard_seconds=0.2) == ['first', 'second']
+    # With overlap the start edge moves to overlap - guard
+    assert committed(words, overlap_seconds=0.5, window_seconds=2.0, guard_seconds=0.2) == ['second']
+
+
+def test_end_guard_overrides_the_tail():
+    words = [Word(1.0, 1.4, ' kept'), Word(1.8, 1.98, ' tail')]
+    options = dict(overlap_seconds=0.5, window_seconds=2.0, guard_seconds=0.2)
+    assert committed(words, **options) == ['kept']
+    # A window ending in a pause, or the last one of a session, commits its tail
+    assert committed(words, end_guard_seconds=0.0, **options) == ['kept', 'tail']
+    # The start edge still uses the previous window's guard
+    assert committed([Word(0.2, 0.35, ' early')], end_guard_seconds=0.0, **options) == []
+
+    # A window of only overlap commits just the guard words deferred to it
+    assert committed([Word(0.0, 0.2, ' seen'), Word(0.35, 0.5, ' deferred')],
+                     overlap_seconds=0.5, window_seconds=0.5, guard_seconds=0.2,
+                     end_guard_seconds=0.0) == ['deferred']
+
+
+def test_words_to_text_keeps_whisper_spacing():
+    assert words_to_text([Word(0, 1, ' Your'), Word(1, 2, ' honour'), Word(2, 3, ',')]) == 'Your honour,'
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test pause-aware segmentation of the real-time transcriber's audio
+
+Uses the same synthetic audio as test_voice_activity.py: low-level noise
+for a quiet courtroom and syllable-length tone bursts for speech.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from pause_segmenter import CUT, SKIP, PauseSegmenter  # noqa: E402
+
+SAMPLE_RATE = 16000
+BLOCK = SAMPLE_RATE // 10
+rng = np.random.default_rng(0)
+
+
+def room_noise(seconds, level_db=-60):
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * 10 ** (level_db / 20)).astype(np.float32)
+
+
+def speech(seconds, level_db=-25, noise_db=-60):
+    """Noise with 200 ms voiced bursts every 400 ms"""
+    audio = room_noise(seconds, noise_db)
+    t = np.arange(len(audio)) / SAMPLE_RATE
+    voiced = (t % 0.4) < 0.2
+    audio += (voiced * np.sin(2 * np.pi * 180 * t) * 10 ** (level_db / 20) * np.sqrt(2)).astype(np.float32)
+    return audio
+
+
+def segment(audio, segmenter):
+    """Feed ``audio`` block by block; returns (kind, start_s, end_s, natural) per decision"""
+    decisions = []
+    read = written = 0
+    for start in range(0, len(audio), BLOCK):
+        block = audio[start:start + BLOCK]
+        written += len(block)
+        decision = segmenter.push(block, written - read)
+        if decision[0] in (CUT, SKIP):
+            natural = decision[2] if decision[0] == CUT else None
+            decisions.append((decision[0], read / SAMPLE_RATE, (read + decision[1]) / SAMPLE_RATE, natural))
+            read += decision[1]
+    return decisions
+
+
+def test_cuts_at_pauses_and_skips_silence():
+    audio = np.concatenate([room_noise(1.0), speech(1.6), room_noise(1.0), speech(2.0), room_noise(1.0)])
+    decisions = segment(audio, PauseSegmenter(SAMPLE_RATE))
+
+    cuts = [d for d in decisions if d[0] == CUT]
+    assert len(cuts) == 2
+    assert all(natural for *_, natural in cuts)
+    # Each utterance is closed shortly after it ends, not at a fixed boundary
+    assert 2.6 < cuts[0][2] <= 3.1
+    assert 5.6 < cuts[1][2] <= 6.1
+    # The leading silence never reaches the model
+    assert decisions[0][0] == SKIP and cuts[0][1] >= 0.5
+
+
+def test_continuous_speech_is_cut_at_max_window():
+    decisions = segment(speech(10.0), PauseSegmenter(SAMPLE_RATE, max_seconds=4.0))
+    assert [(kind, natural) for kind, _, _, natural in decisions] == [(CUT, False), (CUT, False)]
+    assert all(end - start == pytest.approx(4.0) for _, start, end, _ in decisions)
+
+
+def test_short_utterance_waits_for_min_window():
+    # A 0.4 s "Yes." followed by a pause is held until the window is 1 s long
+    audio = np.concatenate([speech(0.4), room_noise(2.0)])
+    cuts = [d for d in segment(audio, PauseSegmenter(SAMPLE_RATE, min_seconds=1.0)) if d[0] == CUT]
+    assert len(cuts) == 1
+    assert cuts[0][2] - cuts[0][1] == pytest.approx(1.0)
+
+
+def test_invalid_window_bounds_are_rejected():
+    with pytest.raises(ValueError):
+        PauseSegmenter(SAMPLE_RATE, min_seconds=5.0, max_seconds=4.0)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test that stopping a realtime session transcribes the audio still queued
+
+No microphone or model is used: the session state is set up the way
+start_session does, and _transcribe_chunk records the windows it is given.
+Skipped when sounddevice (PortAudio) can't be imported.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+try:
+    import sounddevice  # noqa: F401
+except (ImportError, OSError) as e:  # OSError: PortAudio library not found
+    pytest.skip(f"sounddevice unavailable: {e}", allow_module_level=True)
+
+import realtime_transcriber  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+SAMPLE_RATE = 16000
+BLOCK = 1600  # 0.1 s, the audio callback's block size
+
+
+def speech(seconds, start=0):
+    """A loud tone whose samples are distinct, so windows can be traced back"""
+    t = np.arange(start, start + int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 220 * t) + 1e-6 * np.arange(len(t))).astype(np.float32)
+
+
+@pytest.fixture
+def transcriber(monkeypatch):
+    monkeypatch.setattr(realtime_transcriber, "model_registry",
+                        ModelRegistry(loader=lambda *args: object(), warmup=False))
+
+    def make(**kwargs):
+        engine = realtime_transcriber.RealtimeTranscriber(**kwargs)
+        engine.windows = []
+        engine._transcribe_chunk = lambda window, overlap_samples=0, end_guard=None: \
+            engine.windows.append((window.copy(), overlap_samples, end_guard))
+        # Same state start_session sets up, without opening the microphone
+        engine.current_session = "session-1"
+        engine.is_recording = True
+        return engine
+    return make
+
+
+def new_audio(windows):
+    return np.concatenate([window[overlap:] for window, overlap, _ in windows])
+
+
+def test_stop_transcribes_blocks_still_in_the_queue(transcriber):
+    engine = transcriber(segmentation="pause")
+    audio = speech(1.3)
+    engine._feed_block(audio[:SAMPLE_RATE])
+    assert engine.windows == []
+    # The processing thread had not picked these up yet
+    for offset in range(SAMPLE_RATE, len(audio), BLOCK):
+        engine.audio_queue.put(audio[offset:offset + BLOCK])
+
+    engine.stop_session()
+
+    assert len(engine.windows) == 1
+    window, overlap, end_guard = engine.windows[0]
+    assert overlap == 0 and end_guard == 0.0
+    np.testing.assert_array_equal(window, audio)
+    assert engine.audio_queue.empty() and engine.ring_buffer.available == 0
+
+
+def test_stop_transcribes_more_queued_audio_than_the_buffer_holds(transcriber):
+    engine = transcriber(segmentation="fixed", chunk_duration=2.0, overlap_duration=0.2)
+    audio = speech(5.0)
+    assert len(audio) > engine.ring_buffer.capacity
+    for offset in range(0, len(audio), BLOCK):
+        engine.audio_queue.put(audio[offset:offset + BLOCK])
+
+    engine.stop_session()
+
+    assert len(engine.windows) == 2
+    # The second window repeats the first one's overlap and nothing is lost
+    assert engine.windows[1][1] == engine.overlap_samples
+    np.testing.assert_array_equal(new_audio(engine.windows), audio)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test the transcription session registry: unique ids, eviction with flush,
+and the memory budget
+
+No model or database is needed - sessions are plain dicts and the flush
+callback records what would have been saved.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from session_registry import SessionRegistry  # noqa: E402
+
+
+@pytest.fixture
+def flushed():
+    return []
+
+
+@pytest.fixture
+def registry(flushed):
+    def on_evict(session_id, session, reason):
+        if session.get('fail'):
+            return False
+        flushed.append((session_id, reason))
+
+    return SessionRegistry(on_evict=on_evict, idle_ttl=60, stopped_ttl=10, max_age=3600, max_bytes=10**6)
+
+
+def test_ids_are_unique(registry):
+    ids = {registry.create({'active': True}) for _ in range(1000)}
+    assert len(ids) == 1000
+    assert registry.get_stats()['created'] == 1000
+
+
+def test_idle_and_stopped_sessions_are_flushed_then_evicted(registry, flushed):
+    live = registry.create({'active': True})
+    stopped = registry.create({'active': False})
+    now = time.monotonic()
+
+    assert registry.sweep(now=now + 30) == 1
+    assert flushed == [(stopped, 'stopped')]
+    assert registry.get(live) is not None
+
+    assert registry.sweep(now=now + 120) == 1
+    assert flushed[-1] == (live, 'idle')
+    assert len(registry) == 0
+
+
+def test_max_age_applies_to_active_sessions(registry, flushed):
+    session_id = registry.create({'active': True})
+    session = registry.get(session_id)
+    session['created_at'] -= 7200
+    registry.touch(session)
+
+    registry.sweep()
+    assert flushed == [(session_id, 'max_age')]
+
+
+def test_failed_flush_keeps_session(registry, flushed):
+    session_id = registry.create({'active': True, 'fail': True})
+
+    assert registry.sweep(now=time.monotonic() + 120) == 0
+    assert registry.get(session_id) is not None
+    assert registry.get_stats()['flush_failures'] == 1
+
+
+def test_memory_budget_evicts_least_recently_active(registry, flushed):
+    registry.max_bytes = 50_000
+    old = registry.create({'active': True})
+    new = registry.create({'active': True})
+    registry.touch(registry.get(old), added_bytes=30_000)
+    registry.touch(registry.get(new), added_bytes=30_000)
+
+    registry.sweep()
+    assert flushed == [(old, 'memory')]
+    assert registry.get(new) is not None
+    assert registry.get_stats()['bytes'] <= registry.max_bytes
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test transcription update streams: the threaded get_updates fallback and
+the asyncio sse_server
+
+No model is needed: the manager is built with only its sessions and hub,
+which is all streaming uses. Each viewer buffers two updates, so dropping
+some is easy to arrange.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+import simple_transcription  # noqa: E402
+from session_registry import SessionRegistry  # noqa: E402
+from simple_transcription import SimpleTranscriptionManager  # noqa: E402
+from sse_hub import SSEHub  # noqa: E402
+from sse_server import AsyncSSEServer  # noqa: E402
+from voice_activity import VadStats  # noqa: E402
+
+
+@pytest.fixture
+def manager():
+    manager = SimpleTranscriptionManager.__new__(SimpleTranscriptionManager)
+    manager.flush_transcript = lambda proceeding_id, text: None
+    manager.sessions = SessionRegistry(on_evict=manager._on_evict)
+    manager.hub = SSEHub(buffer_size=2)
+    manager.vad_stats = VadStats()
+    return manager
+
+
+def say(manager, session_id, *texts):
+    for text in texts:
+        manager._append_transcript(session_id, text)
+
+
+def parse(message):
+    return json.loads(message.split("data: ", 1)[1])
+
+
+def test_replay_from_last_event_id(manager, monkeypatch):
+    session_id = manager.start_session('p-1')
+    say(manager, session_id, 'one', 'two', 'three', 'four', 'five')
+    manager.stop_session(session_id)
+
+    updates = [parse(message) for message in manager.get_updates(session_id, last_event_id=2)]
+    assert [(u['seq'], u['text']) for u in updates] == [(3, 'three'), (4, 'four'), (5, 'five')]
+
+    # Missed updates that fell out of the backlog come back as one snapshot
+    monkeypatch.setattr(simple_transcription, 'SSE_BACKLOG_SIZE', 2)
+    session_id = manager.start_session('p-2')
+    say(manager, session_id, 'one', 'two', 'three', 'four')
+    manager.stop_session(session_id)
+    updates = [parse(message) for message in manager.get_updates(session_id, last_event_id=1)]
+    assert updates == [{'type': 'resync', 'seq': 4, 'full_transcript': 'one two three four'}]
+
+
+def test_viewer_that_fell_behind_is_resynced(manager):
+    session_id = manager.start_session('p-1')
+    say(manager, session_id, 'one')
+    stream = manager.get_updates(session_id, last_event_id=0)
+    assert parse(next(stream))['text'] == 'one'
+
+    # Five more into a buffer of two: three are dropped
+    say(manager, session_id, 'two', 'three', 'four', 'five', 'six')
+    assert parse(next(stream)) == {
+        'type': 'resync', 'seq': 6, 'full_transcript': 'one two three four five six'}
+
+    say(manager, session_id, 'seven')
+    assert parse(next(stream))['text'] == 'seven'
+    manager.stop_session(session_id)
+    assert list(stream) == []
+
+
+def test_final_update_is_sent_when_the_session_ends(manager):
+    session_id = manager.start_session('p-1')
+    say(manager, session_id, 'one')
+    stream = manager.get_updates(session_id, last_event_id=0)
+    assert parse(next(stream))['text'] == 'one'
+
+    say(manager, session_id, 'last words')
+    manager.stop_session(session_id)
+    assert [parse(message)['text'] for message in stream] == ['last words']
+    assert manager.hub.get_stats()['subscribers'] == 0
+
+
+@pytest.fixture
+def server(manager):
+    server = AsyncSSEServer(manager, port=0).start()
+    yield server
+    server.stop()
+
+
+def read_stream(server, session_id, last_event_id=None):
+    """Send a stream request and return a function giving its updates once the stream ends"""
+    connection = socket.create_connection((server.host, server.port), timeout=5)
+    header = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id is not None else ""
+    connection.sendall(f"GET /api/transcription/stream/{session_id} HTTP/1.1\r\n{header}\r\n".encode())
+
+    def updates():
+        received = b""
+        while chunk := connection.recv(65536):
+            received += chunk
+        connection.close()
+        body = received.decode().split("\r\n\r\n", 1)[1]
+        messages = [parse(message) for message in body.split("\n\n") if "data: " in message]
+        return [message for message in messages if 'seq' in message]
+
+    return updates
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_server_replays_from_last_event_id_header(manager, server):
+    session_id = manager.start_session('p-1')
+    say(manager, session_id, 'one', 'two', 'three', 'four', 'five')
+    manager.stop_session(session_id)
+
+    updates = read_stream(server, session_id, last_event_id=3)()
+    assert [(u['seq'], u['text']) for u in updates] == [(4, 'four'), (5, 'five')]
+
+
+def test_server_resyncs_and_sends_the_final_update(manager, server):
+    session_id = manager.start_session('p-1')
+    say(manager, session_id, 'one')
+    updates = read_stream(server, session_id, last_event_id=0)
+    wait_until(lambda: manager.hub.get_stats()['subscribers'] == 1)
+
+    # Hold the server's loop so the viewer falls behind, then end the session
+    held = threading.Event()
+    server.loop.call_soon_threadsafe(held.wait)
+    say(manager, session_id, 'two', 'three', 'four', 'five')
+    say(manager, session_id, 'last words')
+    manager.stop_session(session_id)
+    held.set()
+
+    assert updates() == [
+        {'type': 'transcription', 'text': 'one', 'seq': 1},
+        {'type': 'resync', 'seq': 6, 'full_transcript': 'one two three four five last words'},
+    ]
+
+    # Without a drop, the final update arrives as itself
+    session_id = manager.start_session('p-2')
+    updates = read_stream(server, session_id)
+    wait_until(lambda: manager.hub.get_stats()['subscribers'] == 1)
+    held.clear()
+    server.loop.call_soon_threadsafe(held.wait)
+    say(manager, session_id, 'last words')
+    manager.stop_session(session_id)
+    held.set()
+    assert [(u['seq'], u['text']) for u in updates()] == [(1, 'last words')]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test that the backend API starts without importing the heavy stacks
+
+Imports backend/app.py in a fresh interpreter with ``-X importtime`` and
+checks that face recognition, OpenCV, Pillow, numpy and faster-whisper were
+not imported, and that the whole import stays within the cold-start budget
+(STARTUP_IMPORT_BUDGET_MS, default 1000 ms).
+
+No database is needed - the Mongo client connects lazily.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1000"))
+
+# Top-level packages that must only load on first use or during warm-up
+HEAVY_MODULES = {"face_recognition", "dlib", "cv2", "PIL", "numpy", "faster_whisper", "ctranslate2"}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@pytest.fixture(scope="module")
+def import_profile():
+    """{module: cumulative microseconds} for a cold ``import app``"""
+    env = dict(os.environ, MONGO_URI="mongodb://localhost:27017")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            # Keep the top-level entry when a name appears at several depths
+            profile.setdefault(match.group(4), 0)
+            if len(match.group(3)) == 1 or not profile[match.group(4)]:
+                profile[match.group(4)] = int(match.group(2))
+    return profile
+
+
+def test_heavy_stacks_are_not_imported(import_profile):
+    loaded = {name.split(".")[0] for name in import_profile} & HEAVY_MODULES
+    assert not loaded, f"Imported at startup: {sorted(loaded)}"
+
+
+def test_import_within_budget(import_profile):
+    elapsed_ms = import_profile["app"] / 1000
+    slowest = sorted(import_profile.items(), key=lambda item: -item[1])[:5]
+    assert elapsed_ms <= BUDGET_MS, (
+        f"import app took {elapsed_ms:.0f} ms (budget {BUDGET_MS:.0f} ms); slowest: {slowest}"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
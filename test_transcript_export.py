@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test streaming transcript export
+
+The streamed pieces must add up to exactly what apply_segments assembles,
+whatever mix of appends and edits was saved. Segments are plain dicts -
+no database needed.
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from transcript_export import content_type_and_filename, export_chunks
+from transcript_store import apply_segments, surviving_pieces, truncation_limits
+
+SAVED_AT = datetime(2026, 3, 2, 9, 30)
+
+
+def random_history(rng, saves):
+    """Segments as TranscriptStore.patch would store them"""
+    segments = []
+    length = 0
+    for seq in range(saves):
+        if length and rng.random() < 0.2:
+            offset, text = rng.randint(0, length), "e" * rng.randint(0, 12)
+        else:
+            offset, text = length, f" w{seq}"
+        segments.append({"seq": seq, "offset": offset, "end": offset + len(text),
+                         "text": text, "created_at": SAVED_AT})
+        length = offset + len(text)
+    return segments
+
+
+def export_pieces(segments, chunk_chars):
+    # Limits are computed from a one-pass iterator, as from a cursor
+    limits = truncation_limits(iter(segments))
+    return list(surviving_pieces(segments, limits, chunk_chars))
+
+
+def test_streamed_pieces_match_assembled_text():
+    rng = random.Random(7)
+    for _ in range(200):
+        segments = random_history(rng, rng.randint(0, 60))
+        pieces = export_pieces(segments, chunk_chars=rng.randint(1, 8))
+
+        assert "".join(text for _, _, text in pieces) == apply_segments(segments)
+        # Offsets are where each piece sits in the final text
+        position = 0
+        for offset, _, text in pieces:
+            assert offset == position and text
+            position += len(text)
+
+
+def test_only_edits_are_kept_as_limits():
+    segments = [
+        {"seq": 0, "offset": 0, "end": 5, "text": "hello", "created_at": SAVED_AT},
+        {"seq": 1, "offset": 5, "end": 11, "text": " world", "created_at": SAVED_AT},
+        {"seq": 2, "offset": 2, "end": 4, "text": "LP", "created_at": SAVED_AT},
+        {"seq": 3, "offset": 4, "end": 8, "text": " me!", "created_at": SAVED_AT},
+    ]
+    assert truncation_limits(segments) == [(2, 2)]
+    assert "".join(text for _, _, text in export_pieces(segments, 64)) == "heLP me!"
+
+
+def test_formats_and_gzip():
+    segments = [
+        {"seq": 0, "offset": 0, "end": 9, "text": "The court", "created_at": SAVED_AT},
+        {"seq": 1, "offset": 9, "end": 19, "text": " is in ses", "created_at": SAVED_AT},
+    ]
+    proceeding = {"proceeding_id": "p-1", "case_number": "CFI/2026/17"}
+
+    def body(fmt, compress=None):
+        pieces = surviving_pieces(segments, truncation_limits(segments), 4)
+        return b"".join(export_chunks(fmt, proceeding, "HEADER", pieces, compress))
+
+    assert body("txt") == b"HEADER\n\nThe court is in ses"
+    assert gzip.decompress(body("txt", "gzip")) == body("txt")
+
+    lines = [json.loads(line) for line in body("jsonl").decode("utf-8").splitlines()]
+    assert lines[0] == {"type": "header", **proceeding}
+    assert lines[1] == {"type": "segment", "offset": 0, "saved_at": SAVED_AT.isoformat(), "text": "The "}
+    assert "".join(line["text"] for line in lines[1:]) == "The court is in ses"
+
+    # An empty transcript is just the header
+    assert b"".join(export_chunks("txt", proceeding, "HEADER", iter(()))) == b"HEADER"
+    assert content_type_and_filename("jsonl", "p-1", "gzip") == ("application/gzip", "transcript_p-1.jsonl.gz")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test full-text transcript search
+
+Chunking and snippets are checked on plain strings. The end-to-end test
+saves transcripts through TranscriptStore on a scratch database and checks
+the search chunks always match the assembled text, then searches them.
+
+The end-to-end test needs a local mongod; set TEST_MONGO_URI to use another
+one. It is skipped when none is reachable.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from db_indexes import ensure_indexes
+from mongo_connection import create_client
+from transcript_search import TranscriptSearch, query_terms, snippet_at, split_chunks
+from transcript_store import TranscriptStore
+
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI", "mongodb://localhost:27017")
+TEST_DB_NAME = "courtroom_search_test"
+
+
+def test_chunks_cover_text_and_keep_words_whole():
+    rng = random.Random(2)
+    for _ in range(100):
+        text = " ".join("w" * rng.randint(1, 12) for _ in range(rng.randint(0, 80)))
+        chunks = split_chunks(text, start=500, max_chars=30)
+
+        assert "".join(chunk for _, chunk in chunks) == text
+        position = 500
+        for start, chunk in chunks:
+            assert start == position and len(chunk) <= 30
+            position += len(chunk)
+        # Every cut but the last falls right after a space
+        assert all(chunk.endswith(" ") for _, chunk in chunks[:-1])
+
+    # A word longer than a chunk is still cut
+    assert split_chunks("x" * 70, max_chars=30) == [(0, "x" * 30), (30, "x" * 30), (60, "x" * 10)]
+
+
+def test_query_terms_and_snippets():
+    assert query_terms('"cross examination" Mbarga -objection') == ["cross", "examination", "Mbarga"]
+
+    text = "Counsel: no further questions. " * 10 + "The witness Mbarga identified exhibit 4. " + "Recess. " * 20
+    position, snippet = snippet_at(text, ["mbarga"], max_chars=80)
+    assert text[position:position + 6] == "Mbarga"
+    assert "Mbarga identified exhibit" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…") and len(snippet) <= 82
+
+    # No verbatim match: the snippet opens the chunk
+    assert snippet_at("Short text.", ["absent"]) == (0, "Short text.")
+
+
+@pytest.fixture(scope="module")
+def db():
+    client = create_client(TEST_MONGO_URI, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except ServerSelectionTimeoutError:
+        pytest.skip(f"No mongod reachable at {TEST_MONGO_URI}")
+
+    client.drop_database(TEST_DB_NAME)
+    database = client[TEST_DB_NAME]
+    assert ensure_indexes(database) == []
+    yield database
+    client.drop_database(TEST_DB_NAME)
+
+
+class NoLegacyFiles:
+    def find_one(self, query):
+        return None
+
+    def find(self, query):
+        return []
+
+
+def indexed_text(db, proceeding_id):
+    chunks = list(db.transcript_search.find({"proceeding_id": proceeding_id}).sort("start", 1))
+    return "".join(chunk["text"] for chunk in chunks)
+
+
+def test_saves_keep_search_in_step_and_are_found(db):
+    search = TranscriptSearch(db, chunk_chars=60)
+    store = TranscriptStore(db, NoLegacyFiles(), search=search)
+    db.proceedings.insert_many([
+        {"proceeding_id": "p-1", "case_number": "CFI/2026/1"},
+        {"proceeding_id": "p-2", "case_number": "CFI/2026/2"},
+    ])
+
+    rng = random.Random(4)
+    words = "the court counsel objection sustained witness record hearing".split()
+    for _ in range(80):
+        store.append("p-1", " " + " ".join(rng.choices(words, k=6)))
+        if rng.random() < 0.1:
+            store.patch("p-1", store.length("p-1") // 2, " edited " + rng.choice(words))
+        assert indexed_text(db, "p-1") == store.read("p-1")[0]
+
+    store.append("p-2", "Mr Mbarga produced exhibit 12, the signed contract.")
+    store.append("p-1", " The witness Mbarga was sworn in.")
+
+    hits = search.search("mbarga")
+    assert {hit["proceeding_id"] for hit in hits} == {"p-1", "p-2"}
+    for hit in hits:
+        text, _ = store.read(hit["proceeding_id"])
+        assert text[hit["offset"]:hit["offset"] + 6] == "Mbarga"
+        assert "Mbarga" in hit["snippet"]
+    assert hits[0]["case_number"] in ("CFI/2026/1", "CFI/2026/2")
+
+    assert [hit["proceeding_id"] for hit in search.search("mbarga", proceeding_id="p-2")] == ["p-2"]
+    assert search.search("mbarga -contract", proceeding_id="p-2") == []
+
+    # A lost state is rebuilt from the segments on the next save
+    search.forget("p-2")
+    store.append("p-2", " Exhibit 13 was admitted.")
+    assert indexed_text(db, "p-2") == store.read("p-2")[0]
+
+    store.delete("p-2")
+    assert search.search("contract") == []
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the voice-activity gate that keeps silent chunks away from Whisper
+
+Uses synthetic audio: low-level noise stands in for a quiet courtroom and
+syllable-length tone bursts for speech. No model is needed.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from voice_activity import VadStats, VoiceActivityDetector, is_speech_output  # noqa: E402
+
+SAMPLE_RATE = 16000
+rng = np.random.default_rng(0)
+
+
+def room_noise(seconds, level_db=-60):
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * 10 ** (level_db / 20)).astype(np.float32)
+
+
+def speech(seconds, level_db=-25, noise_db=-60):
+    """Noise with 200 ms voiced bursts every 400 ms"""
+    audio = room_noise(seconds, noise_db)
+    t = np.arange(len(audio)) / SAMPLE_RATE
+    voiced = (t % 0.4) < 0.2
+    audio += (voiced * np.sin(2 * np.pi * 180 * t) * 10 ** (level_db / 20) * np.sqrt(2)).astype(np.float32)
+    return audio
+
+
+def test_silence_is_skipped_and_speech_passes():
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    assert not vad.has_speech(room_noise(2.0))
+    assert vad.has_speech(speech(2.0))
+    assert not vad.has_speech(np.zeros(SAMPLE_RATE * 2, dtype=np.float32))
+    assert not vad.has_speech(np.zeros(0, dtype=np.float32))
+
+
+def test_steady_loud_background_is_not_speech():
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    # Ventilation hum well above the absolute floor, but no change in level
+    for _ in range(3):
+        assert not vad.has_speech(room_noise(2.0, level_db=-35))
+    assert vad.has_speech(speech(2.0, level_db=-15, noise_db=-35))
+
+
+def test_counters_price_skipped_chunks_at_measured_cost():
+    stats = VadStats()
+    vad = VoiceActivityDetector(SAMPLE_RATE, stats)
+    for chunk in (room_noise(2.0), speech(2.0), room_noise(2.0), room_noise(2.0)):
+        if vad.has_speech(chunk):
+            stats.record_inference(0.5)
+
+    result = stats.get_stats()
+    assert result['chunks'] == 4
+    assert result['inference_calls'] == 1
+    assert result['inference_calls_saved'] == 3
+    assert result['skipped_audio_seconds'] == pytest.approx(6.0)
+    assert result['cpu_seconds_saved'] == pytest.approx(1.5)
+
+
+def test_disabled_gate_passes_everything():
+    vad = VoiceActivityDetector(SAMPLE_RATE, enabled=False)
+    assert vad.has_speech(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    assert vad.stats.get_stats()['chunks'] == 0
+
+
+def test_high_no_speech_prob_is_rejected():
+    assert is_speech_output(0.1)
+    assert not is_speech_output(0.95)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))